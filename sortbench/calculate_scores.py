@@ -1,31 +1,45 @@
 import argparse
 
-import pandas as pd
-
-import util.result_utils as result_utils
 import util.eval_utils as eval_utils
+import util.result_utils as result_utils
+import util.result_db_utils as result_db_utils
+import util.score_utils as score_utils
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate benchmark data.")
     parser.add_argument('--csv_file', type=str, default="benchmark_results.csv", help='Path to the CSV file containing the benchmark results (default: benchmark_results.csv)')
-    parser.add_argument('--result_path', type=str, default="benchmark_results", help='Path to the folder where the results files will be written (default: benchmark_results)')
+    parser.add_argument('--result_path', type=str, default="benchmark_results", help='Path to the folder where the results files will be written, or to a SQLite database (.sqlite) with the results (default: benchmark_results)')
     parser.add_argument('--name', type=str, default="sortbench", help='Name of the benchmark data (default: sortbench)')
     parser.add_argument('--mode', type=str, default="basic", help='Mode for the benchmark data, i.e., basic or advanced (default: basic)')
     parser.add_argument('--version', type=str, default="v1.0", help='Version of the benchmark data (default: v1.0)')
+    parser.add_argument('--parquet_path', type=str, default=None, help='Path to a folder where the scores are stored as Parquet dataset in addition to the CSV file, partitioned by mode, model, and size, requires pyarrow (default: None)')
+    parser.add_argument('--score_db', type=str, default=None, help='Path to a SQLite database (.sqlite) where the scores are stored in addition to the CSV file, e.g., the database with the results (default: None)')
+    parser.add_argument('--parse_cache', type=str, default="parse_cache.sqlite", help='Path to the SQLite database where parsed responses, the token counts of <think> traces, and the scores of each model and config are cached, such that only new or changed results are evaluated when the scores are calculated again (default: parse_cache.sqlite)')
+    parser.add_argument('--no_parse_cache', action='store_true', help='Disables the parse, token count, and score caches (default: False)')
+    parser.add_argument('--token_counter', type=str, default=None, help='Tokenizer on the Hugging Face hub for the thinking length of <think> traces without reported reasoning tokens, or "approximate" to approximate the tokens without a tokenizer (default: the DeepSeek-R1 tokenizer)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of processes that score the configs in parallel (default: 1)')
+    parser.add_argument('--chunk_size', type=int, default=score_utils.CHUNK_SIZE, help=f'Number of rows that are scored and written at once (default: {score_utils.CHUNK_SIZE})')
+    parser.add_argument('--repair_stats', action='store_true', help='Prints the tries, hits, and time of the strategies that repair responses that could not be parsed (default: False)')
+    parser.add_argument('--query', type=str, default=None, help='Runs this SQL query on --score_db and writes its result to the CSV file instead of calculating the scores, e.g., "SELECT * FROM scores WHERE Model=\'deepseekr1\' AND Size=256" (default: None)')
 
     args = parser.parse_args()
 
+    if args.query is not None:
+        if args.score_db is None:
+            parser.error('--query requires --score_db')
+        df_query = result_db_utils.get_result_db(args.score_db).query(args.query)
+        df_query.to_csv(args.csv_file, index=False)
+        print(f"Wrote {len(df_query)} rows to {args.csv_file}")
+        return
+
+    parse_cache = None if args.no_parse_cache else args.parse_cache
     config_names = result_utils.fetch_configs_from_results(file_path=args.result_path, name=args.name, mode=args.mode, version=args.version)
-    df_results = None
-    for config in config_names:
-        cur_results = result_utils.load_single_result_from_disk(config, file_path=args.result_path)
-        cur_df_results = eval_utils.evaluate_results(cur_results)
-        if df_results is None:
-            df_results = cur_df_results
-        else:
-            df_results = pd.concat([df_results, cur_df_results])
-    df_results.to_csv(args.csv_file, index=False)
+    # the scores are written in chunks while the configs are evaluated, such that they are never all in memory
+    score_chunks = score_utils.iter_scores(config_names, args.result_path, workers=args.workers, parse_cache=parse_cache, token_counter=args.token_counter, chunk_size=args.chunk_size)
+    score_utils.write_scores(score_chunks, csv_file=args.csv_file, parquet_path=args.parquet_path, score_db=args.score_db)
+    if args.repair_stats:
+        print(eval_utils.get_repair_stats().to_string(index=False))
 
 
 if __name__ == "__main__":
@@ -1,9 +1,70 @@
 import argparse
+import json
 import os
 
 import util.result_utils as result_utils
 import util.data_utils as data_utils
 import util.inference_utils as inference_utils
+import util.client_utils as client_utils
+import util.rate_limit_utils as rate_limit_utils
+import util.batch_utils as batch_utils
+import util.journal_utils as journal_utils
+import util.cache_utils as cache_utils
+import util.scheduler_utils as scheduler_utils
+import util.shard_utils as shard_utils
+
+
+def export_batch_requests(configs, models, result_path, batch_path, batch_name):
+    """
+    Write batch requests for all configs and models for which no results are available yet.
+
+    Parameters:
+    - configs (dict): the configs of the benchmark
+    - models (list): the names of the models
+    - result_path (str): path to the folder with the results
+    - batch_path (str): path to the folder where the batch files are written
+    - batch_name (str): prefix of the names of the batch files
+    """
+    for model in models:
+        missing_configs = {}
+        for config_name, lists in configs.items():
+            if result_utils.check_if_result_available_on_disk(result_path, config_name, model):
+                continue
+            missing_configs[config_name] = lists
+        requests_file = batch_utils.write_batch_requests(missing_configs, model, batch_path, batch_name)
+        if requests_file is None:
+            print(f"Results for model {model} already available, no batch requests written")
+        else:
+            print(f"Wrote batch requests for {len(missing_configs)} configs of model {model} to {requests_file}")
+
+def import_batch_outputs(configs, result_path, batch_path):
+    """
+    Import the outputs of batch requests into the results. For each manifest <stem>.manifest.json written by
+    export_batch_requests, the outputs of the batch are expected in the file <stem>.output.jsonl.
+
+    Parameters:
+    - configs (dict): the configs of the benchmark
+    - result_path (str): path to the folder with the results
+    - batch_path (str): path to the folder with the batch files
+    """
+    for stem in batch_utils.find_batch_manifests(batch_path):
+        output_file = f'{stem}.output.jsonl'
+        if not os.path.exists(output_file):
+            print(f"No batch outputs found for {stem}, expected {output_file}. Skipping.")
+            continue
+        with open(f'{stem}.manifest.json', 'r', encoding="UTF-8") as f:
+            manifest = json.load(f)
+        model = manifest['model']
+        outputs, usage = batch_utils.read_batch_outputs(output_file, with_usage=True)
+        results, incomplete_configs = batch_utils.build_results_from_batch_outputs(outputs, manifest, configs, usage=usage)
+        for config_name in incomplete_configs:
+            print(f"Batch outputs for config {config_name} and model {model} are incomplete. Skipping.")
+        for config_name, config_results in results.items():
+            if result_utils.check_if_result_available_on_disk(result_path, config_name, model):
+                print(f"Results for config {config_name} and model {model} already available. Skipping.")
+                continue
+            result_utils.write_results_to_disk({config_name: config_results}, file_path=result_path, overwrite=False)
+        print(f"Imported batch outputs for {len(results)} configs of model {model}")
 
 
 def main():
@@ -11,13 +72,32 @@ def main():
     parser.add_argument('--data_path', type=str, default="benchmark_data", help='Path to the folder where the data files will be written (default: benchmark_data)')
     parser.add_argument('--result_path', type=str, default="benchmark_results", help='Path to the folder where the results files will be written (default: benchmark_results)')
     parser.add_argument('--name', type=str, default="sortbench", help='Name of the benchmark data (default: sortbench)')
-    parser.add_argument('--mode', type=str, default="basic", help='Mode for the benchmark data, i.e., basic or advanced (default: basic)')
+    parser.add_argument('--mode', nargs='+', default=["basic"], help='Modes for the benchmark data, i.e., basic, advanced, or debug. Multiple modes can be given. (default: basic)')
     parser.add_argument('--version', type=str, default="v1.0", help='Version of the benchmark data (default: v1.0)')
     parser.add_argument('--model_names', nargs='+', default=["gpt-4o-mini"], help='List of model names to run inference on (default: ["gpt-4o-mini"])')
     parser.add_argument('--list_length', type=int, default=None, help='Runs only configurations with lists of this length (default: None)')
     parser.add_argument('--n_lists', type=int, default=None, help='Runs only the first n_lists lists for a configuration (default: None)')
+    parser.add_argument('--use_async', action='store_true', help='Sends the requests for the lists of a configuration concurrently using asyncio (default: False)')
+    parser.add_argument('--scheduler', action='store_true', help='Runs all models and modes with one global work queue per provider, with providers running in parallel (default: False)')
+    parser.add_argument('--max_concurrency_openai', type=int, default=8, help='Maximum number of concurrent requests to OpenAI if --use_async or --scheduler is set (default: 8)')
+    parser.add_argument('--max_concurrency_inncube', type=int, default=4, help='Maximum number of concurrent requests to the Inncube endpoint if --use_async or --scheduler is set (default: 4)')
+    parser.add_argument('--max_concurrency_antropic', type=int, default=4, help='Maximum number of concurrent requests to Antropic if --use_async or --scheduler is set (default: 4)')
+    parser.add_argument('--rate_limit', type=float, default=None, help='Maximum number of requests per second to each provider, the rate is only lowered after rate limit errors. Uses the limits of the providers if None (default: None)')
+    parser.add_argument('--api_base_url', type=str, default=None, help='Sends the requests of all providers to this URL instead of their APIs, e.g., to a mock server started with mock_server.py (default: None)')
+    parser.add_argument('--client_pool_size', type=int, default=32, help='Maximum number of pooled keep-alive connections per API client (default: 32)')
+    parser.add_argument('--no_client_reuse', action='store_true', help='Creates a new API client for every request instead of reusing pooled clients, e.g., to compare latencies (default: False)')
+    parser.add_argument('--cache_path', type=str, default="response_cache", help='Path to the folder where responses are cached, such that repeated requests are not sent again (default: response_cache)')
+    parser.add_argument('--cache_max_mb', type=int, default=1024, help='Maximum size of the response cache in megabytes, least recently used responses are evicted (default: 1024)')
+    parser.add_argument('--no_cache', action='store_true', help='Disables the response cache (default: False)')
+    parser.add_argument('--no_journal', action='store_true', help='Disables the journal that stores each response as soon as it arrives, such that an interrupted run can be resumed (default: False)')
+    parser.add_argument('--record_metrics', action='store_true', help='Stores the latency, time to first token, number of output chunks, and tokens per second of each request in the results (default: False)')
+    parser.add_argument('--shard', type=shard_utils.parse_shard, default=None, help='Runs only the (model, config, list) combinations of shard i of N, given as i/N, e.g., to split a run over several machines. The shards are merged with merge_results.py (default: None)')
+    parser.add_argument('--batch_export', type=str, default=None, help='Writes batch request files for all missing results to this folder instead of running inference (default: None)')
+    parser.add_argument('--batch_import', type=str, default=None, help='Imports the batch outputs <stem>.output.jsonl for the manifests in this folder into the results instead of running inference (default: None)')
 
     args = parser.parse_args()
+    if args.shard is not None and (args.batch_export is not None or args.batch_import is not None):
+        parser.error('--shard cannot be combined with --batch_export or --batch_import')
     
     # Set model names
     models = args.model_names
@@ -25,8 +105,29 @@ def main():
         if not inference_utils.is_model_supported(model):
             raise ValueError(f"Model {model} is not supported by sortbench")
 
+    # Set concurrency and rate limits per provider
+    inference_utils.set_max_concurrency('openai', args.max_concurrency_openai)
+    inference_utils.set_max_concurrency('inncube', args.max_concurrency_inncube)
+    inference_utils.set_max_concurrency('antropic', args.max_concurrency_antropic)
+    if args.rate_limit is not None:
+        for provider in ['openai', 'inncube', 'antropic']:
+            rate_limit_utils.set_rate_limiter(provider, rate_limit_utils.ProviderRateLimiter(max_rate=args.rate_limit))
+
+    # Configure API endpoints and clients
+    if args.api_base_url is not None:
+        for provider in ['openai', 'inncube', 'antropic']:
+            inference_utils.set_base_url(provider, args.api_base_url)
+    client_utils.set_pool_size(args.client_pool_size)
+    client_utils.set_client_reuse(not args.no_client_reuse)
+
+    # Configure response cache
+    if not args.no_cache:
+        cache_utils.set_response_cache(cache_utils.ResponseCache(args.cache_path, max_size_bytes=args.cache_max_mb*1024**2))
+
     # Load benchmark data and existing results
-    configs = data_utils.load_data_local(file_path=args.data_path, name=args.name, mode=args.mode, version=args.version)
+    configs = {}
+    for mode in args.mode:
+        configs.update(data_utils.load_data_local(file_path=args.data_path, name=args.name, mode=mode, version=args.version))
     
     if args.list_length is not None:
         filtered_configs = {}
@@ -48,18 +149,47 @@ def main():
             filtered_configs[config_name] = filtered_lists
         configs = filtered_configs
 
+    if args.batch_export is not None:
+        batch_name = f'{args.name}_{"-".join(args.mode)}_{args.version}'
+        export_batch_requests(configs, models, args.result_path, args.batch_export, batch_name)
+        return
+    if args.batch_import is not None:
+        import_batch_outputs(configs, args.result_path, args.batch_import)
+        return
+
+    # Write results of finished journals, e.g., if a previous run crashed before writing its results
+    journal_path = None
+    if not args.no_journal:
+        journal_path = journal_utils.get_journal_path(args.result_path)
+        n_compacted = journal_utils.compact_journals(args.result_path, configs, shard=args.shard)
+        if n_compacted > 0:
+            print(f"Compacted {n_compacted} finished journals into the results")
+
+    if args.scheduler:
+        scheduler_utils.run_scheduler(configs, models, args.result_path, journal_path=journal_path, record_metrics=args.record_metrics, shard=args.shard)
+        client_utils.close_clients()
+        return
+
     for model in models:
         for config_name, lists in configs.items():
             print(f"Config: {config_name} --- Model {model}")
-            if result_utils.check_if_result_available_on_disk(args.result_path, config_name, model):
+            shard_lists = shard_utils.shard_lists(model, config_name, lists, args.shard)
+            if args.shard is not None and len(shard_lists) == 0:
+                print(f"No lists in shard {args.shard[0]}/{args.shard[1]}, skipping")
+                continue
+            if shard_utils.check_if_shard_available_on_disk(args.result_path, config_name, model, shard_lists, args.shard):
                 print(f"Results already available, skipping")
                 continue
             print('Results not available, running inference')
-            results = result_utils.load_single_result_from_disk(config_name, args.result_path)
-            results = inference_utils.run_single_config_for_model(config_name, lists, model=model, results=results)
+            results = inference_utils.run_single_config_for_model(config_name, shard_lists, model=model, use_async=args.use_async, journal_path=journal_path, record_metrics=args.record_metrics)
             print('Inference finished, writing results to disk')
-            result_utils.write_results_to_disk(results, file_path=args.result_path, overwrite=True)
+            # only the results of the new model are written, the results of other models are kept
+            result_utils.write_results_to_disk(results, file_path=args.result_path, overwrite=False, add_lists=args.shard is not None)
             print('Finished writing results to disk')
+            if journal_path is not None:
+                journal_utils.compact_journal(args.result_path, config_name, model, lists, shard=args.shard)
+
+    client_utils.close_clients()
 
 if __name__ == "__main__":
     main()
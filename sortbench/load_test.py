@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import pandas as pd
+
+import util.inference_utils as inference_utils
+import util.client_utils as client_utils
+import util.rate_limit_utils as rate_limit_utils
+import util.cache_utils as cache_utils
+import util.mock_server_utils as mock_server_utils
+
+_PROVIDERS = ['openai', 'inncube', 'antropic']
+
+
+def create_requests(models, n_requests, list_length, seed=None):
+    """
+    Create the requests of a load test: random integer lists, assigned round robin to the models.
+
+    Parameters:
+    - models (list): the names of the models
+    - n_requests (int): the number of requests
+    - list_length (int): the length of the lists
+    - seed (int): the random seed (optional)
+
+    Returns:
+    - list: tuples (model, unsorted_list)
+    """
+    rng = random.Random(seed)
+    return [(models[i % len(models)], [rng.randint(0, 1000) for _ in range(list_length)]) for i in range(n_requests)]
+
+def _request_row(model, start_time, result=None, error=None):
+    latency = time.perf_counter()-start_time
+    row = {'Model': model, 'Latency': latency, 'Failed': error is not None, 'Time To First Token': None, 'Attempts': None}
+    if result is not None:
+        sorted_list, metrics = result
+        row['Time To First Token'] = metrics['time_to_first_token']
+        row['Attempts'] = metrics['attempts']
+    return row
+
+def run_load_test(requests, use_async=False):
+    """
+    Send the requests through the inference pipeline, i.e., sort_list_with_model or async_sort_list_with_model,
+    including rate limiting and retries.
+
+    Parameters:
+    - requests (list): tuples (model, unsorted_list), see create_requests
+    - use_async (bool): whether to send the requests concurrently, limited by the concurrency of the providers (default: False)
+
+    Returns:
+    - df_requests (pd.DataFrame): one row per request with the model, the latency including retries, whether it failed, the time to first token, and the number of attempts
+    - duration (float): the wall time of the whole test in seconds
+    """
+    start_time = time.perf_counter()
+    if use_async:
+        rows = asyncio.run(_run_load_test_async(requests))
+    else:
+        rows = []
+        for model, unsorted_list in requests:
+            request_start = time.perf_counter()
+            try:
+                rows.append(_request_row(model, request_start, result=inference_utils.sort_list_with_model(unsorted_list, model, return_metrics=True)))
+            except Exception as e:
+                rows.append(_request_row(model, request_start, error=e))
+    duration = time.perf_counter()-start_time
+    return pd.DataFrame(rows), duration
+
+async def _run_load_test_async(requests):
+    semaphores = {provider: asyncio.Semaphore(inference_utils.get_max_concurrency(provider)) for provider in _PROVIDERS}
+
+    async def send_request(model, unsorted_list):
+        async with semaphores[inference_utils.get_provider(model)]:
+            request_start = time.perf_counter()
+            try:
+                return _request_row(model, request_start, result=await inference_utils.async_sort_list_with_model(unsorted_list, model, return_metrics=True))
+            except Exception as e:
+                return _request_row(model, request_start, error=e)
+
+    try:
+        return await asyncio.gather(*[send_request(model, unsorted_list) for model, unsorted_list in requests])
+    finally:
+        await client_utils.async_close_clients()
+
+def summarize_load_test(df_requests, duration):
+    """
+    Summarize a load test per model and in total.
+
+    Parameters:
+    - df_requests (pd.DataFrame): the requests, see run_load_test
+    - duration (float): the wall time of the test in seconds
+
+    Returns:
+    - pd.DataFrame: the number of requests and failures, the requests per second, and the p50, p95, and p99 latency
+    """
+    rows = []
+    for model, df_model in list(df_requests.groupby('Model', sort=False)) + [('Total', df_requests)]:
+        latencies = df_model.loc[df_model['Failed']==False, 'Latency']
+        rows.append({'Model': model,
+                     'Requests': len(df_model),
+                     'Failed': int(df_model['Failed'].sum()),
+                     'Requests/s': len(df_model)/duration,
+                     'P50 Latency': latencies.quantile(0.5),
+                     'P95 Latency': latencies.quantile(0.95),
+                     'P99 Latency': latencies.quantile(0.99),
+                     'Mean Attempts': df_model['Attempts'].mean()})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the inference pipeline against a local mock server.")
+    parser.add_argument('--model_names', nargs='+', default=["gpt-4o-mini", "llama3.1", "claude-3-5-haiku-20241022"], help='Models to send the requests to, one per provider exercises all code paths (default: ["gpt-4o-mini", "llama3.1", "claude-3-5-haiku-20241022"])')
+    parser.add_argument('--n_requests', type=int, default=300, help='Number of requests (default: 300)')
+    parser.add_argument('--list_length', type=int, default=64, help='Length of the lists (default: 64)')
+    parser.add_argument('--use_async', action='store_true', help='Sends the requests concurrently using asyncio (default: False)')
+    parser.add_argument('--max_concurrency', type=int, default=8, help='Maximum number of concurrent requests per provider if --use_async is set (default: 8)')
+    parser.add_argument('--rate_limit', type=float, default=None, help='Requests per second of the rate limiter of each provider, uses the defaults of the providers if None (default: None)')
+    parser.add_argument('--url', type=str, default=None, help='URL of a running mock server, e.g., started with mock_server.py. Starts a server in the background if None. (default: None)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Delay of the mock server before the first byte of a response in seconds (default: 0.05)')
+    parser.add_argument('--chunk_delay', type=float, default=0.0, help='Delay of the mock server between the chunks of a streaming response in seconds (default: 0.0)')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='Rate of responses with status 500 (default: 0.0)')
+    parser.add_argument('--rate_limit_rate', type=float, default=0.0, help='Rate of responses with status 429 (default: 0.0)')
+    parser.add_argument('--truncation_rate', type=float, default=0.0, help='Rate of truncated responses (default: 0.0)')
+    parser.add_argument('--parsing_error_rate', type=float, default=0.0, help='Rate of responses taken from known_parsing_errors (default: 0.0)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the lists and the mock server (default: 42)')
+    parser.add_argument('--csv_file', type=str, default=None, help='Path to a CSV file to which the individual requests are written (default: None)')
+
+    args = parser.parse_args()
+
+    for model in args.model_names:
+        if not inference_utils.is_model_supported(model):
+            raise ValueError(f"Model {model} is not supported by sortbench")
+
+    server = None
+    url = args.url
+    if url is None:
+        settings = mock_server_utils.MockServerSettings(latency=args.latency, chunk_delay=args.chunk_delay, error_rate=args.error_rate,
+                                                        rate_limit_rate=args.rate_limit_rate, truncation_rate=args.truncation_rate,
+                                                        parsing_error_rate=args.parsing_error_rate, seed=args.seed)
+        server = mock_server_utils.MockServer(settings)
+        url = server.start()
+        print(f"Started mock server at {url}")
+
+    # send everything to the mock server, the keys are not checked
+    for provider in _PROVIDERS:
+        inference_utils.set_base_url(provider, url)
+        inference_utils.set_max_concurrency(provider, args.max_concurrency)
+        if args.rate_limit is not None:
+            rate_limit_utils.set_rate_limiter(provider, rate_limit_utils.ProviderRateLimiter(max_rate=args.rate_limit))
+    for key in ["OPENAI_API_KEY", "INNCUBE_API_KEY", "ANTROPIC_API_KEY"]:
+        os.environ.setdefault(key, "mock")
+    cache_utils.set_response_cache(None)
+
+    requests = create_requests(args.model_names, args.n_requests, args.list_length, seed=args.seed)
+    try:
+        df_requests, duration = run_load_test(requests, use_async=args.use_async)
+    finally:
+        client_utils.close_clients()
+        if server is not None:
+            server.stop()
+
+    df_summary = summarize_load_test(df_requests, duration)
+    print(f"Sent {len(requests)} requests in {duration:.2f}s")
+    print(df_summary.to_string(index=False, float_format=lambda x: f'{x:.3f}'))
+    if args.csv_file is not None:
+        df_requests.to_csv(args.csv_file, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+
+import util.data_utils as data_utils
+import util.merge_utils as merge_utils
+import util.result_utils as result_utils
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the results of several results folders, e.g., of the shards of a run, into one results folder.")
+    parser.add_argument('--result_paths', nargs='+', required=True, help='Paths to the results folders or SQLite databases that are merged. If the same list is found in several folders, the first folder is kept.')
+    parser.add_argument('--output_path', type=str, default="benchmark_results", help='Path to the folder or SQLite database (.sqlite) where the merged results are written. Results that are already stored there are merged as well. (default: benchmark_results)')
+    parser.add_argument('--data_path', type=str, default="benchmark_data", help='Path to the folder with the benchmark data, needed to import text results (default: benchmark_data)')
+    parser.add_argument('--name', type=str, default="sortbench", help='Name of the benchmark data (default: sortbench)')
+    parser.add_argument('--mode', nargs='+', default=["basic", "advanced", "debug"], help='Modes for the benchmark data, i.e., basic, advanced, or debug. Multiple modes can be given. (default: basic advanced debug)')
+    parser.add_argument('--version', type=str, default="v1.0", help='Version of the benchmark data (default: v1.0)')
+    parser.add_argument('--text_model', type=str, default=None, help='Name of the model for results folders with text results, e.g., benchmark_results_o3-mini-Web. By default, the name is taken from the folder name benchmark_results_<model>. (default: None)')
+    parser.add_argument('--allow_conflicts', action='store_true', help='Writes the merged results even if conflicting responses or lists were found, keeping those of the first folder (default: False)')
+    parser.add_argument('--dry_run', action='store_true', help='Only reports duplicates and conflicts without writing the merged results (default: False)')
+
+    args = parser.parse_args()
+
+    # the results of the output folder are part of the merge, such that merging into an existing folder adds to it
+    result_paths = list(args.result_paths)
+    if (os.path.isdir(args.output_path) or os.path.isfile(args.output_path)) and not any(os.path.abspath(path) == os.path.abspath(args.output_path) for path in result_paths):
+        result_paths.insert(0, args.output_path)
+
+    sources = []
+    for result_path in result_paths:
+        for mode in args.mode:
+            if merge_utils.has_text_results(result_path):
+                model = args.text_model
+                if model is None:
+                    folder_name = os.path.basename(os.path.normpath(result_path))
+                    if not folder_name.startswith('benchmark_results_'):
+                        parser.error(f'{result_path} contains text results, the name of the model has to be given with --text_model')
+                    model = folder_name[len('benchmark_results_'):]
+                configs = data_utils.load_data_local(file_path=args.data_path, name=args.name, mode=mode, version=args.version)
+                results, errors = merge_utils.load_text_results(result_path, model, configs, name=args.name, mode=mode, version=args.version)
+                for error in errors:
+                    print(f"Skipping text result {error}")
+            else:
+                results = result_utils.load_results_from_disk(file_path=result_path, name=args.name, mode=mode, version=args.version)
+            print(f"Found {len(results)} {mode} configs in {result_path}")
+            sources.append((result_path, results))
+
+    merged, n_duplicates, conflicts = merge_utils.merge_results(sources)
+    print(f"Merged {len(merged)} configs, {n_duplicates} duplicate lists were found")
+    for conflict in conflicts:
+        print(f"Conflict: {conflict}")
+    if args.dry_run:
+        return
+    if len(conflicts) > 0 and not args.allow_conflicts:
+        print(f"Found {len(conflicts)} conflicts, no results written. Use --allow_conflicts to keep the results of the first folder.")
+        sys.exit(1)
+    merge_utils.write_merged_results(merged, args.output_path)
+    print(f"Merged results written to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
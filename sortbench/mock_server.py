@@ -0,0 +1,37 @@
+import argparse
+
+import util.mock_server_utils as mock_server_utils
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local mock server for the OpenAI and Antropic APIs.")
+    parser.add_argument('--host', type=str, default="127.0.0.1", help='Host to bind to (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to bind to (default: 8000)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Delay before the first byte of a response in seconds (default: 0.0)')
+    parser.add_argument('--chunk_delay', type=float, default=0.0, help='Delay between the chunks of a streaming response in seconds (default: 0.0)')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='Rate of responses with status 500 (default: 0.0)')
+    parser.add_argument('--rate_limit_rate', type=float, default=0.0, help='Rate of responses with status 429 (default: 0.0)')
+    parser.add_argument('--retry_after', type=float, default=0.1, help='Value of the retry-after header of 429 responses in seconds (default: 0.1)')
+    parser.add_argument('--truncation_rate', type=float, default=0.0, help='Rate of truncated responses (default: 0.0)')
+    parser.add_argument('--parsing_error_rate', type=float, default=0.0, help='Rate of responses taken from the model outputs in --parsing_errors_path (default: 0.0)')
+    parser.add_argument('--parsing_errors_path', type=str, default="known_parsing_errors", help='Path to the folder with model outputs that could not be parsed (default: known_parsing_errors)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed (default: None)')
+
+    args = parser.parse_args()
+
+    settings = mock_server_utils.MockServerSettings(latency=args.latency, chunk_delay=args.chunk_delay, error_rate=args.error_rate,
+                                                    rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+                                                    truncation_rate=args.truncation_rate, parsing_error_rate=args.parsing_error_rate,
+                                                    parsing_errors_path=args.parsing_errors_path, seed=args.seed)
+    server = mock_server_utils.MockServer(settings, host=args.host, port=args.port)
+    print(f"Serving mock API at {server.url}, use --api_base_url={server.url} with create_results.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
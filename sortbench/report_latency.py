@@ -0,0 +1,29 @@
+import argparse
+
+import util.result_utils as result_utils
+import util.timing_utils as timing_utils
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the latency of the requests recorded in the benchmark results.")
+    parser.add_argument('--csv_file', type=str, default=None, help='Path to a CSV file to which the summary is written (default: None)')
+    parser.add_argument('--result_path', type=str, default="benchmark_results", help='Path to the folder with the results files (default: benchmark_results)')
+    parser.add_argument('--name', type=str, default="sortbench", help='Name of the benchmark data (default: sortbench)')
+    parser.add_argument('--mode', type=str, default="basic", help='Mode for the benchmark data, i.e., basic or advanced (default: basic)')
+    parser.add_argument('--version', type=str, default="v1.0", help='Version of the benchmark data (default: v1.0)')
+
+    args = parser.parse_args()
+
+    results = result_utils.load_results_from_disk(file_path=args.result_path, name=args.name, mode=args.mode, version=args.version)
+    df_metrics = timing_utils.collect_request_metrics(results)
+    if len(df_metrics) == 0:
+        print("No request metrics found in the results, run create_results.py with --record_metrics to record them")
+        return
+    df_summary = timing_utils.summarize_request_metrics(df_metrics)
+    print(df_summary.to_string(index=False, float_format=lambda x: f'{x:.3f}'))
+    if args.csv_file is not None:
+        df_summary.to_csv(args.csv_file, index=False)
+
+
+if __name__ == "__main__":
+    main()
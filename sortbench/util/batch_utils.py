@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+
+from util.inference_utils import build_request_params, get_provider, get_usage
+
+def get_custom_id(config_name, model, list_name):
+    """
+    Create the custom id of a batch request. Config names contain characters that are not allowed in custom ids
+    and may be too long, so the id is a hash. The mapping back to config and list is stored in the manifest.
+
+    Parameters:
+    - config_name (str): name of the config
+    - model (str): name of the model
+    - list_name (str): name of the list
+    """
+    digest = hashlib.sha1(f'{config_name}|{model}|{list_name}'.encode('UTF-8')).hexdigest()
+    return f'sortbench-{digest[:32]}'
+
+def create_batch_requests(configs, model):
+    """
+    Create the batch requests for all lists of the given configs for a model. OpenAI and Inncube use the
+    OpenAI batch format, which is also understood by vLLM, Antropic uses the format of the message batches API.
+
+    Parameters:
+    - configs (dict): dict of configs, each a dict of list names to unsorted lists
+    - model (str): name of the model
+
+    Returns:
+    - requests (list): the batch requests
+    - manifest (dict): the manifest that maps the custom ids to configs and lists
+    """
+    provider = get_provider(model)
+    requests = []
+    manifest = {'model': model, 'provider': provider, 'requests': {}}
+    for config_name, lists in configs.items():
+        for list_name, unsorted_list in lists.items():
+            custom_id = get_custom_id(config_name, model, list_name)
+            params = build_request_params(unsorted_list, model)
+            if provider == 'antropic':
+                request = {'custom_id': custom_id, 'params': params}
+            else:
+                request = {'custom_id': custom_id, 'method': 'POST', 'url': '/v1/chat/completions', 'body': params}
+            requests.append(request)
+            manifest['requests'][custom_id] = {'config_name': config_name, 'list_name': list_name}
+    return requests, manifest
+
+def write_batch_requests(configs, model, batch_path, name):
+    """
+    Write the batch requests for a model to a JSONL file and the manifest to a JSON file next to it.
+    The files are named <name>_<model>.jsonl and <name>_<model>.manifest.json.
+
+    Parameters:
+    - configs (dict): dict of configs, each a dict of list names to unsorted lists
+    - model (str): name of the model
+    - batch_path (str): path to the folder where the files are written
+    - name (str): prefix of the file names
+
+    Returns:
+    - str: path of the JSONL file, None if there are no requests
+    """
+    requests, manifest = create_batch_requests(configs, model)
+    if len(requests) == 0:
+        return None
+    os.makedirs(batch_path, exist_ok=True)
+    requests_file = os.path.join(batch_path, f'{name}_{model}.jsonl')
+    with open(requests_file, 'w', encoding="UTF-8") as f:
+        for request in requests:
+            f.write(json.dumps(request) + '\n')
+    with open(os.path.join(batch_path, f'{name}_{model}.manifest.json'), 'w', encoding="UTF-8") as f:
+        json.dump(manifest, f)
+    return requests_file
+
+def parse_batch_output_line(line):
+    """
+    Parse a single line of a batch output file. Supports the output format of the OpenAI batch API and of
+    the Antropic message batches API.
+
+    Parameters:
+    - line (dict): the parsed JSON of the line
+
+    Returns:
+    - custom_id (str): the custom id of the request
+    - response (str): the text of the response, None if the request failed
+    """
+    custom_id = line['custom_id']
+    if 'result' in line:
+        # Antropic
+        result = line['result']
+        if result.get('type') != 'succeeded':
+            return custom_id, None
+        return custom_id, result['message']['content'][0]['text']
+    # OpenAI
+    if line.get('error') is not None:
+        return custom_id, None
+    response = line.get('response')
+    if response is None or response.get('status_code') != 200:
+        return custom_id, None
+    return custom_id, response['body']['choices'][0]['message']['content'].strip()
+
+def parse_batch_output_usage(line):
+    """
+    Parse the token usage of a single line of a batch output file, see parse_batch_output_line.
+
+    Parameters:
+    - line (dict): the parsed JSON of the line
+
+    Returns:
+    - dict: the token usage in the format of inference_utils.get_usage, None if the request failed
+    """
+    if 'result' in line:
+        # Antropic
+        if line['result'].get('type') != 'succeeded':
+            return None
+        return get_usage(line['result']['message'].get('usage'))
+    # OpenAI
+    response = line.get('response')
+    if line.get('error') is not None or response is None or response.get('status_code') != 200:
+        return None
+    return get_usage(response['body'].get('usage'))
+
+def read_batch_outputs(output_file, with_usage=False):
+    """
+    Read a batch output file.
+
+    Parameters:
+    - output_file (str): path of the JSONL file with the batch outputs
+    - with_usage (bool): whether to also return the token usage of the responses (default: False)
+
+    Returns:
+    - dict: custom ids mapped to the text of the responses. Failed requests are mapped to None.
+    - dict: custom ids mapped to the token usage, only for responses with usage. Only if with_usage is set.
+    """
+    outputs = {}
+    usage = {}
+    with open(output_file, 'r', encoding="UTF-8") as f:
+        for line in f:
+            if len(line.strip()) == 0:
+                continue
+            line = json.loads(line)
+            custom_id, response = parse_batch_output_line(line)
+            outputs[custom_id] = response
+            cur_usage = parse_batch_output_usage(line)
+            if cur_usage is not None:
+                usage[custom_id] = cur_usage
+    if with_usage:
+        return outputs, usage
+    return outputs
+
+def build_results_from_batch_outputs(outputs, manifest, configs, usage=None):
+    """
+    Convert batch outputs to results in the format of write_results_to_disk. Results of a config are only
+    created if the responses for all lists of the config in the manifest are available, such that
+    partial results are never written.
+
+    Parameters:
+    - outputs (dict): custom ids mapped to the text of the responses, see read_batch_outputs
+    - manifest (dict): the manifest written by write_batch_requests
+    - configs (dict): dict of configs, each a dict of list names to unsorted lists
+    - usage (dict): custom ids mapped to the token usage, see read_batch_outputs (optional)
+
+    Returns:
+    - results (dict): the results, with one result for the model of the manifest per config
+    - incomplete_configs (list): names of configs for which responses are missing
+    """
+    if usage is None:
+        usage = {}
+    model = manifest['model']
+    sorted_lists_per_config = {}
+    usage_per_config = {}
+    missing_per_config = {}
+    for custom_id, request in manifest['requests'].items():
+        config_name = request['config_name']
+        sorted_lists_per_config.setdefault(config_name, {})
+        response = outputs.get(custom_id)
+        if response is None:
+            missing_per_config[config_name] = missing_per_config.get(config_name, 0) + 1
+        else:
+            sorted_lists_per_config[config_name][request['list_name']] = response
+            if custom_id in usage:
+                usage_per_config.setdefault(config_name, {})[request['list_name']] = usage[custom_id]
+
+    results = {}
+    incomplete_configs = []
+    for config_name, sorted_lists in sorted_lists_per_config.items():
+        if config_name in missing_per_config or config_name not in configs:
+            incomplete_configs.append(config_name)
+            continue
+        lists = configs[config_name]
+        # keep the order of the lists in the config
+        ordered_sorted_lists = {list_name: sorted_lists[list_name] for list_name in lists if list_name in sorted_lists}
+        cur_results = {'model': model, 'sorted_lists': ordered_sorted_lists}
+        if config_name in usage_per_config:
+            config_usage = usage_per_config[config_name]
+            cur_results['usage'] = {list_name: config_usage[list_name] for list_name in lists if list_name in config_usage}
+        results[config_name] = {'unsorted_lists': lists,
+                                'results': [cur_results]}
+    return results, incomplete_configs
+
+def find_batch_manifests(batch_path):
+    """
+    Find all manifests in a folder with batch files.
+
+    Parameters:
+    - batch_path (str): path to the folder with the batch files
+
+    Returns:
+    - list: the paths of the manifests, without the .manifest.json suffix
+    """
+    suffix = '.manifest.json'
+    return sorted([os.path.join(batch_path, filename[:-len(suffix)]) for filename in os.listdir(batch_path) if filename.endswith(suffix)])
@@ -0,0 +1,389 @@
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# the cache that is used by the inference functions, None if responses are not cached
+_RESPONSE_CACHE = None
+# the cache that is used for the parsed responses in the evaluation, None if parsed responses are not cached
+_PARSE_CACHE = None
+# the cache that is used for the thinking length in the evaluation, None if token counts are not cached
+_TOKEN_COUNT_CACHE = None
+# the cache that is used for the evaluated results of the models, None if scores are not cached
+_SCORE_CACHE = None
+
+def get_cache_key(model, system_prompt, prompt, params=None, url=None):
+    """
+    Compute the key of a request for the response cache. The key is a hash of everything that determines the
+    response: the model, the prompts, the sampling parameters, and the endpoint that serves the model.
+
+    Parameters:
+    - model (str): the model name
+    - system_prompt (str): the system prompt
+    - prompt (str): the prompt
+    - params (dict): the sampling parameters of the request, e.g., temperature and max_tokens (optional)
+    - url (str): the URL of the endpoint, None for the default endpoint of the provider of the model (optional)
+
+    Returns:
+    - str: the hex digest of the key
+    """
+    if params is None:
+        params = {}
+    request = {'model': model, 'system_prompt': system_prompt, 'prompt': prompt, 'params': params}
+    if url is not None:
+        # responses of other endpoints, e.g., of the mock server, must not be served for the default endpoint
+        request['url'] = url
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode('UTF-8')).hexdigest()
+
+class ResponseCache:
+    """
+    On-disk cache of the responses of the models. Each response is stored in its own file that is named after
+    the cache key. If the size of the cache exceeds the limit, the least recently used responses are evicted.
+    The most recently used responses are also kept in memory.
+    """
+
+    def __init__(self, cache_path, max_size_bytes=1024**3, max_memory_entries=1024):
+        """
+        Parameters:
+        - cache_path (str): path to the folder of the cache
+        - max_size_bytes (int): the maximum size of all cached responses in bytes (default: 1 GiB)
+        - max_memory_entries (int): the maximum number of responses that are kept in memory (default: 1024)
+        """
+        self.cache_path = cache_path
+        self.max_size_bytes = max_size_bytes
+        self.max_memory_entries = max_memory_entries
+        self._lock = threading.Lock()
+        self._memory = collections.OrderedDict()
+        os.makedirs(cache_path, exist_ok=True)
+        self._size_bytes = sum(os.path.getsize(file) for file, _ in self._cache_files())
+
+    def _file(self, key):
+        return os.path.join(self.cache_path, key[:2], f'{key}.json')
+
+    def _cache_files(self):
+        """
+        List all files of the cache with their last access time.
+        """
+        files = []
+        for directory in os.listdir(self.cache_path):
+            directory = os.path.join(self.cache_path, directory)
+            if not os.path.isdir(directory):
+                continue
+            for filename in os.listdir(directory):
+                if filename.endswith('.json'):
+                    file = os.path.join(directory, filename)
+                    files.append((file, os.path.getmtime(file)))
+        return files
+
+    def get(self, key):
+        """
+        Get a cached response.
+
+        Parameters:
+        - key (str): the cache key, see get_cache_key
+
+        Returns:
+        - str: the cached response, None if the response is not cached
+        """
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        return entry['response']
+
+    def get_entry(self, key):
+        """
+        Get a cached response together with the token usage of the request that created it.
+
+        Parameters:
+        - key (str): the cache key, see get_cache_key
+
+        Returns:
+        - dict: the cached 'response' and its 'usage', which is None if unknown. None if the response is not cached.
+        """
+        file = self._file(key)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        try:
+            if entry is None:
+                with open(file, 'r', encoding="UTF-8") as f:
+                    data = json.load(f)
+                entry = {'response': data['response'], 'usage': data.get('usage')}
+            # the modification time is used as last access time for the eviction
+            os.utime(file)
+        except (OSError, ValueError, KeyError):
+            # the file may have been evicted by another process
+            with self._lock:
+                self._memory.pop(key, None)
+            return None
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        """
+        Keep a response in memory and drop the least recently used responses beyond the limit. Requires the lock.
+        """
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, key, response, usage=None):
+        """
+        Store a response in the cache.
+
+        Parameters:
+        - key (str): the cache key, see get_cache_key
+        - response (str): the response of the model
+        - usage (dict): the token usage reported by the API (optional)
+        """
+        if response is None:
+            return
+        file = self._file(key)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        # write to a temporary file first, such that readers never see partial files
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(file), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding="UTF-8") as f:
+            json.dump({'response': response, 'usage': usage, 'created': time.time()}, f)
+        old_size = os.path.getsize(file) if os.path.exists(file) else 0
+        os.replace(tmp_file, file)
+        with self._lock:
+            self._remember(key, {'response': response, 'usage': usage})
+            self._size_bytes += os.path.getsize(file) - old_size
+            if self._size_bytes > self.max_size_bytes:
+                self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used responses until the cache uses at most 90% of its maximum size.
+        """
+        target_size = 0.9*self.max_size_bytes
+        for file, _ in sorted(self._cache_files(), key=lambda item: item[1]):
+            if self._size_bytes <= target_size:
+                break
+            try:
+                size = os.path.getsize(file)
+                os.remove(file)
+            except OSError:
+                continue
+            self._size_bytes -= size
+            self._memory.pop(os.path.basename(file)[:-len('.json')], None)
+
+    def size_bytes(self):
+        """
+        Get the size of all cached responses in bytes.
+        """
+        return self._size_bytes
+
+def set_response_cache(cache):
+    """
+    Set the cache that is used for the responses of all models. Use None to disable caching.
+
+    Parameters:
+    - cache (ResponseCache): the cache
+    """
+    global _RESPONSE_CACHE
+    _RESPONSE_CACHE = cache
+
+def get_response_cache():
+    """
+    Get the cache that is used for the responses of all models. None if caching is disabled.
+    """
+    return _RESPONSE_CACHE
+
+def get_parse_cache_key(response, expected_type, parser_version):
+    """
+    Compute the key of a response for the parse cache. The key is a hash of everything that determines the parsed
+    list: the response, the type of the items, and the version of the parser.
+
+    Parameters:
+    - response (str): the response of the model
+    - expected_type (type): the type of the items of the unsorted list
+    - parser_version (int): the version of the parser, see eval_utils.PARSER_VERSION
+
+    Returns:
+    - str: the hex digest of the key
+    """
+    return hashlib.sha256(json.dumps([parser_version, expected_type.__name__, response]).encode('UTF-8')).hexdigest()
+
+class _SQLiteCache:
+    """
+    Key-value cache in a table of a SQLite database, where the values are stored as JSON. New entries are kept in
+    memory until they are flushed. Several caches may use different tables of the same database.
+    """
+
+    # the name of the table, set by the subclasses
+    table = None
+
+    def __init__(self, cache_file):
+        """
+        Parameters:
+        - cache_file (str): path to the SQLite database of the cache, created if it does not exist
+        """
+        self.cache_file = cache_file
+        os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+        # several processes may use the cache, writers wait for each other
+        self._connection = sqlite3.connect(cache_file, timeout=60)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(f'CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID')
+        self._pending = {}
+
+    def get(self, key):
+        """
+        Get a cached value.
+
+        Parameters:
+        - key (str): the cache key
+
+        Returns:
+        - object: the value, None if the key is not cached
+        """
+        value = self._pending.get(key)
+        if value is not None:
+            return value
+        row = self._connection.execute(f'SELECT value FROM {self.table} WHERE key=?', (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        """
+        Store a value, see flush.
+
+        Parameters:
+        - key (str): the cache key
+        - value (object): the value, which must be serializable as JSON
+        """
+        self._pending[key] = value
+
+    def flush(self):
+        """
+        Write the new entries to the database in a single transaction.
+        """
+        if len(self._pending) == 0:
+            return
+        with self._connection:
+            self._connection.executemany(f'INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)',
+                                         [(key, json.dumps(value)) for key, value in self._pending.items()])
+        self._pending = {}
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+class ParseCache(_SQLiteCache):
+    """
+    SQLite cache of the parsed responses, such that the responses do not have to be parsed again when the scores
+    are recalculated, e.g., after a change of the score. The keys are computed with get_parse_cache_key and the
+    values are the results of eval_utils.eval_str_list.
+    """
+
+    table = 'parsed_responses'
+
+    def get(self, key):
+        parsed = super().get(key)
+        return None if parsed is None else tuple(parsed)
+
+def get_token_count_cache_key(text, counter_name):
+    """
+    Compute the key of a text for the token count cache.
+
+    Parameters:
+    - text (str): the text whose tokens are counted
+    - counter_name (str): the name of the token counter, e.g., the name of the tokenizer
+
+    Returns:
+    - str: the hex digest of the key
+    """
+    return hashlib.sha256(json.dumps([counter_name, text]).encode('UTF-8')).hexdigest()
+
+class TokenCountCache(_SQLiteCache):
+    """
+    SQLite cache of the number of tokens of texts, e.g., of the <think> traces of the responses. The keys are
+    computed with get_token_count_cache_key.
+    """
+
+    table = 'token_counts'
+
+def get_score_cache_key(config_name, unsorted_lists, result, versions):
+    """
+    Compute the key of the results of a model for a config for the score cache. The key is a hash of everything
+    that determines the scores: the responses and usage of the model, the unsorted lists they refer to, and the
+    versions of the evaluation.
+
+    Parameters:
+    - config_name (str): the name of the config
+    - unsorted_lists (dict): the unsorted lists of the config
+    - result (dict): the results of the model, with the model, the sorted lists, and the usage
+    - versions (list): the versions of the parser, the scores, and the token counter
+
+    Returns:
+    - str: the hex digest of the key
+    """
+    content = [versions, config_name, result['model'], {list_name: unsorted_lists[list_name] for list_name in result['sorted_lists']},
+               result['sorted_lists'], result.get('usage')]
+    return hashlib.sha256(json.dumps(content).encode('UTF-8')).hexdigest()
+
+class ScoreCache(_SQLiteCache):
+    """
+    SQLite cache of the evaluated results of a model for a config, such that only new or changed results are
+    evaluated when the scores are recalculated. The keys are computed with get_score_cache_key and the values
+    are the rows of the results before the scores are computed, see eval_utils.evaluate_results.
+    """
+
+    table = 'scores'
+
+def set_parse_cache(cache):
+    """
+    Set the cache that is used for the parsed responses in the evaluation. Use None to disable caching.
+
+    Parameters:
+    - cache (ParseCache): the cache
+    """
+    global _PARSE_CACHE
+    _PARSE_CACHE = cache
+
+def get_parse_cache():
+    """
+    Get the cache that is used for the parsed responses in the evaluation. None if caching is disabled.
+    """
+    return _PARSE_CACHE
+
+def set_token_count_cache(cache):
+    """
+    Set the cache that is used for the token counts of the thinking length in the evaluation. Use None to disable
+    caching.
+
+    Parameters:
+    - cache (TokenCountCache): the cache
+    """
+    global _TOKEN_COUNT_CACHE
+    _TOKEN_COUNT_CACHE = cache
+
+def get_token_count_cache():
+    """
+    Get the cache that is used for the token counts of the thinking length. None if caching is disabled.
+    """
+    return _TOKEN_COUNT_CACHE
+
+def set_score_cache(cache):
+    """
+    Set the cache that is used for the evaluated results in the evaluation. Use None to disable caching.
+
+    Parameters:
+    - cache (ScoreCache): the cache
+    """
+    global _SCORE_CACHE
+    _SCORE_CACHE = cache
+
+def get_score_cache():
+    """
+    Get the cache that is used for the evaluated results in the evaluation. None if caching is disabled.
+    """
+    return _SCORE_CACHE
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+
+import anthropic
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+# settings for the connection pools of the HTTP clients
+_POOL_SETTINGS = {'max_connections': 32, 'max_keepalive_connections': 16, 'keepalive_expiry': 60.0}
+
+# clients are kept alive for the whole run, one per (provider, base_url, api_key)
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+_REUSE_CLIENTS = True
+
+def set_pool_size(max_connections, max_keepalive_connections=None, keepalive_expiry=None):
+    """
+    Configure the connection pool of the HTTP clients. Only affects clients that are created afterwards.
+
+    Parameters:
+    - max_connections (int): the maximum number of connections per client
+    - max_keepalive_connections (int): the maximum number of idle connections that are kept alive. Uses max_connections if None. (default: None)
+    - keepalive_expiry (float): the number of seconds after which idle connections are closed (optional)
+    """
+    if max_connections < 1:
+        raise ValueError("max_connections must be a positive integer")
+    if max_keepalive_connections is None:
+        max_keepalive_connections = max_connections
+    _POOL_SETTINGS['max_connections'] = max_connections
+    _POOL_SETTINGS['max_keepalive_connections'] = max_keepalive_connections
+    if keepalive_expiry is not None:
+        _POOL_SETTINGS['keepalive_expiry'] = keepalive_expiry
+
+def set_client_reuse(reuse_clients):
+    """
+    Enable or disable the reuse of clients. If disabled, a new client is created for every request, which
+    is the behavior of sortbench before the client registry was added. Useful for comparing latencies.
+
+    Parameters:
+    - reuse_clients (bool): whether clients are kept alive and reused
+    """
+    global _REUSE_CLIENTS
+    _REUSE_CLIENTS = reuse_clients
+
+def _limits():
+    return httpx.Limits(**_POOL_SETTINGS)
+
+def _create_client(provider, api_key, base_url, use_async):
+    """
+    Create a new client for a provider with a pooled keep-alive HTTP client. The retries of the SDKs are
+    disabled, because retries are handled by sortbench with the rate limiter of the provider.
+    """
+    if provider in ['openai', 'inncube']:
+        if use_async:
+            return AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=DefaultAsyncHttpxClient(limits=_limits()), max_retries=0)
+        return OpenAI(api_key=api_key, base_url=base_url, http_client=DefaultHttpxClient(limits=_limits()), max_retries=0)
+    elif provider == 'antropic':
+        if use_async:
+            return anthropic.AsyncAnthropic(api_key=api_key, base_url=base_url, http_client=anthropic.DefaultAsyncHttpxClient(limits=_limits()), max_retries=0)
+        return anthropic.Anthropic(api_key=api_key, base_url=base_url, http_client=anthropic.DefaultHttpxClient(limits=_limits()), max_retries=0)
+    raise ValueError(f"Provider {provider} not supported")
+
+def get_client(provider, api_key, base_url=None, use_async=False):
+    """
+    Get a client for a provider. Clients are created once per (provider, base_url, api_key) and reused for all
+    requests of the run. Async clients are additionally bound to the running event loop, because their
+    connections cannot be shared between event loops.
+
+    Clients must be handed back with release_client after use.
+
+    Parameters:
+    - provider (str): the provider name, i.e., 'openai', 'inncube', or 'antropic'
+    - api_key (str): the API key
+    - base_url (str): the URL of the API endpoint. Uses the default of the provider if None. (default: None)
+    - use_async (bool): whether to return an async client (default: False)
+    """
+    if not _REUSE_CLIENTS:
+        return _create_client(provider, api_key, base_url, use_async)
+
+    loop_id = id(asyncio.get_running_loop()) if use_async else None
+    key = (provider, base_url, api_key, use_async, loop_id)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _create_client(provider, api_key, base_url, use_async)
+            _CLIENTS[key] = client
+    return client
+
+def release_client(client):
+    """
+    Hand back a client after use. Closes the client if clients are not reused.
+
+    Parameters:
+    - client: the client returned by get_client
+    """
+    if not _REUSE_CLIENTS:
+        client.close()
+
+async def async_release_client(client):
+    """
+    Hand back an async client after use. Closes the client if clients are not reused.
+
+    Parameters:
+    - client: the client returned by get_client
+    """
+    if not _REUSE_CLIENTS:
+        await client.close()
+
+def close_clients():
+    """
+    Close all synchronous clients of the registry.
+    """
+    with _CLIENTS_LOCK:
+        keys = [key for key in _CLIENTS if not key[3]]
+        clients = [_CLIENTS.pop(key) for key in keys]
+    for client in clients:
+        client.close()
+
+async def async_close_clients():
+    """
+    Close all async clients of the registry that belong to the running event loop.
+    """
+    loop_id = id(asyncio.get_running_loop())
+    with _CLIENTS_LOCK:
+        keys = [key for key in _CLIENTS if key[3] and key[4] == loop_id]
+        clients = [_CLIENTS.pop(key) for key in keys]
+    for client in clients:
+        await client.close()
@@ -1,7 +1,12 @@
 import os
 import re
+import time
 import pandas as pd
-from collections import Counter
+
+import util.cache_utils as cache_utils
+import util.literal_utils as literal_utils
+import util.metrics_utils as metrics_utils
+import util.token_utils as token_utils
 
 def count_unordered_pairs(lst):
     """
@@ -13,12 +18,7 @@ def count_unordered_pairs(lst):
     Returns:
     - int: The number of unordered pairs in the list.
     """
-    count = 0
-    for i in range(len(lst)):
-        for j in range(i + 1, len(lst)):
-            if lst[i] > lst[j]:
-                count += 1
-    return count
+    return metrics_utils.count_inversions(lst)
 
 def count_unordered_neighbors(lst):
     """
@@ -30,11 +30,7 @@ def count_unordered_neighbors(lst):
     Returns:
     - int: The number of unordered neighbors in the list.
     """
-    count = 0
-    for i in range(len(lst) - 1):
-        if lst[i] > lst[i + 1]:
-            count += 1
-    return count
+    return metrics_utils.count_neighbor_inversions(lst)
 
 def count_missing_items(unsorted_list, sorted_list):
     """
@@ -47,10 +43,7 @@ def count_missing_items(unsorted_list, sorted_list):
     Returns:
     - int: The number of missing items in the sorted list compared to the unsorted list.
     """
-    unsorted_counter = Counter(unsorted_list)
-    sorted_counter = Counter(sorted_list)
-    missing_items = unsorted_counter - sorted_counter
-    return sum(missing_items.values())
+    return metrics_utils.count_multiset_difference(unsorted_list, sorted_list)[0]
 
 def count_additional_items(unsorted_list, sorted_list):
     """
@@ -63,10 +56,7 @@ def count_additional_items(unsorted_list, sorted_list):
     Returns:
     - int: The number of additional items in the sorted list compared to the unsorted list.
     """
-    unsorted_counter = Counter(unsorted_list)
-    sorted_counter = Counter(sorted_list)
-    additional_items = sorted_counter - unsorted_counter
-    return sum(additional_items.values())
+    return metrics_utils.count_multiset_difference(unsorted_list, sorted_list)[1]
 
 #########################################
 # Functions for handling parsing errors #
@@ -89,7 +79,7 @@ def missing_closing_broken_quotes(str_list):
     str_list = str_list.replace("]", "']")
     sorted_list = None
     try:
-        sorted_list = eval(str_list)
+        sorted_list = literal_utils.parse_literal(str_list)
     except:
         sorted_list = None
     return sorted_list
@@ -104,7 +94,7 @@ def missing_closing_bracket(str_list):
     str_list = str_list[:last_comma_index] + ']'
     sorted_list = None
     try:
-        sorted_list = eval(str_list)
+        sorted_list = literal_utils.parse_literal(str_list)
     except:
         sorted_list = None
     return sorted_list
@@ -118,7 +108,7 @@ def strings_without_quotes(str_list):
     str_list = str_list.replace("]", "']")
     sorted_list = None
     try:
-        sorted_list = eval(str_list)
+        sorted_list = literal_utils.parse_literal(str_list)
     except:
         pass
     return sorted_list
@@ -130,7 +120,7 @@ def drop_newlines(str_list):
     str_list = str_list.replace('\n', ' ')
     sorted_list = None
     try:
-        sorted_list = eval(str_list)
+        sorted_list = literal_utils.parse_literal(str_list)
     except:
         pass
     return sorted_list
@@ -147,7 +137,7 @@ def drop_and_fix_quotes(str_list):
     str_list = str_list.replace("]", "']")
     sorted_list = None
     try:
-        sorted_list = eval(str_list)
+        sorted_list = literal_utils.parse_literal(str_list)
     except:
         pass
     return sorted_list
@@ -165,7 +155,7 @@ def drop_quotes_and_newlines(str_list):
     str_list = str_list.replace("]", "']")
     sorted_list = None
     try:
-        sorted_list = eval(str_list)
+        sorted_list = literal_utils.parse_literal(str_list)
         # sanity check for length of list items
         if len(sorted_list)==1:
             sorted_list = None
@@ -181,7 +171,7 @@ def drop_after_last_closing_bracket(str_list):
     cropped_sorted_list = cropped_sorted_list[cropped_sorted_list.rfind('['):]
     sorted_list = None
     try:
-        sorted_list = eval(cropped_sorted_list)
+        sorted_list = literal_utils.parse_literal(cropped_sorted_list)
     except:
         pass 
         # cropped_sorted_list = str_list[:str_list.rfind(',')] + ']'
@@ -194,7 +184,7 @@ def drop_after_first_closing_bracket(str_list):
     str_list = str_list[:str_list.find(']')+1]
     sorted_list = None
     try:
-        sorted_list = eval(str_list)
+        sorted_list = literal_utils.parse_literal(str_list)
         if len(sorted_list)<=1:
             sorted_list = None
         for item in sorted_list:
@@ -222,7 +212,7 @@ def latex_matcher(str_list):
         str_list = str_list + ']'
     sorted_list = None
     try:
-        sorted_list = eval(str_list)
+        sorted_list = literal_utils.parse_literal(str_list)
         if len(sorted_list)<=1:
             sorted_list = None
     except:
@@ -248,7 +238,7 @@ def first_lines_latex_matcher(str_list):
             str_list = str_list + ']'
         sorted_list = None
         try:
-            sorted_list = eval(str_list)
+            sorted_list = literal_utils.parse_literal(str_list)
         except:
             sorted_list = None
         return sorted_list
@@ -273,7 +263,7 @@ def last_lines_latex_matcher(str_list):
             str_list = str_list + ']'
         sorted_list = None
         try:
-            sorted_list = eval(str_list)
+            sorted_list = literal_utils.parse_literal(str_list)
         except:
             sorted_list = None
         return sorted_list
@@ -293,7 +283,7 @@ def last_line_latex_matcher(str_list):
         str_list = str_list.replace(r'\]', ']')
         sorted_list = None
         try:
-            sorted_list = eval(str_list)
+            sorted_list = literal_utils.parse_literal(str_list)
         except:
             sorted_list = None
         return sorted_list
@@ -310,7 +300,7 @@ def last_line_list(str_list):
     sorted_list = None
     if last_line.startswith('[') and last_line.endswith(']'):
         try:
-            sorted_list = eval(last_line)
+            sorted_list = literal_utils.parse_literal(last_line)
         except:
             pass
     return sorted_list
@@ -327,7 +317,7 @@ def last_line_list_no_close(str_list):
     if last_line.startswith('['):
         last_line = last_line[:last_line.rfind(',')] + ']'
         try:
-            sorted_list = eval(last_line)
+            sorted_list = literal_utils.parse_literal(last_line)
         except:
             pass
     return sorted_list
@@ -338,7 +328,7 @@ def last_items_incomplete(str_list):
         # drop all ... from string
         str_list = str_list.replace('...', '')
         try:
-            sorted_list = eval(str_list)
+            sorted_list = literal_utils.parse_literal(str_list)
         except:
             pass
     return sorted_list
@@ -442,6 +432,182 @@ def last_line_is_list_matcher(str_list):
             sorted_list = lst
     return sorted_list
     
+#####################################
+# Registry of the repair strategies #
+#####################################
+
+class RepairStrategy:
+    """
+    A repair of a response that could not be parsed. Strategies are either for responses with brackets or for
+    responses without brackets. Within its group, the strategy is only tried if its precondition holds for the
+    features of the response, see get_repair_features. Preconditions are necessary conditions for the repair to
+    succeed, such that skipping a strategy never changes the result. The tries, hits, and time of the strategy
+    are counted, see get_repair_stats.
+    """
+
+    def __init__(self, repair, error_type, brackets, precondition=None):
+        self.name = repair.__name__
+        self.repair = repair
+        self.error_type = error_type
+        self.brackets = brackets
+        self.precondition = precondition
+        self.reset_stats()
+
+    def applies(self, features):
+        return features['has_brackets'] == self.brackets and (self.precondition is None or self.precondition(features))
+
+    def reset_stats(self):
+        self.tries = 0
+        self.hits = 0
+        self.time = 0.0
+
+    def try_repair(self, str_list):
+        start_time = time.perf_counter()
+        self.tries += 1
+        try:
+            sorted_list = self.repair(str_list)
+        finally:
+            self.time += time.perf_counter() - start_time
+        if sorted_list is not None:
+            self.hits += 1
+        return sorted_list
+
+def get_repair_features(str_list):
+    """
+    Compute the features of a response that decide which repair strategies are tried. Each feature needs a
+    single scan of the string.
+
+    Parameters:
+    - str_list (str): The response that could not be parsed.
+
+    Returns:
+    - dict: The features of the response.
+    """
+    return {
+        'has_brackets': '[' in str_list or ']' in str_list,
+        'has_opening_bracket': '[' in str_list,
+        'has_closing_bracket': ']' in str_list,
+        'is_bracketed': str_list.startswith('[') and str_list.endswith(']'),
+        'n_commas': str_list.count(','),
+        'n_lines': str_list.count('\n') + 1,
+        'has_ellipsis': '...' in str_list,
+        'has_latex_open': '\\[' in str_list,
+        'has_latex_close': '\\]' in str_list,
+        'ends_with_latex': str_list.endswith('\\]'),
+        'has_braces': '{' in str_list and '}' in str_list,
+        'has_backticks': '```' in str_list,
+        'has_enumeration': '. ' in str_list,
+        'is_linewise': str_list.strip().startswith('The sorted list'),
+    }
+
+# the repair strategies in the order in which they are tried, the first successful repair is used
+REPAIR_STRATEGIES = [
+    # responses without brackets
+    RepairStrategy(numbered_list_matcher, 'Numbered, line-wise list', False, lambda f: f['has_enumeration']),
+    RepairStrategy(backtick_matcher, 'List in backticks', False, lambda f: f['has_backticks']),
+    RepairStrategy(curly_braces_matcher, 'List in latex', False, lambda f: f['has_braces']),
+    RepairStrategy(linewise_matcher, 'Line-wise list with content berfore list', False, lambda f: f['is_linewise']),
+    RepairStrategy(last_line_is_list_matcher, 'Multi-line output with comma-separated list in last line', False, lambda f: f['n_commas'] > 4),
+    # responses with brackets
+    RepairStrategy(missing_closing_bracket, 'Missing closing bracket', True, lambda f: f['n_commas'] > 0),
+    # without ellipsis, the response is not changed
+    RepairStrategy(last_items_incomplete, 'Incomplete list items at the end', True, lambda f: f['is_bracketed'] and f['has_ellipsis']),
+    RepairStrategy(missing_closing_broken_quotes, 'Missing closing bracket and broken quotes', True, lambda f: f['n_commas'] > 0),
+    RepairStrategy(strings_without_quotes, 'String list without quotes', True),
+    # without newlines, the response is not changed
+    RepairStrategy(drop_newlines, 'Invalid newlines in list', True, lambda f: f['n_lines'] > 1),
+    RepairStrategy(drop_and_fix_quotes, 'Broken quotes', True),
+    RepairStrategy(drop_quotes_and_newlines, 'Broken quotes and invalid newlines', True),
+    # without closing bracket, the cropped response is empty
+    RepairStrategy(drop_after_last_closing_bracket, 'Content after last closing bracket', True, lambda f: f['has_closing_bracket']),
+    RepairStrategy(drop_after_first_closing_bracket, 'Multiple closing brackets, valid list before first closing bracket', True, lambda f: f['has_closing_bracket']),
+    RepairStrategy(latex_matcher, 'List as latex', True, lambda f: f['ends_with_latex']),
+    RepairStrategy(first_lines_latex_matcher, 'List as latex with additional content after list', True,
+                   lambda f: f['n_lines'] > 2 and f['has_latex_close']),
+    RepairStrategy(last_lines_latex_matcher, 'List as latex with additional content before list', True,
+                   lambda f: f['n_lines'] > 2 and f['has_latex_open'] and f['has_latex_close']),
+    RepairStrategy(last_line_latex_matcher, 'List as latex with additional content before list', True,
+                   lambda f: f['n_lines'] > 2 and f['has_latex_open'] and f['has_latex_close']),
+    # for a single line, the last line is the response that could not be parsed
+    RepairStrategy(last_line_list, 'Content before list', True, lambda f: f['n_lines'] > 1),
+    RepairStrategy(last_line_list_no_close, 'Content before list without closing bracket', True, lambda f: f['has_opening_bracket']),
+]
+
+def get_repair_stats():
+    """
+    Get the tries, hits, and time of the repair strategies since the last reset, e.g., to see where the time of
+    parsing is spent on large runs.
+
+    Returns:
+    - pd.DataFrame: The stats of each strategy in the order in which they are tried.
+    """
+    return pd.DataFrame([{'Strategy': strategy.name, 'Error Type': strategy.error_type, 'Tries': strategy.tries,
+                          'Hits': strategy.hits, 'Time': strategy.time} for strategy in REPAIR_STRATEGIES])
+
+def reset_repair_stats():
+    for strategy in REPAIR_STRATEGIES:
+        strategy.reset_stats()
+
+def add_repair_stats(df_stats):
+    """
+    Add the stats of the repair strategies of another process, e.g., of a worker that scored configs.
+
+    Parameters:
+    - df_stats (pd.DataFrame): The stats of the strategies, see get_repair_stats.
+    """
+    for strategy, (tries, hits, repair_time) in zip(REPAIR_STRATEGIES, df_stats[['Tries', 'Hits', 'Time']].itertuples(index=False, name=None)):
+        strategy.tries += int(tries)
+        strategy.hits += int(hits)
+        strategy.time += float(repair_time)
+
+def repair_str_list(str_list):
+    """
+    Try the repair strategies that apply to a response that could not be parsed.
+
+    Parameters:
+    - str_list (str): The response that could not be parsed.
+
+    Returns:
+    - sorted_list (list): The repaired list. None if no strategy succeeded.
+    - error_type (str): The error type of the successful strategy. None if no strategy succeeded.
+    """
+    features = get_repair_features(str_list)
+    for strategy in REPAIR_STRATEGIES:
+        if strategy.applies(features):
+            sorted_list = strategy.try_repair(str_list)
+            if sorted_list is not None:
+                return sorted_list, strategy.error_type
+    return None, None
+    
+# the version of the parsing of responses, which has to be increased whenever eval_str_list or the repair
+# strategies change, such that cached parsed responses are not used anymore
+PARSER_VERSION = 1
+
+def parse_response(response, expected_type, config_name='config', model_name='model', list_name='lst'):
+    """
+    Parse a response with eval_str_list. If a parse cache is set, see cache_utils.set_parse_cache, the parsed
+    response is taken from the cache and only responses that are not cached are parsed.
+
+    Parameters:
+    - response (str): the response of the model
+    - expected_type (type): the type of the items of the unsorted list
+    - config_name (str): the name of the config, for debugging (default: 'config')
+    - model_name (str): the name of the model, for debugging (default: 'model')
+    - list_name (str): the name of the list, for debugging (default: 'lst')
+
+    Returns:
+    - tuple: the result of eval_str_list
+    """
+    parse_cache = cache_utils.get_parse_cache()
+    if parse_cache is None:
+        return eval_str_list(response, expected_type, debug=True, config_name=config_name, model_name=model_name, list_name=list_name)
+    key = cache_utils.get_parse_cache_key(response, expected_type, PARSER_VERSION)
+    parsed = parse_cache.get(key)
+    if parsed is None:
+        parsed = eval_str_list(response, expected_type, debug=True, config_name=config_name, model_name=model_name, list_name=list_name)
+        parse_cache.put(key, parsed)
+    return parsed
+
 def eval_str_list(str_list, expected_type, debug=True, config_name='config', model_name='model', list_name='lst'):
     """
     Tries to parse a list given as a string. If the string is not valid python, we try to things:
@@ -474,95 +640,9 @@ def eval_str_list(str_list, expected_type, debug=True, config_name='config', mod
     str_list = str_list.replace('input()', '')
     
     try:
-        sorted_list = eval(str_list)
+        sorted_list = literal_utils.parse_literal(str_list)
     except:
-        # find last closing bracket and crop after and then first open bracket before
-        last_closing_bracket_index = str_list.rfind(']')
-        last_opening_bracket_index = str_list.rfind('[')
-        if last_closing_bracket_index==-1 and last_opening_bracket_index==-1:
-            # no brackets at all
-            if sorted_list is None:
-                sorted_list = numbered_list_matcher(str_list)
-                if sorted_list is not None:
-                    error_type = 'Numbered, line-wise list'
-            if sorted_list is None:
-                sorted_list = backtick_matcher(str_list)
-                if sorted_list is not None:
-                    error_type = 'List in backticks'
-            if sorted_list is None:
-                sorted_list = curly_braces_matcher(str_list)
-                if sorted_list is not None:
-                    error_type = 'List in latex'
-            if sorted_list is None:
-                sorted_list = linewise_matcher(str_list)
-                if sorted_list is not None:
-                    error_type = 'Line-wise list with content berfore list'
-            if sorted_list is None:
-                sorted_list = last_line_is_list_matcher(str_list)
-                if sorted_list is not None:
-                    error_type = 'Multi-line output with comma-separated list in last line'
-        else:
-            # has some brackets
-            if sorted_list is None:
-                sorted_list = missing_closing_bracket(str_list)
-                if sorted_list is not None:
-                    error_type = 'Missing closing bracket'
-            if sorted_list is None:
-                sorted_list = last_items_incomplete(str_list)
-                if sorted_list is not None:
-                    error_type = 'Incomplete list items at the end'
-            if sorted_list is None:
-                sorted_list = missing_closing_broken_quotes(str_list)
-                if sorted_list is not None:
-                    error_type = 'Missing closing bracket and broken quotes'
-            if sorted_list is None:
-                sorted_list = strings_without_quotes(str_list)
-                if sorted_list is not None:
-                    error_type = 'String list without quotes'
-            if sorted_list is None:
-                sorted_list = drop_newlines(str_list)
-                if sorted_list is not None:
-                    error_type = 'Invalid newlines in list'
-            if sorted_list is None:
-                sorted_list = drop_and_fix_quotes(str_list)
-                if sorted_list is not None:
-                    error_type = 'Broken quotes'
-            if sorted_list is None:
-                sorted_list = drop_quotes_and_newlines(str_list)
-                if sorted_list is not None:
-                    error_type = 'Broken quotes and invalid newlines'
-            if sorted_list is None:
-                sorted_list = drop_after_last_closing_bracket(str_list)
-                if sorted_list is not None:
-                    error_type = 'Content after last closing bracket'
-            if sorted_list is None:
-                sorted_list = drop_after_first_closing_bracket(str_list)
-                if sorted_list is not None:
-                    error_type = 'Multiple closing brackets, valid list before first closing bracket'
-            if sorted_list is None:
-                sorted_list = latex_matcher(str_list)
-                if sorted_list is not None:
-                    error_type = 'List as latex'
-            if sorted_list is None:
-                sorted_list = first_lines_latex_matcher(str_list)
-                if sorted_list is not None:
-                    error_type = 'List as latex with additional content after list'
-            if sorted_list is None:
-                sorted_list = last_lines_latex_matcher(str_list)
-                if sorted_list is not None:
-                    error_type = 'List as latex with additional content before list'
-            if sorted_list is None:
-                sorted_list = last_line_latex_matcher(str_list)
-                if sorted_list is not None:
-                    error_type = 'List as latex with additional content before list'
-            if sorted_list is None:
-                sorted_list = last_line_list(str_list)
-                if sorted_list is not None:
-                    error_type = 'Content before list'
-            if sorted_list is None:
-                sorted_list = last_line_list_no_close(str_list)
-                if sorted_list is not None:
-                    error_type = 'Content before list without closing bracket'
+        sorted_list, error_type = repair_str_list(str_list)
             
     if sorted_list is None and debug:
         file_name = f'not_parsed_{config_name}_{model_name}_{list_name}.txt'
@@ -610,9 +690,193 @@ def eval_str_list(str_list, expected_type, debug=True, config_name='config', mod
     return (sorted_list, error_type, is_list, has_ellipsis, required_type_parsing)
     
 
+def get_thinking_length(response, usage=None):
+    """
+    Get the number of reasoning tokens of a response, see get_thinking_lengths.
+
+    Parameters:
+    - response (str): the raw response of the model
+    - usage (dict): the token usage stored with the response (optional)
+
+    Returns:
+    - int: the number of reasoning tokens, 0 if there is no reasoning
+    """
+    return get_thinking_lengths([response], [usage])[0]
+
+def get_thinking_lengths(responses, usages):
+    """
+    Get the number of reasoning tokens of responses. The reasoning tokens reported by the API are used if they
+    are stored with the response. Otherwise, e.g., for results without usage or for <think> traces of models
+    hosted on Inncube, the tokens before </think> are counted with the token counter, see
+    token_utils.set_thinking_token_counter. The traces of all responses are counted in one batch, and if a token
+    count cache is set, see cache_utils.set_token_count_cache, only traces that are not cached are counted.
+
+    Parameters:
+    - responses (list): the raw responses of the model
+    - usages (list): the token usage stored with each response, None if there is no usage
+
+    Returns:
+    - list: the number of reasoning tokens of each response, 0 if there is no reasoning
+    """
+    thinking_lengths = [0]*len(responses)
+    # the positions of the responses whose traces are counted
+    traces = {}
+    for i, (response, usage) in enumerate(zip(responses, usages)):
+        if usage is not None and usage.get('reasoning_tokens') is not None:
+            thinking_lengths[i] = usage['reasoning_tokens']
+            continue
+        thinking_pos = response.rfind('</think>')
+        if thinking_pos!=-1:
+            traces.setdefault(response[:thinking_pos+8], []).append(i)
+    if len(traces) == 0:
+        return thinking_lengths
+
+    counter = token_utils.get_thinking_token_counter()
+    token_count_cache = cache_utils.get_token_count_cache()
+    counts = {}
+    if token_count_cache is not None:
+        for trace in traces:
+            count = token_count_cache.get(cache_utils.get_token_count_cache_key(trace, counter.name))
+            if count is not None:
+                counts[trace] = count
+    missing = [trace for trace in traces if trace not in counts]
+    for trace, count in zip(missing, counter.count(missing)):
+        counts[trace] = count
+        if token_count_cache is not None:
+            token_count_cache.put(cache_utils.get_token_count_cache_key(trace, counter.name), count)
+    for trace, positions in traces.items():
+        for i in positions:
+            thinking_lengths[i] = counts[trace]
+    return thinking_lengths
+
+# the columns of the metrics of a parsed list, see metrics_utils.compute_list_metrics
+_LIST_METRICS = ['Unordered Pairs Before', 'Unordered Pairs After', 'Unordered Neighbors Before', 'Unordered Neighbors After',
+                 'Missing Items', 'Additional Items', 'Longest Sorted Subsequence', 'Kendall Tau', 'Spearman Footrule']
+
+# the version of the evaluated results, which has to be increased whenever the rows of evaluate_results change,
+# e.g., if a metric is added, such that cached results are evaluated again
+SCORE_VERSION = 1
+
+# the columns that are null if a response could not be parsed, they are floats in all chunks of the scores
+_NULLABLE_COLUMNS = _LIST_METRICS + ['Output List Length']
+
+def _flush_caches():
+    for cache in [cache_utils.get_parse_cache(), cache_utils.get_token_count_cache(), cache_utils.get_score_cache()]:
+        if cache is not None:
+            cache.flush()
+
+def iter_evaluated_rows(config_name, unsorted_lists, model_results):
+    """
+    Evaluate the results of the models for a config one model at a time. The rows of a model are yielded before
+    the results of the next model are evaluated, such that the results can be loaded and the rows can be written
+    while they are evaluated, see result_utils.iter_config_results. If a score cache is set, see
+    cache_utils.set_score_cache, only the results of models that changed since they were cached are evaluated.
+
+    Parameters:
+    - config_name (str): The name of the config.
+    - unsorted_lists (dict): The unsorted lists of the config.
+    - model_results (iterable): The results of the models, each with the model and the sorted lists.
+
+    Returns:
+    - generator: The rows of the evaluated results, without the scores, see get_scores.
+    """
+    benchmark_name = config_name.split('_')[0]
+    benchmark_mode = config_name.split('_')[1]
+    benchmark_version = config_name.split('_')[2]
+    data_type = config_name.split('_')[3]
+    list_length = int(config_name.split('_')[4].split('.')[0])
+
+    score_cache = cache_utils.get_score_cache()
+    score_versions = [PARSER_VERSION, SCORE_VERSION, token_utils.get_thinking_token_counter().name]
+    # the unordered pairs and neighbors of the unsorted lists are shared by all models
+    unsorted_metrics = None
+    for cur_result in model_results:
+        # the results of models that are in the score cache are not evaluated again
+        if score_cache is not None:
+            score_key = cache_utils.get_score_cache_key(config_name, unsorted_lists, cur_result, score_versions)
+            rows = score_cache.get(score_key)
+            if rows is not None:
+                yield from rows
+                continue
+        if unsorted_metrics is None:
+            unsorted_pairs, unsorted_neighbors = metrics_utils.count_inversions_batch(list(unsorted_lists.values()))
+            unsorted_metrics = dict(zip(unsorted_lists, zip(unsorted_pairs, unsorted_neighbors)))
+        model = cur_result['model']
+        # the thinking lengths of all lists of the model are counted at once
+        thinking_lengths = iter(get_thinking_lengths(list(cur_result['sorted_lists'].values()),
+                                                     [cur_result.get('usage', {}).get(list_name) for list_name in cur_result['sorted_lists']]))
+        model_rows = []
+        parsed_list_names = []
+        parsed_lists = []
+        for list_name, sorted_list in cur_result['sorted_lists'].items():
+            unsorted_list = unsorted_lists[list_name]
+            expected_type = type(unsorted_list[0])
+            num_chars = len(sorted_list)
+            thinking_length = next(thinking_lengths)
+            sorted_list, error_type, is_list, has_ellipsis, required_type_parsing = parse_response(sorted_list, expected_type, config_name=config_name, model_name=model, list_name=list_name)
+            if sorted_list is None:
+                out_list_len = None
+                is_parsed = False
+            else:
+                parsed_list_names.append(list_name)
+                parsed_lists.append(sorted_list)
+                out_list_len = len(sorted_list)
+                is_parsed = True
+
+            result_dict = {
+                'Benchmark': benchmark_name,
+                'Mode': benchmark_mode,
+                'Version': benchmark_version,
+                'Model': model,
+                'Type': data_type,
+                'Size': list_length,
+                'List Name': list_name,
+                **dict.fromkeys(_LIST_METRICS),
+                'Output List Length': out_list_len,
+                'Output Length': num_chars,
+                'Thinking Length': thinking_length,
+                'Parsed': is_parsed,
+                'HasError': error_type is not None,
+                'ErrorType': error_type,
+                'IsList': is_list,
+                'HasEllipsis': has_ellipsis,
+                'RequiredTypeParsing': required_type_parsing
+            }
+            model_rows.append(result_dict)
+
+        # the metrics of all parsed lists of the model are computed at once
+        batch_metrics = metrics_utils.compute_batch_metrics([unsorted_lists[list_name] for list_name in parsed_list_names], parsed_lists,
+                                                            [unsorted_metrics[list_name][0] for list_name in parsed_list_names],
+                                                            [unsorted_metrics[list_name][1] for list_name in parsed_list_names])
+        list_metrics = dict(zip(parsed_list_names, batch_metrics))
+        for result_dict in model_rows:
+            result_dict.update(list_metrics.get(result_dict['List Name'], {}))
+        if score_cache is not None:
+            score_cache.put(score_key, model_rows)
+        # the cached entries of the model are written before its rows are passed on
+        _flush_caches()
+        yield from model_rows
+
+def get_scores(rows):
+    """
+    Compute the scores of evaluated results. The scores of each row only depend on the row itself, such that the
+    rows can be scored in chunks, and the columns have the same types in all chunks.
+
+    Parameters:
+    - rows (list): The rows of the evaluated results, see iter_evaluated_rows.
+
+    Returns:
+    - df_results (pd.DataFrame): A DataFrame with the evaluated results and their scores.
+    """
+    df_results = pd.DataFrame(rows)
+    df_results = df_results.astype({column: 'float64' for column in _NULLABLE_COLUMNS})
+    df_results = normalize_metrics(df_results)
+    df_results = compute_total_score(df_results)
+    return df_results
+
 def evaluate_results(results):
     """
-    Evaluate the results of the sorting benchmarks.
+    Evaluate the results of the sorting benchmarks, see iter_evaluated_rows.
 
     Parameters:
     - results (dict): The results of the sorting benchmarks.
@@ -622,100 +886,20 @@ def evaluate_results(results):
     """
     results_with_eval = []
     for config_name, config_data in results.items():
-        benchmark_name = config_name.split('_')[0]
-        benchmark_mode = config_name.split('_')[1]
-        benchmark_version = config_name.split('_')[2]
-        data_type = config_name.split('_')[3]
-        list_length = int(config_name.split('_')[4].split('.')[0])
-        
-        unsorted_lists = config_data['unsorted_lists']
-        
-        for cur_result in config_data['results']:
-            model = cur_result['model']
-            for list_name, sorted_list in cur_result['sorted_lists'].items():
-                unsorted_list = unsorted_lists[list_name]
-                expected_type = type(unsorted_list[0])
-                num_chars = len(sorted_list)
-                thinking_length = 0
-                thinking_pos = sorted_list.rfind('</think>')
-                if thinking_pos!=-1:
-                    thinking_length = deepseek_numtokens(sorted_list[:thinking_pos+8])
-                sorted_list, error_type, is_list, has_ellipsis, required_type_parsing = eval_str_list(sorted_list, expected_type, debug=True, config_name=config_name, model_name=model, list_name=list_name)
-                if sorted_list is None:
-                    unordered_pairs_before = None
-                    unordered_pairs_after = None
-                    unordered_neighbors_before = None
-                    unordered_neighbors_after = None
-                    count_missing = None
-                    count_additional = None
-                    out_list_len = None
-                    is_parsed = False
-                else:
-                    unordered_pairs_before = count_unordered_pairs(unsorted_list)
-                    unordered_pairs_after = count_unordered_pairs(sorted_list)
-                    unordered_neighbors_before = count_unordered_neighbors(unsorted_list)
-                    unordered_neighbors_after = count_unordered_neighbors(sorted_list)
-                    count_missing = count_missing_items(unsorted_list, sorted_list)
-                    count_additional = count_additional_items(unsorted_list, sorted_list)
-                    out_list_len = len(sorted_list)
-                    is_parsed = True
-
-                result_dict = {
-                    'Benchmark': benchmark_name,
-                    'Mode': benchmark_mode,
-                    'Version': benchmark_version,
-                    'Model': model,
-                    'Type': data_type,
-                    'Size': list_length,
-                    'List Name': list_name,
-                    'Unordered Pairs Before': unordered_pairs_before,
-                    'Unordered Pairs After': unordered_pairs_after,
-                    'Unordered Neighbors Before': unordered_neighbors_before,
-                    'Unordered Neighbors After': unordered_neighbors_after,
-                    'Missing Items': count_missing,
-                    'Additional Items': count_additional,
-                    'Output List Length': out_list_len,
-                    'Output Length': num_chars,
-                    'Thinking Length': thinking_length,
-                    'Parsed': is_parsed,
-                    'HasError': error_type is not None,
-                    'ErrorType': error_type,
-                    'IsList': is_list,
-                    'HasEllipsis': has_ellipsis,
-                    'RequiredTypeParsing': required_type_parsing
-                }
-
-                results_with_eval.append(result_dict)
-    
-    df_results = pd.DataFrame(results_with_eval)
-    df_results = normalize_metrics(df_results)
-    df_results = compute_total_score(df_results)
-    return df_results
+        results_with_eval.extend(iter_evaluated_rows(config_name, config_data['unsorted_lists'], config_data['results']))
+    return get_scores(results_with_eval)
 
-def score_single_results(sorted_list, unsorted_list, benchmark_name, benchmark_mode, benchmark_version, config_name, model, data_type, list_length, list_name):
+def score_single_results(sorted_list, unsorted_list, benchmark_name, benchmark_mode, benchmark_version, config_name, model, data_type, list_length, list_name, usage=None):
     expected_type = type(unsorted_list[0])
     num_chars = len(sorted_list)
-    thinking_length = 0
-    thinking_pos = sorted_list.rfind('</think>')
-    if thinking_pos!=-1:
-        thinking_length = deepseek_numtokens(sorted_list[:thinking_pos+8])
-    sorted_list, error_type, is_list, has_ellipsis, required_type_parsing = eval_str_list(sorted_list, expected_type, debug=True, config_name=config_name, model_name=model, list_name=list_name)
+    thinking_length = get_thinking_length(sorted_list, usage)
+    sorted_list, error_type, is_list, has_ellipsis, required_type_parsing = parse_response(sorted_list, expected_type, config_name=config_name, model_name=model, list_name=list_name)
     if sorted_list is None:
-        unordered_pairs_before = None
-        unordered_pairs_after = None
-        unordered_neighbors_before = None
-        unordered_neighbors_after = None
-        count_missing = None
-        count_additional = None
+        list_metrics = dict.fromkeys(_LIST_METRICS)
         len_diff = None
         is_parsed = False
     else:
-        unordered_pairs_before = count_unordered_pairs(unsorted_list)
-        unordered_pairs_after = count_unordered_pairs(sorted_list)
-        unordered_neighbors_before = count_unordered_neighbors(unsorted_list)
-        unordered_neighbors_after = count_unordered_neighbors(sorted_list)
-        count_missing = count_missing_items(unsorted_list, sorted_list)
-        count_additional = count_additional_items(unsorted_list, sorted_list)
+        list_metrics = metrics_utils.compute_list_metrics(unsorted_list, sorted_list)
         len_diff = len(unsorted_list)-len(sorted_list)
         is_parsed = True
 
@@ -727,12 +911,7 @@ def score_single_results(sorted_list, unsorted_list, benchmark_name, benchmark_m
         'Type': data_type,
         'Size': list_length,
         'List Name': list_name,
-        'Unordered Pairs Before': unordered_pairs_before,
-        'Unordered Pairs After': unordered_pairs_after,
-        'Unordered Neighbors Before': unordered_neighbors_before,
-        'Unordered Neighbors After': unordered_neighbors_after,
-        'Missing Items': count_missing,
-        'Additional Items': count_additional,
+        **list_metrics,
         'Length Difference': len_diff,
         'Output Length': num_chars,
         'Thinking Length': thinking_length,
@@ -785,13 +964,3 @@ def compute_total_score(df_results):
     df_results.loc[df_results['Validity Score']>0, 'SortBench Score'] = df_results['Validity Score']*(df_results['Sorting Score'] + df_results['Faithfulness Score'])/2
     df_results.loc[df_results['Validity Score']==0, 'SortBench Score'] = 0
     return df_results
-
-from transformers import AutoTokenizer
-import os
-
-# get token from env
-hf_access_token = os.getenv("HF_ACCESS_TOKEN")
-deepseekr_tokenizer = AutoTokenizer.from_pretrained("deepseek-ai/DeepSeek-R1-Distill-Llama-70B", token=hf_access_token)
-
-def deepseek_numtokens(input):
-    return deepseekr_tokenizer(input, return_tensors="pt").input_ids.shape[1]
\ No newline at end of file
@@ -1,16 +1,32 @@
+import asyncio
 import os
 import time
 import traceback
 
 from util.result_utils import check_if_result_available
-
-from openai import OpenAI, InternalServerError
-import anthropic
+import util.client_utils as client_utils
+import util.rate_limit_utils as rate_limit_utils
+import util.journal_utils as journal_utils
+import util.cache_utils as cache_utils
+import util.timing_utils as timing_utils
 
 _OPENAI_MODELS = ["gpt-4o-mini", "gpt-4o", "gpt-3.5-turbo", "o3-mini"]
 _INNCUBE_MODELS = ["llama3.1", "gemma2", "qwen2.5", "deepseekr1"]
 _ANTROPIC_MODELS = ["claude-3-5-haiku-20241022", "claude-3-5-sonnet-20241022"]
 
+_INNCUBE_URL = "https://llms-inference.innkube.fim.uni-passau.de"
+
+# maximum number of attempts per list, retries are paced by the rate limiter of the provider
+_MAX_ATTEMPTS = {'openai': 3, 'inncube': 3, 'antropic': 3}
+
+_DEFAULT_SYSTEM_PROMPT = "Your task is to sort a list according to the common sorting of the used data type in Python. The output must only contain the sorted list and nothing else. The format of the list must stay the same."
+
+# maximum number of concurrent requests per provider for the asyncio execution mode
+_MAX_CONCURRENCY = {'openai': 8, 'inncube': 4, 'antropic': 4}
+
+# URLs of the API endpoints per provider, None uses the default URL of the SDK
+_BASE_URLS = {'openai': None, 'inncube': _INNCUBE_URL, 'antropic': None}
+
 def is_model_supported(model):
     """
     Check if a model is supported by sortbench.
@@ -20,7 +36,205 @@ def is_model_supported(model):
     """
     return model in _OPENAI_MODELS+_INNCUBE_MODELS+_ANTROPIC_MODELS
 
-def sort_list_with_antropic_api(unsorted_list, api_key, model, system_prompt=None, prompt=None):
+def get_provider(model):
+    """
+    Get the name of the provider that serves a model.
+
+    Parameters:
+    - model (str): the model name
+
+    Returns:
+    - str: 'openai', 'inncube', or 'antropic'
+    """
+    if model in _OPENAI_MODELS:
+        return 'openai'
+    elif model in _INNCUBE_MODELS:
+        return 'inncube'
+    elif model in _ANTROPIC_MODELS:
+        return 'antropic'
+    raise ValueError(f"Model {model} not supported")
+
+def set_max_concurrency(provider, max_concurrency):
+    """
+    Set the maximum number of concurrent requests for a provider in the asyncio execution mode.
+
+    Parameters:
+    - provider (str): the provider name, i.e., 'openai', 'inncube', or 'antropic'
+    - max_concurrency (int): the maximum number of requests that are in flight at the same time
+    """
+    if provider not in _MAX_CONCURRENCY:
+        raise ValueError(f"Provider {provider} not supported")
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be a positive integer")
+    _MAX_CONCURRENCY[provider] = max_concurrency
+
+def get_max_concurrency(provider):
+    """
+    Get the maximum number of concurrent requests for a provider in the asyncio execution mode.
+
+    Parameters:
+    - provider (str): the provider name, i.e., 'openai', 'inncube', or 'antropic'
+    """
+    return _MAX_CONCURRENCY[provider]
+
+def set_base_url(provider, base_url):
+    """
+    Set the URL of the API endpoint of a provider, e.g., to send all requests to a local mock server.
+
+    Parameters:
+    - provider (str): the provider name, i.e., 'openai', 'inncube', or 'antropic'
+    - base_url (str): the URL of the endpoint, None for the default URL of the provider
+    """
+    if provider not in _BASE_URLS:
+        raise ValueError(f"Provider {provider} not supported")
+    if base_url is None and provider == 'inncube':
+        base_url = _INNCUBE_URL
+    _BASE_URLS[provider] = base_url
+
+def get_base_url(provider):
+    """
+    Get the URL of the API endpoint of a provider, None if the default URL of the SDK is used.
+
+    Parameters:
+    - provider (str): the provider name, i.e., 'openai', 'inncube', or 'antropic'
+    """
+    return _BASE_URLS[provider]
+
+def _build_openai_messages(model, system_prompt, prompt):
+    """
+    Build the chat messages for the OpenAI API.
+    """
+    if model=='o1-mini':
+        # the reasoning models from OpenAI do not have a system prompt
+        return [{"role": "user", "content": f"{system_prompt}\n{prompt}"}]
+    return [{"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}]
+
+def _build_antropic_messages(prompt):
+    """
+    Build the messages for the Antropic API.
+    """
+    return [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": prompt
+                }
+            ]
+        }
+    ]
+
+def build_request_params(unsorted_list, model, system_prompt=None):
+    """
+    Build the parameters of the API request that sorts a list with a model. These are the same parameters
+    that sort_list_with_model sends, e.g., for creating batch requests.
+
+    Parameters:
+    - unsorted_list (list): the list to be sorted
+    - model (str): the model to use for inference
+    - system_prompt (str): the system prompt to use (optional)
+
+    Returns:
+    - dict: the parameters of the chat completions request (OpenAI, Inncube) or messages request (Antropic)
+    """
+    if system_prompt is None:
+        system_prompt = _DEFAULT_SYSTEM_PROMPT
+    prompt = f"Sort the following list: {unsorted_list}"
+    if get_provider(model) == 'antropic':
+        return {'model': model,
+                'max_tokens': 1000,
+                'temperature': 1,
+                'system': system_prompt,
+                'messages': _build_antropic_messages(prompt)}
+    return {'model': model,
+            'messages': _build_openai_messages(model, system_prompt, prompt)}
+
+def _get_cached_response(model, system_prompt, prompt, params, url):
+    """
+    Look up a request to an endpoint in the response cache. Returns the cache key and the cache entry with the
+    response and its usage, which is None if the response is not cached. The cache key is None if caching is disabled.
+    """
+    cache = cache_utils.get_response_cache()
+    if cache is None:
+        return None, None
+    if url == _INNCUBE_URL:
+        # the default endpoints are not part of the key, such that the responses cached before are still found
+        url = None
+    cache_key = cache_utils.get_cache_key(model, system_prompt, prompt, params, url=url)
+    return cache_key, cache.get_entry(cache_key)
+
+def _cache_response(cache_key, response, usage=None):
+    """
+    Store a response in the response cache, if caching is enabled.
+    """
+    cache = cache_utils.get_response_cache()
+    if cache is not None and cache_key is not None:
+        cache.put(cache_key, response, usage=usage)
+
+def get_usage(usage):
+    """
+    Convert the token usage reported by the OpenAI or Antropic API to the format stored in the results.
+
+    Parameters:
+    - usage: the usage of the response as object of the SDKs or as dict, None if the API did not report it
+
+    Returns:
+    - dict: the 'prompt_tokens', 'completion_tokens', and 'reasoning_tokens', None if usage is None.
+      The reasoning tokens are None if the API does not report them separately.
+    """
+    if usage is None:
+        return None
+    if not isinstance(usage, dict):
+        # the SDKs return pydantic models, batch outputs are plain JSON
+        usage = usage.model_dump()
+    if 'prompt_tokens' in usage:
+        details = usage.get('completion_tokens_details') or {}
+        return {'prompt_tokens': usage['prompt_tokens'],
+                'completion_tokens': usage['completion_tokens'],
+                'reasoning_tokens': details.get('reasoning_tokens')}
+    return {'prompt_tokens': usage['input_tokens'],
+            'completion_tokens': usage['output_tokens'],
+            'reasoning_tokens': None}
+
+def _usage_tokens(usage):
+    """
+    Get the number of completion tokens from a usage dict, None if the usage is unknown.
+    """
+    if usage is None:
+        return None
+    return usage['completion_tokens']
+
+def _stream_options(use_streaming):
+    """
+    Request the token usage for streaming responses, which is sent with an additional last chunk.
+    """
+    if use_streaming:
+        return {'stream_options': {'include_usage': True}}
+    return {}
+
+def _retry_delay_after_error(error, attempts, max_attempts, limiter, unsorted_list):
+    """
+    Handle an error raised while calling an API. Retryable errors block the rate limiter of the provider for a
+    jittered backoff delay (or the delay the API asked for) and the request is tried again. Fatal errors and
+    errors in the last attempt raise a RuntimeError. They do not block the limiter, as nothing is retried, but
+    rate limit errors still decrease its rate.
+    """
+    print(f"Exception running inference: {error}")
+    print()
+    print(unsorted_list)
+    if not rate_limit_utils.is_retryable_error(error):
+        limiter.on_error(error)
+        raise RuntimeError(f"Non-retryable error while running inference: {error}") from error
+    if attempts == max_attempts:
+        limiter.on_error(error)
+        raise RuntimeError(f"Inference failed after {attempts} attempts: {error}") from error
+    delay = rate_limit_utils.backoff_delay(attempts, retry_after=rate_limit_utils.get_retry_after(error))
+    limiter.on_error(error, delay)
+    print(f"Waiting {delay:.1f} seconds before next attempt...")
+
+def sort_list_with_antropic_api(unsorted_list, api_key, model, system_prompt=None, prompt=None, url=None, max_attempts=1, return_metrics=False):
     """
     Calls the Antropic API to sort a list.
 
@@ -30,40 +244,66 @@ def sort_list_with_antropic_api(unsorted_list, api_key, model, system_prompt=Non
     - model (str): the model to use for inference
     - system_prompt (str): the system prompt to use
     - prompt (str): the prompt to use
+    - url (str): the URL of the Antropic API endpoint, uses the default URL if None
+    - max_attempts (int): the maximum number of attempts to make
+    - return_metrics (bool): whether to also return the timing metrics and token usage of the request (default: False)
+
+    Returns:
+    - str: the raw response of the model
+    - dict: the timing metrics of the request, see timing_utils.RequestTimer, with the token usage reported by the API
+      under 'usage', see get_usage. Only if return_metrics is set.
     """
     
     if system_prompt is None:
-        system_prompt = "Your task is to sort a list according to the common sorting of the used data type in Python. The output must only contain the sorted list and nothing else. The format of the list must stay the same."
+        system_prompt = _DEFAULT_SYSTEM_PROMPT
     if prompt is None:
         prompt = f"Sort the following list: {unsorted_list}"
     else:
         print('not yet implemented')
         return None
     
-    client = anthropic.Anthropic(api_key=api_key)
-
-    message = client.messages.create(
-        model=model,
-        max_tokens=1000,
-        temperature=1,
-        system=system_prompt,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": prompt
-                    }
-                ]
-            }
-        ]
-    )
-    sorted_list = message.content[0].text
+    lookup_start = time.perf_counter()
+    cache_key, cached_entry = _get_cached_response(model, system_prompt, prompt, {'max_tokens': 1000, 'temperature': 1}, url)
+    if cached_entry is not None:
+        if return_metrics:
+            metrics = timing_utils.cached_request_metrics(time.perf_counter()-lookup_start)
+            metrics['usage'] = cached_entry['usage']
+            return cached_entry['response'], metrics
+        return cached_entry['response']
+
+    limiter = rate_limit_utils.get_rate_limiter('antropic')
+    attempts = 0
+    while attempts < max_attempts:
+        attempts += 1
+        limiter.acquire()
+        timer = timing_utils.RequestTimer()
+        client = client_utils.get_client('antropic', api_key, base_url=url)
+        try:
+            raw_response = client.messages.with_raw_response.create(
+                model=model,
+                max_tokens=1000,
+                temperature=1,
+                system=system_prompt,
+                messages=_build_antropic_messages(prompt)
+            )
+            message = raw_response.parse()
+            limiter.on_success(raw_response.headers)
+            sorted_list = message.content[0].text
+            usage = get_usage(message.usage)
+            metrics = timer.finish(output_tokens=_usage_tokens(usage), attempts=attempts)
+            break
+        except Exception as e:
+            _retry_delay_after_error(e, attempts, max_attempts, limiter, unsorted_list)
+        finally:
+            client_utils.release_client(client)
+    _cache_response(cache_key, sorted_list, usage=usage)
+    if return_metrics:
+        metrics['usage'] = usage
+        return sorted_list, metrics
     return sorted_list
 
 
-def sort_list_with_openai_api(unsorted_list, api_key, model, url=None, use_streaming=False, system_prompt=None, prompt=None, max_attempts=1):
+def sort_list_with_openai_api(unsorted_list, api_key, model, url=None, use_streaming=False, system_prompt=None, prompt=None, max_attempts=1, provider=None, return_metrics=False):
     """
     Calls the OpenAI API to sort a list.
 
@@ -72,119 +312,462 @@ def sort_list_with_openai_api(unsorted_list, api_key, model, url=None, use_strea
     - api_key (str): the OpenAI API key
     - model (str): the model to use for inference
     - url (str): the URL of the OpenAI API endpoint
+    - use_streaming (bool): whether to stream the response
     - system_prompt (str): the system prompt to use
     - prompt (str): the prompt to use
     - max_attempts (int): the maximum number of attempts to make
+    - provider (str): the provider whose rate limiter and clients are used. Uses 'openai' if url is None and 'inncube' otherwise. (optional)
+    - return_metrics (bool): whether to also return the timing metrics and token usage of the request (default: False)
+
+    Returns:
+    - str: the raw response of the model
+    - dict: the timing metrics of the request, see timing_utils.RequestTimer, with the token usage reported by the API
+      under 'usage', see get_usage. Only if return_metrics is set.
     """
 
     # setup system prompt and prompt
     if system_prompt is None:
-        system_prompt = "Your task is to sort a list according to the common sorting of the used data type in Python. The output must only contain the sorted list and nothing else. The format of the list must stay the same."
+        system_prompt = _DEFAULT_SYSTEM_PROMPT
     if prompt is None:
         prompt = f"Sort the following list: {unsorted_list}"
     else:
         print('not yet implemented')
         return None
     
+    lookup_start = time.perf_counter()
+    cache_key, cached_entry = _get_cached_response(model, system_prompt, prompt, {}, url)
+    if cached_entry is not None:
+        if return_metrics:
+            metrics = timing_utils.cached_request_metrics(time.perf_counter()-lookup_start)
+            metrics['usage'] = cached_entry['usage']
+            return cached_entry['response'], metrics
+        return cached_entry['response']
+
+    if provider is None:
+        provider = 'openai' if url is None else 'inncube'
+    limiter = rate_limit_utils.get_rate_limiter(provider)
     attempts = 0
     while attempts < max_attempts:
         attempts += 1
-        if url is None:
-            client = OpenAI(api_key=api_key)
-        else:
-            client = OpenAI(api_key=api_key, base_url=url)
+        limiter.acquire()
+        timer = timing_utils.RequestTimer()
+        client = client_utils.get_client(provider, api_key, base_url=url)
         try:
-            if model=='o1-mini':
-                # the reasoning models from OpenAI do not have a system prompt
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "user", "content": f"{system_prompt}\n{prompt}"}
-                    ],
-                    stream=use_streaming
-                )
-            else:
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": prompt}
-                    ],
-                    stream=use_streaming
-                )
+            raw_response = client.chat.completions.with_raw_response.create(
+                model=model,
+                messages=_build_openai_messages(model, system_prompt, prompt),
+                stream=use_streaming,
+                **_stream_options(use_streaming)
+            )
+            response = raw_response.parse()
             if use_streaming:
                 # uncomment collected chunks for debugging
                 # collected_chunks = []
                 collected_messages = []
+                usage = None
                 for chunk in response:
                     # collected_chunks.append(chunk)
+                    if chunk.usage is not None:
+                        usage = get_usage(chunk.usage)
+                    if len(chunk.choices) == 0:
+                        # the last chunk only contains the usage
+                        continue
                     chunk_message = chunk.choices[0].delta.content
+                    timer.on_chunk(chunk_message)
                     collected_messages.append(chunk_message)
                 #finish_reason = response.choices[0].finish_reason
                 #if finish_reason != 'stop':
                 #    raise RuntimeError(f"Stream did not finish properly: {finish_reason}")
                 sorted_list = ''.join([m for m in collected_messages if m is not None])
+                metrics = timer.finish(output_tokens=_usage_tokens(usage), streaming=True, attempts=attempts)
             else:
                 sorted_list = response.choices[0].message.content.strip()
+                usage = get_usage(response.usage)
+                metrics = timer.finish(output_tokens=_usage_tokens(usage), attempts=attempts)
+            limiter.on_success(raw_response.headers)
+            break
         except Exception as e:
-            print(f"Exception running inference: {e}")
-            print()
-            print(unsorted_list)
-            if attempts == max_attempts:
-                print("Waiting 60 seconds before next sequence...")
-                time.sleep(60)
-                raise RuntimeError()
-            else:
-                print("Waiting 60 seconds before next attempt...")
-                time.sleep(60)
+            _retry_delay_after_error(e, attempts, max_attempts, limiter, unsorted_list)
         finally:
-            client.close()
+            client_utils.release_client(client)
     
+    _cache_response(cache_key, sorted_list, usage=usage)
+    if return_metrics:
+        metrics['usage'] = usage
+        return sorted_list, metrics
     return sorted_list
 
-def run_single_config_for_model(config_name, lists, model="gpt-4o-mini", verbose=True, results=None):
+async def async_sort_list_with_antropic_api(unsorted_list, api_key, model, system_prompt=None, prompt=None, url=None, max_attempts=1, return_metrics=False):
     """
-    Run inference on all configs for a single model.
+    Calls the Antropic API asynchronously to sort a list. Same behavior as sort_list_with_antropic_api.
 
     Parameters:
-    - configs (dict): the dictionary of configs
+    - unsorted_list (list): the list to be sorted
+    - api_key (str): the Antropic API key
+    - model (str): the model to use for inference
+    - system_prompt (str): the system prompt to use
+    - prompt (str): the prompt to use
+    - url (str): the URL of the Antropic API endpoint, uses the default URL if None
+    - max_attempts (int): the maximum number of attempts to make
+    - return_metrics (bool): whether to also return the timing metrics and token usage of the request (default: False)
+
+    Returns:
+    - str: the raw response of the model
+    - dict: the timing metrics of the request, see timing_utils.RequestTimer, with the token usage reported by the API
+      under 'usage', see get_usage. Only if return_metrics is set.
+    """
+    if system_prompt is None:
+        system_prompt = _DEFAULT_SYSTEM_PROMPT
+    if prompt is None:
+        prompt = f"Sort the following list: {unsorted_list}"
+    else:
+        print('not yet implemented')
+        return None
+
+    lookup_start = time.perf_counter()
+    cache_key, cached_entry = _get_cached_response(model, system_prompt, prompt, {'max_tokens': 1000, 'temperature': 1}, url)
+    if cached_entry is not None:
+        if return_metrics:
+            metrics = timing_utils.cached_request_metrics(time.perf_counter()-lookup_start)
+            metrics['usage'] = cached_entry['usage']
+            return cached_entry['response'], metrics
+        return cached_entry['response']
+
+    limiter = rate_limit_utils.get_rate_limiter('antropic')
+    attempts = 0
+    while attempts < max_attempts:
+        attempts += 1
+        await limiter.async_acquire()
+        timer = timing_utils.RequestTimer()
+        client = client_utils.get_client('antropic', api_key, base_url=url, use_async=True)
+        try:
+            raw_response = await client.messages.with_raw_response.create(
+                model=model,
+                max_tokens=1000,
+                temperature=1,
+                system=system_prompt,
+                messages=_build_antropic_messages(prompt)
+            )
+            message = raw_response.parse()
+            limiter.on_success(raw_response.headers)
+            sorted_list = message.content[0].text
+            usage = get_usage(message.usage)
+            metrics = timer.finish(output_tokens=_usage_tokens(usage), attempts=attempts)
+            break
+        except Exception as e:
+            _retry_delay_after_error(e, attempts, max_attempts, limiter, unsorted_list)
+        finally:
+            await client_utils.async_release_client(client)
+    _cache_response(cache_key, sorted_list, usage=usage)
+    if return_metrics:
+        metrics['usage'] = usage
+        return sorted_list, metrics
+    return sorted_list
+
+
+async def async_sort_list_with_openai_api(unsorted_list, api_key, model, url=None, use_streaming=False, system_prompt=None, prompt=None, max_attempts=1, provider=None, return_metrics=False):
+    """
+    Calls the OpenAI API asynchronously to sort a list. Same behavior as sort_list_with_openai_api.
+
+    Parameters:
+    - unsorted_list (list): the list to be sorted
     - api_key (str): the OpenAI API key
     - model (str): the model to use for inference
+    - url (str): the URL of the OpenAI API endpoint
+    - use_streaming (bool): whether to stream the response
+    - system_prompt (str): the system prompt to use
+    - prompt (str): the prompt to use
+    - max_attempts (int): the maximum number of attempts to make
+    - provider (str): the provider whose rate limiter and clients are used. Uses 'openai' if url is None and 'inncube' otherwise. (optional)
+    - return_metrics (bool): whether to also return the timing metrics and token usage of the request (default: False)
+
+    Returns:
+    - str: the raw response of the model
+    - dict: the timing metrics of the request, see timing_utils.RequestTimer, with the token usage reported by the API
+      under 'usage', see get_usage. Only if return_metrics is set.
+    """
+    if system_prompt is None:
+        system_prompt = _DEFAULT_SYSTEM_PROMPT
+    if prompt is None:
+        prompt = f"Sort the following list: {unsorted_list}"
+    else:
+        print('not yet implemented')
+        return None
+
+    lookup_start = time.perf_counter()
+    cache_key, cached_entry = _get_cached_response(model, system_prompt, prompt, {}, url)
+    if cached_entry is not None:
+        if return_metrics:
+            metrics = timing_utils.cached_request_metrics(time.perf_counter()-lookup_start)
+            metrics['usage'] = cached_entry['usage']
+            return cached_entry['response'], metrics
+        return cached_entry['response']
+
+    if provider is None:
+        provider = 'openai' if url is None else 'inncube'
+    limiter = rate_limit_utils.get_rate_limiter(provider)
+    attempts = 0
+    while attempts < max_attempts:
+        attempts += 1
+        await limiter.async_acquire()
+        timer = timing_utils.RequestTimer()
+        client = client_utils.get_client(provider, api_key, base_url=url, use_async=True)
+        try:
+            raw_response = await client.chat.completions.with_raw_response.create(
+                model=model,
+                messages=_build_openai_messages(model, system_prompt, prompt),
+                stream=use_streaming,
+                **_stream_options(use_streaming)
+            )
+            response = raw_response.parse()
+            if use_streaming:
+                collected_messages = []
+                usage = None
+                async for chunk in response:
+                    if chunk.usage is not None:
+                        usage = get_usage(chunk.usage)
+                    if len(chunk.choices) == 0:
+                        # the last chunk only contains the usage
+                        continue
+                    chunk_message = chunk.choices[0].delta.content
+                    timer.on_chunk(chunk_message)
+                    collected_messages.append(chunk_message)
+                sorted_list = ''.join([m for m in collected_messages if m is not None])
+                metrics = timer.finish(output_tokens=_usage_tokens(usage), streaming=True, attempts=attempts)
+            else:
+                sorted_list = response.choices[0].message.content.strip()
+                usage = get_usage(response.usage)
+                metrics = timer.finish(output_tokens=_usage_tokens(usage), attempts=attempts)
+            limiter.on_success(raw_response.headers)
+            break
+        except Exception as e:
+            _retry_delay_after_error(e, attempts, max_attempts, limiter, unsorted_list)
+        finally:
+            await client_utils.async_release_client(client)
+
+    _cache_response(cache_key, sorted_list, usage=usage)
+    if return_metrics:
+        metrics['usage'] = usage
+        return sorted_list, metrics
+    return sorted_list
+
+def sort_list_with_model(unsorted_list, model, return_metrics=False):
+    """
+    Sort a list with a model, using the API of the provider that serves the model.
+
+    Parameters:
+    - unsorted_list (list): the list to be sorted
+    - model (str): the model to use for inference
+    - return_metrics (bool): whether to also return the timing metrics and token usage of the request (default: False)
+
+    Returns:
+    - str: the raw response of the model
+    - dict: the timing metrics of the request with the token usage under 'usage', only if return_metrics is set
+    """
+    provider = get_provider(model)
+    if provider == 'openai':
+        api_key = os.getenv("OPENAI_API_KEY")
+        return sort_list_with_openai_api(unsorted_list, api_key, model=model, url=_BASE_URLS['openai'], provider='openai', max_attempts=_MAX_ATTEMPTS['openai'], return_metrics=return_metrics)
+    elif provider == 'inncube':
+        api_key = os.getenv("INNCUBE_API_KEY")
+        return sort_list_with_openai_api(unsorted_list, api_key, model=model, url=_BASE_URLS['inncube'], use_streaming=True, provider='inncube', max_attempts=_MAX_ATTEMPTS['inncube'], return_metrics=return_metrics)
+    else:
+        api_key = os.getenv("ANTROPIC_API_KEY")
+        return sort_list_with_antropic_api(unsorted_list, api_key, model=model, url=_BASE_URLS['antropic'], max_attempts=_MAX_ATTEMPTS['antropic'], return_metrics=return_metrics)
+
+async def async_sort_list_with_model(unsorted_list, model, return_metrics=False):
+    """
+    Sort a list with a model asynchronously, using the API of the provider that serves the model.
+
+    Parameters:
+    - unsorted_list (list): the list to be sorted
+    - model (str): the model to use for inference
+    - return_metrics (bool): whether to also return the timing metrics and token usage of the request (default: False)
+
+    Returns:
+    - str: the raw response of the model
+    - dict: the timing metrics of the request with the token usage under 'usage', only if return_metrics is set
+    """
+    provider = get_provider(model)
+    if provider == 'openai':
+        api_key = os.getenv("OPENAI_API_KEY")
+        return await async_sort_list_with_openai_api(unsorted_list, api_key, model=model, url=_BASE_URLS['openai'], provider='openai', max_attempts=_MAX_ATTEMPTS['openai'], return_metrics=return_metrics)
+    elif provider == 'inncube':
+        api_key = os.getenv("INNCUBE_API_KEY")
+        return await async_sort_list_with_openai_api(unsorted_list, api_key, model=model, url=_BASE_URLS['inncube'], use_streaming=True, provider='inncube', max_attempts=_MAX_ATTEMPTS['inncube'], return_metrics=return_metrics)
+    else:
+        api_key = os.getenv("ANTROPIC_API_KEY")
+        return await async_sort_list_with_antropic_api(unsorted_list, api_key, model=model, url=_BASE_URLS['antropic'], max_attempts=_MAX_ATTEMPTS['antropic'], return_metrics=return_metrics)
+
+def run_single_config_for_model(config_name, lists, model="gpt-4o-mini", verbose=True, results=None, use_async=False, max_concurrency=None, journal_path=None, record_metrics=False):
+    """
+    Run inference on all lists of a single config for a single model.
+
+    Parameters:
+    - config_name (str): the name of the config
+    - lists (dict): the unsorted lists of the config
+    - model (str): the model to use for inference
     - verbose (bool): whether to print verbose output
     - results (dict): the dictionary of results that already exist to avoid re-running inference
+    - use_async (bool): whether to send the requests concurrently using asyncio (default: False)
+    - max_concurrency (int): the maximum number of concurrent requests if use_async is set. Uses the limit of the provider if None. (default: None)
+    - journal_path (str): path to the folder with the journals. If set, each response is appended to the journal as soon as it arrives and lists that are already in the journal are not requested again. (default: None)
+    - record_metrics (bool): whether to store the timing metrics of each request under 'metrics' next to 'sorted_lists'. The token usage reported by the API is always stored under 'usage'. (default: False)
     """
+    if use_async:
+        return asyncio.run(_run_single_config_for_model_async_and_close(config_name, lists, model=model, verbose=verbose, results=results, max_concurrency=max_concurrency, journal_path=journal_path, record_metrics=record_metrics))
 
     if results is None:
         results = {}
         
+    cur_results = _new_results(model, record_metrics)
+    latencies = []
+    journaled_entries = _read_journaled_lists(journal_path, config_name, lists, model, verbose)
+    
+    try:
+        for unsorted_list_name, unsorted_list in lists.items():
+            if unsorted_list_name in journaled_entries:
+                entry = journaled_entries[unsorted_list_name]
+                _add_to_results(cur_results, unsorted_list_name, entry['response'], entry.get('metrics'), entry.get('usage'))
+                continue
+            if verbose:
+                print(f"Sorting list {unsorted_list_name} using model {model} for config {config_name}")
+            sorted_list, metrics = sort_list_with_model(unsorted_list, model, return_metrics=True)
+            latencies.append(metrics['latency'])
+            usage = metrics.pop('usage', None)
+            if not record_metrics:
+                metrics = None
+            if journal_path is not None:
+                journal_utils.append_to_journal(journal_path, config_name, model, unsorted_list_name, sorted_list, metrics=metrics, usage=usage)
+            _add_to_results(cur_results, unsorted_list_name, sorted_list, metrics, usage)
+
+        if verbose and len(latencies)>0:
+            print(f"Mean latency per request for model {model}: {sum(latencies)/len(latencies):.3f}s (max: {max(latencies):.3f}s)")
+        _finish_results(cur_results)
+        if config_name in results:
+            results[config_name]['results'].append(cur_results)
+        else:
+            results[config_name] = {'unsorted_lists': lists,
+                                    'results': [cur_results]}
+    except Exception as e:
+        print(f"Error while running inference for config {config_name} and model {model}: {e}")
+        print(traceback.format_exc())
+
+    return results
+
+def _new_results(model, record_metrics):
+    """
+    Create the result of a model for a config. The token usage is always stored, the timing metrics only if recorded.
+    """
     cur_results = {}
     cur_results['model'] = model
     cur_results['sorted_lists'] = {}
-    
+    cur_results['usage'] = {}
+    if record_metrics:
+        cur_results['metrics'] = {}
+    return cur_results
+
+def _add_to_results(cur_results, list_name, sorted_list, metrics, usage):
+    """
+    Add the response for a list to the result of a model, together with its usage and timing metrics if known.
+    """
+    cur_results['sorted_lists'][list_name] = sorted_list
+    if usage is not None:
+        cur_results['usage'][list_name] = usage
+    if metrics is not None and 'metrics' in cur_results:
+        cur_results['metrics'][list_name] = metrics
+
+def _finish_results(cur_results):
+    """
+    Drop the usage from the result of a model if the API did not report it for any list.
+    """
+    if len(cur_results['usage']) == 0:
+        del cur_results['usage']
+
+def _read_journaled_lists(journal_path, config_name, lists, model, verbose):
+    """
+    Read the entries that are already in the journal for a config and model.
+    """
+    if journal_path is None:
+        return {}
+    journaled_entries = journal_utils.read_journal_entries(journal_path, config_name, model)
+    journaled_entries = {list_name: entry for list_name, entry in journaled_entries.items() if list_name in lists}
+    if verbose and len(journaled_entries)>0:
+        print(f"Resuming from journal: {len(journaled_entries)} of {len(lists)} lists already sorted by model {model} for config {config_name}")
+    return journaled_entries
+
+async def _run_single_config_for_model_async_and_close(config_name, lists, **kwargs):
+    """
+    Run run_single_config_for_model_async and close the async clients of the event loop afterwards.
+    """
     try:
-        for unsorted_list_name, unsorted_list in lists.items():
+        return await run_single_config_for_model_async(config_name, lists, **kwargs)
+    finally:
+        await client_utils.async_close_clients()
+
+async def run_single_config_for_model_async(config_name, lists, model="gpt-4o-mini", verbose=True, results=None, max_concurrency=None, journal_path=None, record_metrics=False):
+    """
+    Run inference on all lists of a single config for a single model, sending the requests concurrently.
+    The results have exactly the same structure as the results of run_single_config_for_model.
+
+    Parameters:
+    - config_name (str): the name of the config
+    - lists (dict): the unsorted lists of the config
+    - model (str): the model to use for inference
+    - verbose (bool): whether to print verbose output
+    - results (dict): the dictionary of results that already exist to avoid re-running inference
+    - max_concurrency (int): the maximum number of concurrent requests. Uses the limit of the provider if None. (default: None)
+    - journal_path (str): path to the folder with the journals, see run_single_config_for_model (default: None)
+    - record_metrics (bool): whether to store the timing metrics of each request, see run_single_config_for_model (default: False)
+    """
+    if results is None:
+        results = {}
+    if max_concurrency is None:
+        max_concurrency = _MAX_CONCURRENCY[get_provider(model)]
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    latencies = []
+    journaled_entries = _read_journaled_lists(journal_path, config_name, lists, model, verbose)
+
+    async def sort_single_list(unsorted_list_name, unsorted_list):
+        if unsorted_list_name in journaled_entries:
+            entry = journaled_entries[unsorted_list_name]
+            return entry['response'], entry.get('metrics'), entry.get('usage')
+        async with semaphore:
             if verbose:
                 print(f"Sorting list {unsorted_list_name} using model {model} for config {config_name}")
-            if model in _OPENAI_MODELS:
-                api_key = os.getenv("OPENAI_API_KEY")
-                sorted_list = sort_list_with_openai_api(unsorted_list, api_key, model=model)
-            elif model in _INNCUBE_MODELS:
-                api_key = os.getenv("INNCUBE_API_KEY")
-                endpoint_url = "https://llms-inference.innkube.fim.uni-passau.de"
-                sorted_list = sort_list_with_openai_api(unsorted_list, api_key, model=model, url=endpoint_url, use_streaming=True, max_attempts=2)
-            elif model in _ANTROPIC_MODELS:
-                api_key = os.getenv("ANTROPIC_API_KEY")
-                sorted_list = sort_list_with_antropic_api(unsorted_list, api_key, model=model)
-            else:
-                raise ValueError(f"Model {model} not supported")
-            cur_results['sorted_lists'][unsorted_list_name] = sorted_list
+            sorted_list, metrics = await async_sort_list_with_model(unsorted_list, model, return_metrics=True)
+            latencies.append(metrics['latency'])
+        usage = metrics.pop('usage', None)
+        if not record_metrics:
+            metrics = None
+        if journal_path is not None:
+            # the entry is synced to disk in a thread, such that the other requests are not stalled
+            await asyncio.to_thread(journal_utils.append_to_journal, journal_path, config_name, model, unsorted_list_name, sorted_list, metrics=metrics, usage=usage)
+        return sorted_list, metrics, usage
+
+    cur_results = _new_results(model, record_metrics)
+
+    list_names = list(lists.keys())
+    tasks = [asyncio.create_task(sort_single_list(list_name, lists[list_name])) for list_name in list_names]
+    try:
+        sorted_lists = await asyncio.gather(*tasks)
+        # keep the order of the lists in the config
+        for unsorted_list_name, (sorted_list, metrics, usage) in zip(list_names, sorted_lists):
+            _add_to_results(cur_results, unsorted_list_name, sorted_list, metrics, usage)
 
+        if verbose and len(latencies)>0:
+            print(f"Mean latency per request for model {model}: {sum(latencies)/len(latencies):.3f}s (max: {max(latencies):.3f}s)")
+        _finish_results(cur_results)
         if config_name in results:
             results[config_name]['results'].append(cur_results)
         else:
             results[config_name] = {'unsorted_lists': lists,
                                     'results': [cur_results]}
     except Exception as e:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
         print(f"Error while running inference for config {config_name} and model {model}: {e}")
         print(traceback.format_exc())
 
@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+
+import util.result_db_utils as result_db_utils
+import util.result_utils as result_utils
+import util.shard_utils as shard_utils
+
+def get_journal_path(result_path):
+    """
+    Get the path of the folder with the journals for a results folder.
+
+    Parameters:
+    - result_path (str): path to the folder with the results or to a SQLite database
+    """
+    if result_db_utils.is_result_db(result_path):
+        # the journals of a database are stored next to it
+        return os.path.splitext(result_path)[0] + '_journal'
+    return os.path.join(result_path, 'journal')
+
+# serializes the appends of threads, e.g., of the asyncio execution modes, such that entries are not interleaved
+_APPEND_LOCK = threading.Lock()
+
+def _journal_file(journal_path, config_name, model):
+    return os.path.join(journal_path, f'{config_name}_{model}.jsonl')
+
+def append_to_journal(journal_path, config_name, model, list_name, response, metrics=None, usage=None):
+    """
+    Append the response for a list to the journal of a config and model. The entry is flushed to disk before
+    the function returns, such that the response survives a crash of the process. The asyncio execution modes
+    call this function in a thread, such that the event loop does not wait for the disk.
+
+    Parameters:
+    - journal_path (str): path to the folder with the journals
+    - config_name (str): name of the config
+    - model (str): name of the model
+    - list_name (str): name of the list
+    - response (str): the response of the model
+    - metrics (dict): the timing metrics of the request (optional)
+    - usage (dict): the token usage reported by the API (optional)
+    """
+    os.makedirs(journal_path, exist_ok=True)
+    entry = {'config_name': config_name, 'model': model, 'list_name': list_name, 'response': response}
+    if metrics is not None:
+        entry['metrics'] = metrics
+    if usage is not None:
+        entry['usage'] = usage
+    with open(_journal_file(journal_path, config_name, model), 'a', encoding="UTF-8") as f:
+        with _APPEND_LOCK:
+            f.write(json.dumps(entry) + '\n')
+            f.flush()
+        os.fsync(f.fileno())
+
+def read_journal(journal_path, config_name, model):
+    """
+    Read the responses from the journal of a config and model. A truncated last entry, e.g., from a crash
+    while writing, is ignored.
+
+    Parameters:
+    - journal_path (str): path to the folder with the journals
+    - config_name (str): name of the config
+    - model (str): name of the model
+
+    Returns:
+    - dict: list names mapped to the responses. Empty if there is no journal.
+    """
+    entries = read_journal_entries(journal_path, config_name, model)
+    return {list_name: entry['response'] for list_name, entry in entries.items()}
+
+def read_journal_entries(journal_path, config_name, model):
+    """
+    Read the entries from the journal of a config and model, see read_journal.
+
+    Parameters:
+    - journal_path (str): path to the folder with the journals
+    - config_name (str): name of the config
+    - model (str): name of the model
+
+    Returns:
+    - dict: list names mapped to the entries with the 'response' and, if recorded, the 'metrics' and 'usage'.
+      Empty if there is no journal.
+    """
+    journal_file = _journal_file(journal_path, config_name, model)
+    entries = {}
+    if not os.path.exists(journal_file):
+        return entries
+    with open(journal_file, 'r', encoding="UTF-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Ignoring incomplete entry in journal {journal_file}")
+                continue
+            entries[entry['list_name']] = entry
+    return entries
+
+def entries_to_results(model, entries, lists):
+    """
+    Convert journal entries for all lists of a config to a result in the format of write_results_to_disk.
+
+    Parameters:
+    - model (str): name of the model
+    - entries (dict): list names mapped to the journal entries, must contain all lists
+    - lists (dict): the unsorted lists of the config
+
+    Returns:
+    - dict: the result with the 'model', the 'sorted_lists' and, if recorded, the 'usage' and 'metrics'
+    """
+    cur_results = {'model': model,
+                   'sorted_lists': {list_name: entries[list_name]['response'] for list_name in lists}}
+    for key in ['usage', 'metrics']:
+        values = {list_name: entries[list_name][key] for list_name in lists if entries[list_name].get(key) is not None}
+        if len(values) > 0:
+            cur_results[key] = values
+    return cur_results
+
+def remove_journal(journal_path, config_name, model):
+    """
+    Remove the journal of a config and model.
+
+    Parameters:
+    - journal_path (str): path to the folder with the journals
+    - config_name (str): name of the config
+    - model (str): name of the model
+    """
+    journal_file = _journal_file(journal_path, config_name, model)
+    if os.path.exists(journal_file):
+        os.remove(journal_file)
+
+def compact_journal(result_path, config_name, model, lists, shard=None):
+    """
+    Compact the journal of a config and model into the gzipped result file. A journal is only compacted if it
+    contains the responses for all lists. Journals of results that are already available are removed.
+
+    Parameters:
+    - result_path (str): path to the folder with the results
+    - config_name (str): name of the config
+    - model (str): name of the model
+    - lists (dict): the unsorted lists of the config
+    - shard (tuple): only the lists of this shard are compacted, see shard_utils.parse_shard (optional)
+
+    Returns:
+    - bool: True if the results of the journal are available in the result file
+    """
+    journal_path = get_journal_path(result_path)
+    lists = shard_utils.shard_lists(model, config_name, lists, shard)
+    if shard is not None and len(lists) == 0:
+        return False
+    if shard_utils.check_if_shard_available_on_disk(result_path, config_name, model, lists, shard):
+        remove_journal(journal_path, config_name, model)
+        return True
+    entries = read_journal_entries(journal_path, config_name, model)
+    if len(entries) == 0 or any(list_name not in entries for list_name in lists):
+        return False
+    cur_results = entries_to_results(model, entries, lists)
+    results = {config_name: {'unsorted_lists': lists, 'results': [cur_results]}}
+    result_utils.write_results_to_disk(results, file_path=result_path, overwrite=False, add_lists=shard is not None)
+    remove_journal(journal_path, config_name, model)
+    return True
+
+def compact_journals(result_path, configs, shard=None):
+    """
+    Compact all finished journals of the given configs into the gzipped result files.
+
+    Parameters:
+    - result_path (str): path to the folder with the results
+    - configs (dict): the configs of the benchmark
+    - shard (tuple): only the lists of this shard are compacted, see shard_utils.parse_shard (optional)
+
+    Returns:
+    - int: the number of compacted journals
+    """
+    journal_path = get_journal_path(result_path)
+    if not os.path.exists(journal_path):
+        return 0
+    n_compacted = 0
+    for filename in sorted(os.listdir(journal_path)):
+        if not filename.endswith('.jsonl'):
+            continue
+        with open(os.path.join(journal_path, filename), 'r', encoding="UTF-8") as f:
+            first_line = f.readline()
+        try:
+            entry = json.loads(first_line)
+        except json.JSONDecodeError:
+            continue
+        config_name = entry['config_name']
+        if config_name not in configs:
+            continue
+        if compact_journal(result_path, config_name, entry['model'], configs[config_name], shard=shard):
+            n_compacted += 1
+    return n_compacted
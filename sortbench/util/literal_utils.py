@@ -0,0 +1,221 @@
+import ast
+import re
+
+# digits with optional single underscores between them, as in Python literals
+_DIGITS = r'\d(?:_?\d)*'
+_EXPONENT = rf'[eE][+-]?{_DIGITS}'
+
+# the tokens of list literals, a number must not be followed by a letter, digit, or dot, e.g., 1abc or 1.2.3
+_TOKEN = re.compile(rf'''[ \t]*(?:
+    (?P<float>(?:(?:{_DIGITS})?\.{_DIGITS}(?:{_EXPONENT})?|{_DIGITS}\.(?:{_EXPONENT})?|{_DIGITS}{_EXPONENT})(?![\w.]))
+    |(?P<int>(?:0(?:_?0)*|[1-9](?:_?\d)*)(?![\w.]))
+    |(?P<str>'[^'\\\n\r]*(?:\\.[^'\\\n\r]*)*'|"[^"\\\n\r]*(?:\\.[^"\\\n\r]*)*")
+    |(?P<open>[\[(])
+    |(?P<close>[\])])
+    |(?P<comma>,)
+    |(?P<ellipsis>\.\.\.)
+    |(?P<sign>[-+])
+    |(?P<name>[^\W\d]\w*)
+    |(?P<newline>(?:\#[^\n\r]*)?\n)
+    |(?P<end>(?:\#[^\n\r]*)?\Z)
+)''', re.VERBOSE)
+
+# the items at the start of a list of numbers or of strings without escapes, each followed by a comma, such that
+# most lists, including truncated ones, are matched at once
+_NUMBER = rf'[-+]?(?:(?:{_DIGITS})?\.{_DIGITS}(?:{_EXPONENT})?|{_DIGITS}\.(?:{_EXPONENT})?|{_DIGITS}{_EXPONENT}|0(?:_?0)*|[1-9](?:_?\d)*)(?![\w.])'
+_STRING = r''''[^'\\\n\r]*'|"[^"\\\n\r]*"'''
+_FLAT_ITEMS = '[ \\t]*\\[[ \\t\\n]*(?:(?:{item})[ \\t\\n]*,[ \\t\\n]*)*'
+_FLAT_NUMBERS = re.compile(_FLAT_ITEMS.format(item=_NUMBER))
+_FLAT_STRINGS = re.compile(_FLAT_ITEMS.format(item=_STRING))
+_STRING_ITEM = re.compile(r''''([^'\\\n\r]*)'|"([^"\\\n\r]*)"''')
+
+_NAMES = {'True': True, 'False': False, 'None': None}
+_CLOSING = {'[': ']', '(': ')'}
+
+# characters that may start literals that are not tokens of list literals, e.g., dicts, hex numbers, or triple
+# quoted strings, text with other characters is never a valid literal
+_OTHER_LITERAL_START = set('#{\\\r\x0c\'".0123456789')
+
+# text that only contains whitespace and comments
+_BLANK = re.compile(r'(?:\s|#[^\n]*)*\Z')
+
+class LiteralParseError(ValueError):
+    """
+    Raised if a string is not a valid literal. The position is the index of the character where parsing stopped.
+    """
+
+    def __init__(self, message, position):
+        super().__init__(f'{message} at position {position}')
+        self.position = position
+
+def _fallback(text, message, position):
+    """
+    Parse text that uses syntax beyond the list literals of parse_literal with ast.literal_eval, which never runs
+    code. If this fails as well, the error is reported at the position where parse_literal stopped.
+    """
+    try:
+        return ast.literal_eval(text)
+    except (SyntaxError, ValueError, TypeError, MemoryError, RecursionError):
+        raise LiteralParseError(message, position) from None
+
+def _number(match):
+    """
+    Convert an int or float token, returns None for ints that exceed the digits Python converts.
+    """
+    try:
+        return (int if match.lastgroup == 'int' else float)(match.group(match.lastgroup))
+    except ValueError:
+        return None
+
+def _parse_flat_items(text):
+    """
+    Parse the numbers or strings without escapes at the start of a list with a single match and a bulk conversion.
+
+    Returns:
+    - items (list): The items at the start of the list, None if the text does not start with a list.
+    - pos (int): The position after the comma of the last item.
+    """
+    match = _FLAT_NUMBERS.match(text)
+    if match is None:
+        return None, 0
+    if match.end() > text.index('[') + 1:
+        # the last item is followed by a comma
+        items = text[text.index('[') + 1:match.end()].split(',')[:-1]
+        try:
+            return [float(item) if 'e' in item or 'E' in item or '.' in item else int(item) for item in items], match.end()
+        except ValueError:
+            # ints that exceed the digits Python converts
+            return None, 0
+    match = _FLAT_STRINGS.match(text)
+    return [single or double for single, double in _STRING_ITEM.findall(text, 0, match.end())], match.end()
+
+def parse_literal(text):
+    """
+    Parse a Python literal, e.g., the list in the response of a model, without evaluating the text as code. Lists
+    and tuples of ints, floats, strings, booleans, None, and ellipses are parsed in a single pass over the tokens.
+    The result is the same as that of eval for these literals. Text with other syntax, e.g., dicts, sets, or
+    leading newlines, is parsed with ast.literal_eval. Expressions, e.g., [1] + [2], are not evaluated.
+
+    Parameters:
+    - text (str): The text of the literal.
+
+    Returns:
+    - object: The value of the literal.
+
+    Raises:
+    - LiteralParseError: If the text is not a valid literal, with the position where parsing stopped.
+    """
+    if '\0' in text:
+        return _fallback(text, 'null character', text.index('\0'))
+    # each open container is [items, opening bracket, has comma], the text itself is a tuple without brackets
+    stack = [[[], None, False]]
+    items, pos = _parse_flat_items(text)
+    if items is not None:
+        stack.append([items, '[', len(items) > 0])
+    expect_value = True
+    # the previous token was a string, such that a following string is concatenated
+    after_str = False
+    length = len(text)
+    while True:
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            pos = length - len(text[pos:].lstrip(' \t'))
+            if text[pos] in _OTHER_LITERAL_START:
+                return _fallback(text, 'unsupported literal', pos)
+            raise LiteralParseError('invalid character', pos)
+        kind = match.lastgroup
+        start = match.start(kind)
+        pos = match.end()
+        items, opening, has_comma = stack[-1]
+
+        if kind == 'newline':
+            if opening is None:
+                if expect_value:
+                    return _fallback(text, 'unexpected newline', start)
+                # at the top level, a newline ends the literal
+                if not _BLANK.match(text, pos):
+                    raise LiteralParseError('content after the end of the literal', pos)
+                if pos != length:
+                    return _fallback(text, 'unexpected newline', start)
+                kind = 'end'
+            else:
+                continue
+        if kind == 'end':
+            if len(stack) > 1:
+                raise LiteralParseError(f"'{opening}' was never closed", length)
+            if expect_value and (len(items) == 0 or not has_comma):
+                return _fallback(text, 'unexpected end', length)
+            return tuple(items) if has_comma else items[0]
+
+        if kind == 'str':
+            token = text[start:pos]
+            if len(token) == 2 and text.startswith(token[0], pos):
+                # triple quoted string
+                return _fallback(text, 'unsupported string', start)
+            if '\\' not in token:
+                value = token[1:-1]
+            else:
+                try:
+                    value = ast.literal_eval(token)
+                except (SyntaxError, ValueError):
+                    raise LiteralParseError('invalid escape in string', start) from None
+            if after_str:
+                items[-1] = items[-1] + value
+                continue
+            if not expect_value:
+                raise LiteralParseError('expected comma', start)
+            items.append(value)
+            expect_value = False
+            after_str = True
+            continue
+        after_str = False
+        if kind == 'name' and text.startswith(('"', "'"), pos):
+            # prefixed strings, e.g., r'a'
+            return _fallback(text, 'unsupported string', start)
+
+        if expect_value:
+            if kind == 'int' or kind == 'float':
+                value = _number(match)
+                if value is None:
+                    return _fallback(text, 'invalid number', start)
+                items.append(value)
+            elif kind == 'sign':
+                number = _TOKEN.match(text, pos)
+                value = None if number is None or number.lastgroup not in ('int', 'float') else _number(number)
+                if value is None:
+                    return _fallback(text, 'unsupported sign', start)
+                pos = number.end()
+                items.append(-value if text[start] == '-' else value)
+            elif kind == 'ellipsis':
+                items.append(...)
+            elif kind == 'name':
+                name = match.group(kind)
+                if name == 'set':
+                    return _fallback(text, 'unsupported literal', start)
+                if name not in _NAMES:
+                    raise LiteralParseError(f"name '{name}' is not a literal", start)
+                items.append(_NAMES[name])
+            elif kind == 'open':
+                stack.append([[], match.group(kind), False])
+                continue
+            elif kind == 'close' and opening is not None and _CLOSING[opening] == match.group(kind) and (len(items) == 0 or has_comma):
+                # empty container or trailing comma
+                stack.pop()
+                stack[-1][0].append(items if opening == '[' else tuple(items))
+            else:
+                raise LiteralParseError('expected value', start)
+            expect_value = False
+        elif kind == 'comma':
+            stack[-1][2] = True
+            expect_value = True
+        elif kind == 'close' and opening is not None and _CLOSING[opening] == match.group(kind):
+            stack.pop()
+            if opening == '[':
+                stack[-1][0].append(items)
+            else:
+                stack[-1][0].append(tuple(items) if has_comma else items[0])
+        elif kind == 'sign':
+            # complex numbers, e.g., 1+2j
+            return _fallback(text, 'expected comma or closing bracket', start)
+        else:
+            raise LiteralParseError('expected comma or closing bracket', start)
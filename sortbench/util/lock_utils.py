@@ -0,0 +1,27 @@
+import contextlib
+import os
+
+try:
+    import fcntl
+except ImportError:
+    # advisory locks are only available on POSIX systems, other systems write without locks
+    fcntl = None
+
+@contextlib.contextmanager
+def file_lock(lock_file):
+    """
+    Hold an exclusive advisory lock on a file while the context is active. The lock file is created if it does not
+    exist and is kept afterwards. Locks are held per open file, such that threads and processes are serialized.
+
+    Parameters:
+    - lock_file (str): path to the lock file
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(lock_file)), exist_ok=True)
+    with open(lock_file, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,151 @@
+import ast
+import os
+import re
+
+import util.result_db_utils as result_db_utils
+import util.result_utils as result_utils
+
+# suffixes of the files of results that were collected by hand, e.g., from the web interface of a model
+TEXT_UNSORTED_SUFFIX = '_expected.txt'
+TEXT_RESPONSE_SUFFIX = '_result.txt'
+TEXT_THINKING_SUFFIX = '_thinking.txt'
+
+def has_text_results(file_path):
+    """
+    Check if a folder contains results that were collected by hand as text files, i.e.,
+    <config>_expected.txt with the unsorted list, <config>_result.txt with the response, and optionally
+    <config>_thinking.txt with the reasoning of the model.
+    """
+    if not os.path.isdir(file_path):
+        return False
+    return any(filename.endswith(TEXT_RESPONSE_SUFFIX) for filename in os.listdir(file_path))
+
+def load_text_results(file_path, model, configs, name='sortbench', mode='basic', version='v1.0'):
+    """
+    Load results that were collected by hand as text files into the format of the results, see has_text_results.
+    The list of the benchmark data is identified by comparing the unsorted list with the lists of the config. The
+    reasoning of the model is stored as <think> trace before the response.
+
+    Parameters:
+    - file_path (str): path to the folder with the text files
+    - model (str): name of the model that is stored with the results
+    - configs (dict): the configs of the benchmark data
+    - name (str): name of the benchmark data (default: 'sortbench')
+    - mode (str): mode of the benchmark data (default: 'basic')
+    - version (str): version of the benchmark data (default: 'v1.0')
+
+    Returns:
+    - results (dict): the results of the model
+    - errors (list): descriptions of the files that could not be imported
+    """
+    results = {}
+    errors = []
+    prefix = f'{name}_{mode}_{version}_'
+    for filename in sorted(os.listdir(file_path)):
+        if not filename.startswith(prefix) or not filename.endswith(TEXT_RESPONSE_SUFFIX):
+            continue
+        stem = filename[:-len(TEXT_RESPONSE_SUFFIX)]
+        config_name = f'{stem}.json.gz'
+        if config_name not in configs:
+            errors.append(f"{filename}: config {config_name} not found in the benchmark data")
+            continue
+        try:
+            with open(os.path.join(file_path, stem + TEXT_UNSORTED_SUFFIX), 'r', encoding="UTF-8") as f:
+                unsorted_list = ast.literal_eval(f.read().strip())
+        except (OSError, ValueError, SyntaxError) as e:
+            errors.append(f"{filename}: unsorted list cannot be read: {e}")
+            continue
+        list_names = [list_name for list_name, lst in configs[config_name].items() if lst == unsorted_list]
+        if len(list_names) == 0:
+            errors.append(f"{filename}: unsorted list not found in config {config_name}")
+            continue
+        with open(os.path.join(file_path, filename), 'r', encoding="UTF-8") as f:
+            response = f.read().strip()
+        thinking_file = os.path.join(file_path, stem + TEXT_THINKING_SUFFIX)
+        if os.path.exists(thinking_file):
+            with open(thinking_file, 'r', encoding="UTF-8") as f:
+                response = f'<think>{f.read().strip()}</think>{response}'
+        list_name = list_names[0]
+        results[config_name] = {'unsorted_lists': {list_name: configs[config_name][list_name]},
+                                'results': [{'model': model, 'sorted_lists': {list_name: response}}]}
+    return results, errors
+
+def _list_order(list_name):
+    """
+    Sort key for list names, such that list_10 comes after list_9.
+    """
+    return [(0, int(part), '') if part.isdigit() else (1, 0, part) for part in re.split(r'(\d+)', list_name)]
+
+def merge_results(sources):
+    """
+    Merge the results of several sources, e.g., the results folders of the shards of a run, into one set of
+    results. Lists and models are combined per config. A list that is stored with the same response in several
+    sources is a duplicate and kept once. A list with different responses or different unsorted lists in several
+    sources is a conflict, the first source is kept. The lists of the merged results are ordered by name, the
+    models in the order of their first occurrence, such that merging the same sources always gives the same
+    results.
+
+    Parameters:
+    - sources (list): tuples (source name, results) in the order of priority
+
+    Returns:
+    - merged (dict): the merged results
+    - n_duplicates (int): the number of lists that were found in more than one source
+    - conflicts (list): descriptions of the conflicts
+    """
+    merged = {}
+    # for each list, the source of its unsorted list and of the response of each model
+    origins = {}
+    n_duplicates = 0
+    conflicts = []
+    for source_name, results in sources:
+        for config_name, config_results in results.items():
+            config_merged = merged.setdefault(config_name, {'unsorted_lists': {}, 'results': {}})
+            config_origins = origins.setdefault(config_name, {})
+            for list_name, lst in config_results['unsorted_lists'].items():
+                if list_name not in config_merged['unsorted_lists']:
+                    config_merged['unsorted_lists'][list_name] = lst
+                    config_origins[(None, list_name)] = source_name
+                elif config_merged['unsorted_lists'][list_name] != lst:
+                    conflicts.append(f"{config_name}: unsorted list {list_name} differs between {config_origins[(None, list_name)]} and {source_name}")
+            for cur_result in config_results['results']:
+                model = cur_result['model']
+                merged_result = config_merged['results'].setdefault(model, {'model': model, 'sorted_lists': {}})
+                for list_name, response in cur_result['sorted_lists'].items():
+                    if list_name not in merged_result['sorted_lists']:
+                        merged_result['sorted_lists'][list_name] = response
+                        for key in ['usage', 'metrics']:
+                            if list_name in cur_result.get(key, {}):
+                                merged_result.setdefault(key, {})[list_name] = cur_result[key][list_name]
+                        config_origins[(model, list_name)] = source_name
+                    elif merged_result['sorted_lists'][list_name] == response:
+                        n_duplicates += 1
+                    else:
+                        conflicts.append(f"{config_name}: response of model {model} for list {list_name} differs between {config_origins[(model, list_name)]} and {source_name}")
+
+    # canonical order of the lists
+    for config_name, config_merged in merged.items():
+        list_names = sorted(config_merged['unsorted_lists'], key=_list_order)
+        config_merged['unsorted_lists'] = {list_name: config_merged['unsorted_lists'][list_name] for list_name in list_names}
+        results = []
+        for merged_result in config_merged['results'].values():
+            for key in ['sorted_lists', 'usage', 'metrics']:
+                if key in merged_result:
+                    merged_result[key] = {list_name: merged_result[key][list_name] for list_name in sorted(merged_result[key], key=_list_order)}
+            results.append(merged_result)
+        config_merged['results'] = results
+    return merged, n_duplicates, conflicts
+
+def write_merged_results(merged, file_path):
+    """
+    Write merged results to a results folder. The stored results of the configs are replaced, such that the
+    folder contains exactly the merged results of each config.
+
+    Parameters:
+    - merged (dict): the merged results, see merge_results
+    - file_path (str): path to the results folder or to a SQLite database
+    """
+    if not result_db_utils.is_result_db(file_path):
+        os.makedirs(file_path, exist_ok=True)
+    for config_name, config_results in merged.items():
+        result_utils.write_results_to_disk({config_name: config_results}, file_path=file_path, overwrite=True)
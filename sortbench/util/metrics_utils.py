@@ -0,0 +1,385 @@
+import bisect
+import itertools
+import math
+from collections import Counter
+
+import numpy as np
+
+
+def _is_totally_ordered(lst):
+    """
+    Check if the items of a list are totally ordered, i.e., all items are numbers without NaN or all items are
+    strings. Only then, counting with sorted ranks gives the same results as comparing all pairs.
+    """
+    types = set(map(type, lst))
+    if types <= {str}:
+        return True
+    if not types <= {int, float, bool}:
+        return False
+    # NaN is neither smaller nor larger than any other number
+    return float not in types or not any(item != item for item in lst)
+
+def _ranks(lst):
+    """
+    Replace the items of a totally ordered list by their rank among the distinct items, starting at 1.
+    """
+    rank_of = {item: rank for rank, item in enumerate(sorted(set(lst)), start=1)}
+    return [rank_of[item] for item in lst], len(rank_of)
+
+def count_inversions(lst):
+    """
+    Count the pairs i < j with lst[i] > lst[j] in O(n log n) with a Fenwick tree over the ranks of the items.
+    Lists that are not totally ordered, e.g., with NaN, are compared pair by pair, such that the result is always
+    the same as comparing all pairs.
+
+    Parameters:
+    - lst (list): A list of comparable items.
+
+    Returns:
+    - int: The number of inversions in the list.
+    """
+    if not _is_totally_ordered(lst):
+        count = 0
+        for i in range(len(lst)):
+            for j in range(i + 1, len(lst)):
+                if lst[i] > lst[j]:
+                    count += 1
+        return count
+    ranks, n_ranks = _ranks(lst)
+    tree = [0] * (n_ranks + 1)
+    count = 0
+    # from right to left, count the items that are smaller than the current item and right of it
+    for rank in reversed(ranks):
+        i = rank - 1
+        while i > 0:
+            count += tree[i]
+            i -= i & -i
+        i = rank
+        while i <= n_ranks:
+            tree[i] += 1
+            i += i & -i
+    return count
+
+def count_neighbor_inversions(lst):
+    """
+    Count the positions i with lst[i] > lst[i+1].
+
+    Parameters:
+    - lst (list): A list of comparable items.
+
+    Returns:
+    - int: The number of unordered neighbors in the list.
+    """
+    return sum(1 for i in range(len(lst) - 1) if lst[i] > lst[i + 1])
+
+def count_multiset_difference(unsorted_list, sorted_list):
+    """
+    Count the items that are missing in and the items that were added to the sorted list in one pass. Items are
+    counted with their multiplicity.
+
+    Parameters:
+    - unsorted_list (list): A list of items.
+    - sorted_list (list): A sorted version of the unsorted list
+
+    Returns:
+    - tuple: The number of missing and the number of additional items.
+    """
+    counts = Counter(unsorted_list)
+    counts.subtract(sorted_list)
+    missing = 0
+    additional = 0
+    for count in counts.values():
+        if count > 0:
+            missing += count
+        else:
+            additional -= count
+    return missing, additional
+
+def longest_sorted_subsequence(lst):
+    """
+    Get the length of the longest non-decreasing subsequence in O(n log n), i.e., the number of items that are
+    already in sorted order.
+
+    Parameters:
+    - lst (list): A list of comparable items.
+
+    Returns:
+    - int: The length of the longest non-decreasing subsequence.
+    """
+    # tails[k] is the smallest last item of a non-decreasing subsequence of length k+1
+    tails = []
+    for item in lst:
+        pos = bisect.bisect_right(tails, item)
+        if pos == len(tails):
+            tails.append(item)
+        else:
+            tails[pos] = item
+    return len(tails)
+
+def _count_tied_pairs(lst):
+    """
+    Count the pairs of equal items.
+    """
+    return sum(count * (count - 1) // 2 for count in Counter(lst).values())
+
+def kendall_tau(lst, inversions=None):
+    """
+    Compute Kendall's tau-b between the positions and the items of a list, i.e., 1 for a sorted list without ties and -1 for a
+    list sorted in reverse order. Pairs of equal items are neither concordant nor discordant.
+
+    Parameters:
+    - lst (list): A list of comparable items.
+    - inversions (int): The number of inversions of the list, computed if not given (optional)
+
+    Returns:
+    - float: Kendall's tau-b, None if it is undefined, e.g., for lists with less than two distinct items.
+    """
+    n_pairs = len(lst) * (len(lst) - 1) // 2
+    n_tied = _count_tied_pairs(lst)
+    if n_pairs == 0 or n_tied == n_pairs:
+        return None
+    if inversions is None:
+        inversions = count_inversions(lst)
+    concordant = n_pairs - n_tied - inversions
+    return (concordant - inversions) / math.sqrt(n_pairs * (n_pairs - n_tied))
+
+def spearman_footrule(lst):
+    """
+    Compute Spearman's footrule, the sum of the distances between the position of each item and its position in
+    the sorted list. Equal items keep their order, such that a sorted list has a footrule of 0.
+
+    Parameters:
+    - lst (list): A list of comparable items.
+
+    Returns:
+    - int: Spearman's footrule.
+    """
+    order = sorted(range(len(lst)), key=lst.__getitem__)
+    return sum(abs(position - index) for position, index in enumerate(order))
+
+def compute_list_metrics(unsorted_list, sorted_list, unsorted_inversions=None, unsorted_neighbor_inversions=None):
+    """
+    Compute all metrics of a sorted list in the format of the columns of eval_utils.evaluate_results.
+
+    Parameters:
+    - unsorted_list (list): The unsorted list of the benchmark.
+    - sorted_list (list): The list parsed from the response of the model.
+    - unsorted_inversions (int): The inversions of the unsorted list, e.g., if they are shared by several models (optional)
+    - unsorted_neighbor_inversions (int): The neighbor inversions of the unsorted list (optional)
+
+    Returns:
+    - dict: The metrics of the sorted list.
+    """
+    if unsorted_inversions is None:
+        unsorted_inversions = count_inversions(unsorted_list)
+    if unsorted_neighbor_inversions is None:
+        unsorted_neighbor_inversions = count_neighbor_inversions(unsorted_list)
+    inversions = count_inversions(sorted_list)
+    missing, additional = count_multiset_difference(unsorted_list, sorted_list)
+    return {
+        'Unordered Pairs Before': unsorted_inversions,
+        'Unordered Pairs After': inversions,
+        'Unordered Neighbors Before': unsorted_neighbor_inversions,
+        'Unordered Neighbors After': count_neighbor_inversions(sorted_list),
+        'Missing Items': missing,
+        'Additional Items': additional,
+        'Longest Sorted Subsequence': longest_sorted_subsequence(sorted_list),
+        'Kendall Tau': kendall_tau(sorted_list, inversions=inversions),
+        'Spearman Footrule': spearman_footrule(sorted_list),
+    }
+
+def _order_kind(lst):
+    """
+    Get the kind of the items of a totally ordered list, i.e., 'str' or 'num', such that lists of the same kind
+    can be ranked together. Returns None if the list is not totally ordered, see _is_totally_ordered.
+    """
+    if not _is_totally_ordered(lst):
+        return None
+    if len(lst) > 0 and type(lst[0]) is not str:
+        return 'num'
+    return 'str'
+
+def _to_array(items):
+    """
+    Convert totally ordered items to an array that compares the items like Python. Numbers that are exactly
+    represented as float64 and strings that do not end with NUL, which NumPy strips, are converted to native
+    arrays, all other items to an object array. Native string arrays pad all strings to the longest one, such
+    that strings are only converted if a few long strings, e.g., a whole response, do not inflate the array.
+    """
+    types = set(map(type, items))
+    if types <= {str}:
+        lengths = list(map(len, items))
+        if max(lengths, default=0) * len(items) <= 4 * sum(lengths) + 64 and not any(item.endswith('\0') for item in items):
+            return np.array(items, dtype=str)
+    elif all(type(item) is float or -2**53 <= item <= 2**53 for item in items):
+        return np.array(items, dtype=np.float64)
+    array = np.empty(len(items), dtype=object)
+    array[:] = items
+    return array
+
+def _rank_encode(lists):
+    """
+    Replace the items of lists of the same kind by their rank among the distinct items of all lists, starting at 0,
+    and pad the ranks into a 2-D array. The padding is the largest rank, such that it is sorted after all items.
+
+    Returns:
+    - ranks (np.ndarray): The ranks of the items with shape (number of lists, length of the longest list).
+    - lengths (np.ndarray): The lengths of the lists.
+    - n_ranks (int): The number of distinct items, which is also the padding.
+    """
+    lengths = np.array([len(lst) for lst in lists], dtype=np.int64)
+    distinct, inverse = np.unique(_to_array(list(itertools.chain.from_iterable(lists))), return_inverse=True)
+    n_ranks = len(distinct)
+    ranks = np.full((len(lists), max(lengths.max(initial=0), 1)), n_ranks, dtype=np.int64)
+    ranks[np.arange(ranks.shape[1]) < lengths[:, None]] = inverse.reshape(-1)
+    return ranks, lengths, n_ranks
+
+def _batch_inversions(ranks, n_ranks):
+    """
+    Count the inversions of each row of rank encoded lists with a bottom-up merge sort of all rows at once. In each
+    round, the sorted left and right halves of all blocks are compared with one search over the whole batch.
+    """
+    n_lists, length = ranks.shape
+    size = 1 << (length - 1).bit_length()
+    # the padding is the largest rank and at the end, such that it adds no inversions
+    blocks = np.full((n_lists, size), n_ranks, dtype=np.int64)
+    blocks[:, :length] = ranks
+    inversions = np.zeros(n_lists, dtype=np.int64)
+    width = 1
+    while width < size:
+        n_blocks = n_lists * size // (2 * width)
+        halves = blocks.reshape(n_blocks, 2, width)
+        # an offset per block keeps the blocks apart, such that the left halves are sorted as one array
+        offsets = (np.arange(n_blocks, dtype=np.int64) * (n_ranks + 1))[:, None]
+        left_keys = (halves[:, 0] + offsets).reshape(-1)
+        right_keys = (halves[:, 1] + offsets).reshape(-1)
+        not_greater = np.searchsorted(left_keys, right_keys, side='right').reshape(n_blocks, width) - width * np.arange(n_blocks)[:, None]
+        inversions += (width - not_greater).reshape(n_lists, -1).sum(axis=1)
+        blocks = np.sort(halves.reshape(n_blocks, 2 * width), axis=1).reshape(n_lists, size)
+        width *= 2
+    return inversions
+
+def _batch_neighbor_inversions(ranks):
+    """
+    Count the unordered neighbors of each row of rank encoded lists.
+    """
+    return (ranks[:, :-1] > ranks[:, 1:]).sum(axis=1)
+
+def _batch_counts(ranks, n_ranks):
+    """
+    Count how often each rank occurs in each row of rank encoded lists, without the padding.
+    """
+    n_lists = ranks.shape[0]
+    offsets = ranks + (n_ranks + 1) * np.arange(n_lists)[:, None]
+    counts = np.bincount(offsets.reshape(-1), minlength=n_lists * (n_ranks + 1))
+    return counts.reshape(n_lists, n_ranks + 1)[:, :n_ranks]
+
+def _batch_footrule(ranks):
+    """
+    Compute Spearman's footrule of each row of rank encoded lists. The padding is sorted to the end and stays in
+    place, such that it does not contribute.
+    """
+    order = np.argsort(ranks, axis=1, kind='stable')
+    return np.abs(order - np.arange(ranks.shape[1])).sum(axis=1)
+
+def count_inversions_batch(lists):
+    """
+    Count the inversions and unordered neighbors of several lists at once, e.g., of all unsorted lists of a
+    config, see count_inversions and count_neighbor_inversions.
+
+    Parameters:
+    - lists (list): Lists of comparable items.
+
+    Returns:
+    - tuple: The number of inversions and the number of unordered neighbors of each list.
+    """
+    inversions = [None] * len(lists)
+    neighbor_inversions = [None] * len(lists)
+    batches = {}
+    for i, lst in enumerate(lists):
+        kind = _order_kind(lst)
+        if kind is None:
+            inversions[i] = count_inversions(lst)
+            neighbor_inversions[i] = count_neighbor_inversions(lst)
+        else:
+            batches.setdefault(kind, []).append(i)
+    for indices in batches.values():
+        ranks, _, n_ranks = _rank_encode([lists[i] for i in indices])
+        for i, n_inversions, n_neighbors in zip(indices, _batch_inversions(ranks, n_ranks).tolist(), _batch_neighbor_inversions(ranks).tolist()):
+            inversions[i] = n_inversions
+            neighbor_inversions[i] = n_neighbors
+    return inversions, neighbor_inversions
+
+def compute_batch_metrics(unsorted_lists, sorted_lists, unsorted_inversions=None, unsorted_neighbor_inversions=None):
+    """
+    Compute the metrics of several sorted lists at once, e.g., of all lists of a model for a config. The lists
+    are rank encoded into integer arrays and all metrics except the longest sorted subsequence are computed with
+    NumPy for the whole batch. Lists that are not totally ordered, e.g., with NaN, are computed one by one with
+    compute_list_metrics. The results are the same as those of compute_list_metrics for each list.
+
+    Parameters:
+    - unsorted_lists (list): The unsorted lists of the benchmark.
+    - sorted_lists (list): The lists parsed from the responses of the model, in the same order.
+    - unsorted_inversions (list): The inversions of the unsorted lists, e.g., if they are shared by several models (optional)
+    - unsorted_neighbor_inversions (list): The neighbor inversions of the unsorted lists (optional)
+
+    Returns:
+    - list: The metrics of each sorted list.
+    """
+    batch_metrics = [None] * len(sorted_lists)
+    batches = {}
+    for i, (unsorted_list, sorted_list) in enumerate(zip(unsorted_lists, sorted_lists)):
+        kinds = {_order_kind(lst) for lst in (unsorted_list, sorted_list) if len(lst) > 0}
+        if None in kinds or len(kinds) > 1:
+            batch_metrics[i] = compute_list_metrics(unsorted_list, sorted_list,
+                                                    None if unsorted_inversions is None else unsorted_inversions[i],
+                                                    None if unsorted_neighbor_inversions is None else unsorted_neighbor_inversions[i])
+        else:
+            batches.setdefault(kinds.pop() if kinds else 'str', []).append(i)
+
+    for indices in batches.values():
+        n_lists = len(indices)
+        # the unsorted and sorted lists are ranked together, such that equal items have equal ranks
+        ranks, lengths, n_ranks = _rank_encode([unsorted_lists[i] for i in indices] + [sorted_lists[i] for i in indices])
+        unsorted_ranks = ranks[:n_lists]
+        sorted_ranks = ranks[n_lists:]
+        lengths = lengths[n_lists:]
+
+        inversions = _batch_inversions(sorted_ranks, n_ranks)
+        if unsorted_inversions is None:
+            before = _batch_inversions(unsorted_ranks, n_ranks).tolist()
+        else:
+            before = [unsorted_inversions[i] for i in indices]
+        if unsorted_neighbor_inversions is None:
+            neighbors_before = _batch_neighbor_inversions(unsorted_ranks).tolist()
+        else:
+            neighbors_before = [unsorted_neighbor_inversions[i] for i in indices]
+        neighbors_after = _batch_neighbor_inversions(sorted_ranks)
+
+        sorted_counts = _batch_counts(sorted_ranks, n_ranks)
+        difference = _batch_counts(unsorted_ranks, n_ranks) - sorted_counts
+        missing = np.clip(difference, 0, None).sum(axis=1)
+        additional = np.clip(-difference, 0, None).sum(axis=1)
+        tied_pairs = (sorted_counts * (sorted_counts - 1) // 2).sum(axis=1)
+        footrule = _batch_footrule(sorted_ranks)
+
+        for k, i in enumerate(indices):
+            n_pairs = int(lengths[k]) * (int(lengths[k]) - 1) // 2
+            n_tied = int(tied_pairs[k])
+            n_inversions = int(inversions[k])
+            if n_pairs == 0 or n_tied == n_pairs:
+                tau = None
+            else:
+                tau = (n_pairs - n_tied - 2 * n_inversions) / math.sqrt(n_pairs * (n_pairs - n_tied))
+            batch_metrics[i] = {
+                'Unordered Pairs Before': before[k],
+                'Unordered Pairs After': n_inversions,
+                'Unordered Neighbors Before': neighbors_before[k],
+                'Unordered Neighbors After': int(neighbors_after[k]),
+                'Missing Items': int(missing[k]),
+                'Additional Items': int(additional[k]),
+                'Longest Sorted Subsequence': longest_sorted_subsequence(sorted_ranks[k, :lengths[k]].tolist()),
+                'Kendall Tau': tau,
+                'Spearman Footrule': int(footrule[k]),
+            }
+    return batch_metrics
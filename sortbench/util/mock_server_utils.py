@@ -0,0 +1,255 @@
+import ast
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_PROMPT_PREFIX = "Sort the following list: "
+
+class MockServerSettings:
+    """
+    Behavior of the mock server. All rates are probabilities per request.
+    """
+
+    def __init__(self, latency=0.0, chunk_delay=0.0, error_rate=0.0, rate_limit_rate=0.0, retry_after=0.1,
+                 truncation_rate=0.0, parsing_error_rate=0.0, parsing_errors_path='known_parsing_errors', chunk_size=8, seed=None):
+        """
+        Parameters:
+        - latency (float): the delay before the first byte of a response in seconds (default: 0.0)
+        - chunk_delay (float): the delay between the chunks of a streaming response in seconds (default: 0.0)
+        - error_rate (float): the rate of responses with status 500 (default: 0.0)
+        - rate_limit_rate (float): the rate of responses with status 429 (default: 0.0)
+        - retry_after (float): the value of the retry-after header of 429 responses in seconds (default: 0.1)
+        - truncation_rate (float): the rate of responses that are cut off in the middle (default: 0.0)
+        - parsing_error_rate (float): the rate of responses that are replaced by a model output from parsing_errors_path (default: 0.0)
+        - parsing_errors_path (str): path to the folder with model outputs that could not be parsed (default: known_parsing_errors)
+        - chunk_size (int): the number of characters per chunk of a streaming response (default: 8)
+        - seed (int): the random seed (optional)
+        """
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.truncation_rate = truncation_rate
+        self.parsing_error_rate = parsing_error_rate
+        self.chunk_size = chunk_size
+        self.parsing_errors = []
+        if parsing_error_rate > 0 and os.path.isdir(parsing_errors_path):
+            for filename in sorted(os.listdir(parsing_errors_path)):
+                with open(os.path.join(parsing_errors_path, filename), 'r', encoding="UTF-8") as f:
+                    self.parsing_errors.append(f.read())
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """
+        Draw the outcome of a request.
+
+        Returns:
+        - str: 'error', 'rate_limit', 'truncated', 'parsing_error', or 'ok'
+        """
+        with self._lock:
+            value = self._random.random()
+            if value < self.error_rate:
+                return 'error'
+            value -= self.error_rate
+            if value < self.rate_limit_rate:
+                return 'rate_limit'
+            value -= self.rate_limit_rate
+            if value < self.truncation_rate:
+                return 'truncated'
+            value -= self.truncation_rate
+            if value < self.parsing_error_rate and len(self.parsing_errors) > 0:
+                return 'parsing_error'
+            return 'ok'
+
+    def parsing_error(self):
+        with self._lock:
+            return self._random.choice(self.parsing_errors)
+
+def sort_prompt(prompt):
+    """
+    Answer a prompt of sortbench like a perfect model. Prompts without a list are echoed.
+
+    Parameters:
+    - prompt (str): the prompt
+
+    Returns:
+    - str: the sorted list
+    """
+    if _PROMPT_PREFIX not in prompt:
+        return prompt
+    try:
+        unsorted_list = ast.literal_eval(prompt[prompt.index(_PROMPT_PREFIX)+len(_PROMPT_PREFIX):])
+        return str(sorted(unsorted_list))
+    except (ValueError, SyntaxError, TypeError):
+        return prompt
+
+def _get_prompt(body):
+    """
+    Get the text of the last user message of a chat completions or messages request.
+    """
+    content = body['messages'][-1]['content']
+    if isinstance(content, list):
+        content = ''.join(part.get('text', '') for part in content)
+    return content
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, data, headers=None):
+        data = json.dumps(data).encode('UTF-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        settings = self.server.settings
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        is_messages = self.path.endswith('/messages')
+        if not is_messages and not self.path.endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f'Unknown path {self.path}', 'type': 'not_found'}})
+            return
+        self.server.count_request()
+        try:
+            self._respond(settings, body, is_messages)
+        finally:
+            self.server.release_request()
+
+    def _respond(self, settings, body, is_messages):
+        """
+        Answer a chat completions or messages request according to the settings of the server.
+        """
+        outcome = settings.draw()
+        if settings.latency > 0:
+            time.sleep(settings.latency)
+        if outcome == 'error':
+            self._send_json(500, {'error': {'message': 'Internal server error', 'type': 'server_error'}})
+            return
+        if outcome == 'rate_limit':
+            self._send_json(429, {'error': {'message': 'Rate limit exceeded', 'type': 'rate_limit_error'}},
+                            headers={'retry-after': str(settings.retry_after)})
+            return
+
+        prompt = _get_prompt(body)
+        if outcome == 'parsing_error':
+            text = settings.parsing_error()
+        else:
+            text = sort_prompt(prompt)
+        if outcome == 'truncated':
+            text = text[:len(text)//2]
+        # roughly four characters per token
+        usage = {'prompt_tokens': len(prompt)//4+1, 'completion_tokens': len(text)//4+1}
+
+        if is_messages:
+            self._send_json(200, {'id': 'msg_mock', 'type': 'message', 'role': 'assistant', 'model': body['model'],
+                                  'content': [{'type': 'text', 'text': text}],
+                                  'stop_reason': 'max_tokens' if outcome == 'truncated' else 'end_turn',
+                                  'usage': {'input_tokens': usage['prompt_tokens'], 'output_tokens': usage['completion_tokens']}})
+        elif body.get('stream'):
+            self._stream_chat_completion(body, text, usage, outcome == 'truncated')
+        else:
+            usage['total_tokens'] = usage['prompt_tokens']+usage['completion_tokens']
+            self._send_json(200, {'id': 'chatcmpl-mock', 'object': 'chat.completion', 'created': int(time.time()), 'model': body['model'],
+                                  'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text},
+                                               'finish_reason': 'length' if outcome == 'truncated' else 'stop'}],
+                                  'usage': usage})
+
+    def _stream_chat_completion(self, body, text, usage, truncated):
+        """
+        Send a chat completion as server-sent events with chunked transfer encoding.
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        chunk_size = self.server.settings.chunk_size
+        base = {'id': 'chatcmpl-mock', 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': body['model']}
+        events = []
+        for i in range(0, len(text), chunk_size):
+            events.append(dict(base, choices=[{'index': 0, 'delta': {'content': text[i:i+chunk_size]}, 'finish_reason': None}]))
+        events.append(dict(base, choices=[{'index': 0, 'delta': {}, 'finish_reason': 'length' if truncated else 'stop'}]))
+        if (body.get('stream_options') or {}).get('include_usage'):
+            usage['total_tokens'] = usage['prompt_tokens']+usage['completion_tokens']
+            events.append(dict(base, choices=[], usage=usage))
+        for i, event in enumerate(events):
+            if i > 0 and self.server.settings.chunk_delay > 0:
+                time.sleep(self.server.settings.chunk_delay)
+            self._write_chunk(f'data: {json.dumps(event)}\n\n'.encode('UTF-8'))
+        self._write_chunk(b'data: [DONE]\n\n')
+        self._write_chunk(b'')
+
+    def _write_chunk(self, data):
+        self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+class MockServer(ThreadingHTTPServer):
+    """
+    Local server that speaks the chat completions API of OpenAI (streaming and non-streaming) and the messages
+    API of Antropic. It sorts the lists in the prompts of sortbench and can simulate latency, errors, rate
+    limits, truncated responses, and unparsable outputs, see MockServerSettings.
+    """
+    daemon_threads = True
+    # clients open many connections at once, connections beyond the backlog are only accepted after a retry
+    request_queue_size = 128
+
+    def __init__(self, settings=None, host='127.0.0.1', port=0):
+        """
+        Parameters:
+        - settings (MockServerSettings): the behavior of the server (default: no latency and no errors)
+        - host (str): the host to bind to (default: 127.0.0.1)
+        - port (int): the port to bind to, 0 picks a free port (default: 0)
+        """
+        super().__init__((host, port), _MockHandler)
+        self.settings = settings if settings is not None else MockServerSettings()
+        self.n_requests = 0
+        # the number of requests that are being answered and its maximum, e.g., to check the concurrency of clients
+        self.n_in_flight = 0
+        self.max_in_flight = 0
+        self._count_lock = threading.Lock()
+        self._thread = None
+
+    def count_request(self):
+        with self._count_lock:
+            self.n_requests += 1
+            self.n_in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.n_in_flight)
+
+    def release_request(self):
+        with self._count_lock:
+            self.n_in_flight -= 1
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """
+        Serve requests in a background thread.
+
+        Returns:
+        - str: the URL of the server
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """
+        Stop the background thread and close the socket.
+        """
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,157 @@
+import os
+import shutil
+from urllib.parse import quote
+
+# the columns by which the scores are partitioned, each partition is a folder, e.g., Mode=basic/Model=gpt-4o/Size=16
+PARTITION_COLUMNS = ['Mode', 'Model', 'Size']
+
+# the columns of the scores and their Arrow types, in the order of eval_utils.evaluate_results. Counts are ints
+# that are null if the response could not be parsed.
+SCORE_COLUMNS = [
+    ('Benchmark', 'string'),
+    ('Mode', 'string'),
+    ('Version', 'string'),
+    ('Model', 'string'),
+    ('Type', 'string'),
+    ('Size', 'int64'),
+    ('List Name', 'string'),
+    ('Unordered Pairs Before', 'int64'),
+    ('Unordered Pairs After', 'int64'),
+    ('Unordered Neighbors Before', 'int64'),
+    ('Unordered Neighbors After', 'int64'),
+    ('Missing Items', 'int64'),
+    ('Additional Items', 'int64'),
+    ('Longest Sorted Subsequence', 'int64'),
+    ('Kendall Tau', 'float64'),
+    ('Spearman Footrule', 'int64'),
+    ('Output List Length', 'int64'),
+    ('Output Length', 'int64'),
+    ('Thinking Length', 'int64'),
+    ('Parsed', 'bool'),
+    ('HasError', 'bool'),
+    ('ErrorType', 'string'),
+    ('IsList', 'bool'),
+    ('HasEllipsis', 'bool'),
+    ('RequiredTypeParsing', 'bool'),
+    ('Unordered Pairs (%)', 'float64'),
+    ('Unordered Neighbors (%)', 'float64'),
+    ('Missing Items (%)', 'float64'),
+    ('Additional Items (%)', 'float64'),
+    ('Validity Score', 'float64'),
+    ('Sorting Score', 'float64'),
+    ('Faithfulness Score', 'float64'),
+    ('SortBench Score', 'float64'),
+]
+
+def _import_pyarrow():
+    """
+    Import pyarrow, which is only required for the Parquet output.
+    """
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('Writing and reading scores as Parquet requires pyarrow, install it with "pip install pyarrow" or use the CSV output') from None
+    return pyarrow
+
+def get_score_schema():
+    """
+    Get the Arrow schema of the scores.
+
+    Returns:
+    - pyarrow.Schema: the schema with the columns of SCORE_COLUMNS
+    """
+    pa = _import_pyarrow()
+    return pa.schema([(column, pa.type_for_alias(column_type)) for column, column_type in SCORE_COLUMNS])
+
+def _partitioning(pa, schema):
+    return pa.dataset.partitioning(pa.schema([schema.field(column) for column in PARTITION_COLUMNS]), flavor='hive')
+
+class ScoreWriter:
+    """
+    Writes scores to a Parquet dataset that is partitioned by mode, model, and size, with one file per partition.
+    The scores can be written in chunks, each chunk is appended to the files of its partitions. The partitions of
+    the modes that are written are replaced, the partitions of other modes are kept, such that the scores of each
+    mode can be written by its own run.
+    """
+
+    def __init__(self, parquet_path):
+        """
+        Parameters:
+        - parquet_path (str): path to the folder of the dataset
+        """
+        self.parquet_path = parquet_path
+        self._pa = _import_pyarrow()
+        self._schema = get_score_schema()
+        # the partition columns are stored in the folder names, not in the files
+        self._file_schema = self._pa.schema([field for field in self._schema if field.name not in PARTITION_COLUMNS])
+        self._modes = set()
+        self._writers = {}
+
+    def write(self, df_scores):
+        """
+        Write a chunk of scores.
+
+        Parameters:
+        - df_scores (pd.DataFrame): the scores, see eval_utils.get_scores
+        """
+        if list(df_scores.columns) != self._schema.names:
+            raise ValueError(f'The columns of the scores do not match the schema, missing: {sorted(set(self._schema.names) - set(df_scores.columns))}, unexpected: {sorted(set(df_scores.columns) - set(self._schema.names))}')
+        for mode in df_scores['Mode'].unique():
+            if mode not in self._modes:
+                shutil.rmtree(os.path.join(self.parquet_path, f'Mode={quote(str(mode), safe="")}'), ignore_errors=True)
+                self._modes.add(mode)
+        for partition, df_partition in df_scores.groupby(PARTITION_COLUMNS, sort=False):
+            writer = self._writers.get(partition)
+            if writer is None:
+                # the folder names are encoded like those of pyarrow, e.g., Model=gpt-4o/Size=16
+                partition_path = os.path.join(self.parquet_path, *[f'{column}={quote(str(value), safe="")}' for column, value in zip(PARTITION_COLUMNS, partition)])
+                os.makedirs(partition_path, exist_ok=True)
+                writer = self._pa.parquet.ParquetWriter(os.path.join(partition_path, 'part-0.parquet'), self._file_schema)
+                self._writers[partition] = writer
+            writer.write_table(self._pa.Table.from_pandas(df_partition.drop(columns=PARTITION_COLUMNS), schema=self._file_schema, preserve_index=False))
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+def write_scores(df_scores, parquet_path):
+    """
+    Write scores as a Parquet dataset that is partitioned by mode, model, and size, see ScoreWriter.
+
+    Parameters:
+    - df_scores (pd.DataFrame): the scores, see eval_utils.evaluate_results
+    - parquet_path (str): path to the folder of the dataset
+    """
+    writer = ScoreWriter(parquet_path)
+    try:
+        writer.write(df_scores)
+    finally:
+        writer.close()
+
+def read_scores(parquet_path, columns=None, mode=None, model=None, size=None):
+    """
+    Read scores from a Parquet dataset. Only the requested columns and the partitions of the requested mode, model,
+    and size are read.
+
+    Parameters:
+    - parquet_path (str): path to the folder of the dataset
+    - columns (list): the columns to read, all columns if None (default: None)
+    - mode (str): only read the scores of this mode, all modes if None (default: None)
+    - model (str): only read the scores of this model, all models if None (default: None)
+    - size (int): only read the scores of lists of this size, all sizes if None (default: None)
+
+    Returns:
+    - pd.DataFrame: the scores, with the columns in the order of SCORE_COLUMNS
+    """
+    pa = _import_pyarrow()
+    schema = get_score_schema()
+    dataset = pa.dataset.dataset(parquet_path, schema=schema, format='parquet', partitioning=_partitioning(pa, schema))
+    scores_filter = None
+    for column, value in zip(PARTITION_COLUMNS, [mode, model, size]):
+        if value is not None:
+            condition = pa.dataset.field(column) == value
+            scores_filter = condition if scores_filter is None else scores_filter & condition
+    return dataset.to_table(columns=columns, filter=scores_filter).to_pandas()
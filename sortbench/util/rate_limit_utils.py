@@ -0,0 +1,258 @@
+import asyncio
+import email.utils
+import random
+import re
+import threading
+import time
+from datetime import datetime
+
+import anthropic
+import httpx
+import openai
+
+# status codes of API errors that are worth retrying
+_RETRYABLE_STATUS_CODES = [408, 409, 425, 429, 500, 502, 503, 504, 529]
+
+# default settings of the rate limiters per provider (requests per second), the limiters start at the maximum rate
+_DEFAULT_LIMITER_SETTINGS = {
+    'openai': {'max_rate': 50.0},
+    'inncube': {'max_rate': 10.0},
+    'antropic': {'max_rate': 20.0},
+}
+
+_LIMITERS = {}
+_LIMITERS_LOCK = threading.Lock()
+
+def _get_status_code(error):
+    """
+    Get the HTTP status code of an API error. None if the error has no status code.
+    """
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        response = getattr(error, 'response', None)
+        status_code = getattr(response, 'status_code', None)
+    return status_code
+
+def is_retryable_error(error):
+    """
+    Check if an error raised while calling an API is transient and the request should be retried.
+    Rate limits, server errors, timeouts and connection problems are retryable. Errors that will happen again
+    for the same request, e.g., authentication errors or invalid requests, are fatal.
+
+    Parameters:
+    - error (Exception): the error raised by the API client
+
+    Returns:
+    - bool: True if the request should be retried
+    """
+    if isinstance(error, (openai.APIConnectionError, anthropic.APIConnectionError, httpx.TransportError)):
+        return True
+    status_code = _get_status_code(error)
+    if status_code is not None:
+        return status_code in _RETRYABLE_STATUS_CODES
+    return False
+
+def _parse_duration(value):
+    """
+    Parse a duration as used in rate limit headers, e.g., "2", "1.5", "20ms", "6m0s", or an HTTP date.
+    Returns the duration in seconds or None if the value cannot be parsed.
+    """
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    matches = re.fullmatch(r'(?:(\d+(?:\.\d+)?)h)?(?:(\d+(?:\.\d+)?)m(?!s))?(?:(\d+(?:\.\d+)?)s)?(?:(\d+(?:\.\d+)?)ms)?', value)
+    if matches is not None and any(matches.groups()):
+        hours, minutes, seconds, millis = [float(g) if g is not None else 0.0 for g in matches.groups()]
+        return hours*3600 + minutes*60 + seconds + millis/1000
+    try:
+        retry_date = email.utils.parsedate_to_datetime(value)
+        return max(retry_date.timestamp()-time.time(), 0.0)
+    except (TypeError, ValueError):
+        pass
+    # RFC 3339 timestamps as used by Antropic
+    try:
+        reset_time = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return max(reset_time.timestamp()-time.time(), 0.0)
+    except ValueError:
+        return None
+
+def get_retry_after(error):
+    """
+    Get the number of seconds the API asks to wait before retrying from the Retry-After headers of an error.
+
+    Parameters:
+    - error (Exception): the error raised by the API client
+
+    Returns:
+    - float: the number of seconds to wait, None if the API did not send a Retry-After header
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers is None:
+        return None
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms is not None:
+        try:
+            return max(float(retry_after_ms)/1000, 0.0)
+        except ValueError:
+            pass
+    retry_after = headers.get('retry-after')
+    if retry_after is not None:
+        return _parse_duration(retry_after)
+    return None
+
+def backoff_delay(attempt, retry_after=None, base_delay=1.0, max_delay=60.0):
+    """
+    Compute the delay before the next attempt using exponential backoff with full jitter.
+    If the API sent a Retry-After header, that delay is used with a small jitter on top.
+
+    Parameters:
+    - attempt (int): the number of the attempt that failed, starting at 1
+    - retry_after (float): the delay requested by the API in seconds (optional)
+    - base_delay (float): the delay of the first retry in seconds (default: 1.0)
+    - max_delay (float): the maximum delay in seconds (default: 60.0)
+
+    Returns:
+    - float: the delay in seconds
+    """
+    if retry_after is not None:
+        return min(retry_after, max_delay) + random.uniform(0, base_delay/4)
+    return random.uniform(0, min(max_delay, base_delay*(2**(attempt-1))))
+
+class ProviderRateLimiter:
+    """
+    Adaptive rate limiter for the requests to a provider. Requests are paced by a token bucket whose rate is
+    adapted with AIMD: the rate starts at the maximum rate, decreases multiplicatively after rate limit errors
+    and exhausted rate limit headers, and increases additively after successful requests. Rate limit headers of
+    the responses and Retry-After headers of errors block all requests until the limit is reset.
+    """
+
+    def __init__(self, initial_rate=None, min_rate=0.1, max_rate=50.0, additive_increase=0.1, decrease_factor=0.5, burst=None):
+        """
+        Parameters:
+        - initial_rate (float): the initial number of requests per second, uses max_rate if None (default: None)
+        - min_rate (float): the minimum number of requests per second (default: 0.1)
+        - max_rate (float): the maximum number of requests per second (default: 50.0)
+        - additive_increase (float): increase of the rate after each successful request (default: 0.1)
+        - decrease_factor (float): factor applied to the rate after a rate limit error (default: 0.5)
+        - burst (float): the capacity of the token bucket. Uses max(1, initial_rate) if None. (default: None)
+        """
+        if initial_rate is None:
+            initial_rate = max_rate
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.capacity = burst if burst is not None else max(1.0, initial_rate)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """
+        Take a token from the bucket and return how long the caller has to wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now-self.last_refill)*self.rate)
+            self.last_refill = now
+            self.tokens -= 1
+            wait = 0.0
+            if self.tokens < 0:
+                wait = -self.tokens/self.rate
+            return max(wait, self.blocked_until-now)
+
+    def acquire(self):
+        """
+        Block until a request may be sent.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def async_acquire(self):
+        """
+        Wait asynchronously until a request may be sent.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def block(self, seconds):
+        """
+        Block all requests for the given number of seconds.
+        """
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic()+seconds)
+
+    def on_success(self, headers=None):
+        """
+        Update the limiter after a successful request.
+
+        Parameters:
+        - headers (Mapping): the headers of the response, used to read the remaining requests (optional)
+        """
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.additive_increase)
+        if headers is None:
+            return
+        remaining = headers.get('x-ratelimit-remaining-requests', headers.get('anthropic-ratelimit-requests-remaining'))
+        reset = headers.get('x-ratelimit-reset-requests', headers.get('anthropic-ratelimit-requests-reset'))
+        if remaining is not None and reset is not None:
+            try:
+                remaining = int(remaining)
+            except ValueError:
+                return
+            reset_seconds = _parse_duration(reset)
+            if remaining == 0 and reset_seconds is not None:
+                self._decrease()
+                self.block(reset_seconds)
+
+    def _decrease(self):
+        """
+        Decrease the rate after the rate limit of the provider was hit.
+        """
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate*self.decrease_factor)
+
+    def on_error(self, error, delay=None):
+        """
+        Update the limiter after a failed request.
+
+        Parameters:
+        - error (Exception): the error raised by the API client
+        - delay (float): the delay until the next request to the provider in seconds (optional)
+        """
+        if _get_status_code(error) == 429:
+            self._decrease()
+        if delay is not None:
+            self.block(delay)
+
+def get_rate_limiter(provider):
+    """
+    Get the rate limiter of a provider. The limiter is shared by all requests to the provider.
+
+    Parameters:
+    - provider (str): the provider name, i.e., 'openai', 'inncube', or 'antropic'
+    """
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(provider)
+        if limiter is None:
+            limiter = ProviderRateLimiter(**_DEFAULT_LIMITER_SETTINGS.get(provider, {}))
+            _LIMITERS[provider] = limiter
+    return limiter
+
+def set_rate_limiter(provider, limiter):
+    """
+    Replace the rate limiter of a provider, e.g., to use different initial or maximum rates.
+
+    Parameters:
+    - provider (str): the provider name
+    - limiter (ProviderRateLimiter): the rate limiter
+    """
+    with _LIMITERS_LOCK:
+        _LIMITERS[provider] = limiter
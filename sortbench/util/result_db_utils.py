@@ -0,0 +1,290 @@
+import json
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+# results paths with these suffixes are SQLite databases instead of results folders
+DB_SUFFIXES = ('.sqlite', '.sqlite3', '.db')
+
+# columns that identify a score, named like the columns of the scores of eval_utils.evaluate_results
+SCORE_KEY_COLUMNS = ['Benchmark', 'Mode', 'Version', 'Model', 'Type', 'Size', 'List Name']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS unsorted_lists (
+    config_name TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    list_name TEXT NOT NULL,
+    list_index INTEGER NOT NULL,
+    unsorted_list TEXT NOT NULL,
+    PRIMARY KEY (config_name, list_name)
+);
+CREATE INDEX IF NOT EXISTS unsorted_lists_benchmark ON unsorted_lists (benchmark, mode, version, type, size);
+CREATE TABLE IF NOT EXISTS responses (
+    config_name TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    list_name TEXT NOT NULL,
+    list_index INTEGER NOT NULL,
+    response TEXT,
+    usage TEXT,
+    metrics TEXT,
+    PRIMARY KEY (config_name, model, list_name)
+);
+CREATE INDEX IF NOT EXISTS responses_benchmark ON responses (benchmark, mode, version, type, size, model);
+CREATE INDEX IF NOT EXISTS responses_model ON responses (model, size);
+CREATE TABLE IF NOT EXISTS scores (
+    "Benchmark" TEXT NOT NULL,
+    "Mode" TEXT NOT NULL,
+    "Version" TEXT NOT NULL,
+    "Model" TEXT NOT NULL,
+    "Type" TEXT NOT NULL,
+    "Size" INTEGER NOT NULL,
+    "List Name" TEXT NOT NULL,
+    PRIMARY KEY ("Benchmark", "Mode", "Version", "Model", "Type", "Size", "List Name")
+);
+CREATE INDEX IF NOT EXISTS scores_model ON scores ("Model", "Size");
+"""
+
+# one connection per database and process
+_DBS = {}
+_DBS_LOCK = threading.Lock()
+
+def is_result_db(result_path):
+    """
+    Check if a results path is a SQLite database instead of a results folder.
+
+    Parameters:
+    - result_path (str): the results path
+    """
+    return str(result_path).endswith(DB_SUFFIXES)
+
+def parse_config_name(config_name):
+    """
+    Get the benchmark, mode, version, type, and size of a config from its name, e.g.,
+    sortbench_basic_v1.0_Int-0:1000_008.json.gz.
+
+    Returns:
+    - tuple: the benchmark, mode, version, type, and size of the config
+    """
+    parts = config_name.split('_')
+    return parts[0], parts[1], parts[2], parts[3], int(parts[4].split('.')[0])
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+class ResultDatabase:
+    """
+    SQLite store for the unsorted lists, the responses of the models, and the scores. Lists, responses, and scores
+    are stored per list with the benchmark, mode, version, type, size, and model in indexed columns, such that
+    subsets of the results can be queried without reading all results.
+    """
+
+    def __init__(self, db_file):
+        """
+        Parameters:
+        - db_file (str): path to the SQLite database, created if it does not exist
+        """
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        db_folder = os.path.dirname(os.path.abspath(db_file))
+        os.makedirs(db_folder, exist_ok=True)
+        # several processes may write to the database, writers wait for each other
+        self._connection = sqlite3.connect(db_file, timeout=60, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def fetch_configs(self, name='sortbench', mode='basic', version='v1.0'):
+        """
+        Get the names of the configs with results, see result_utils.fetch_configs_from_results.
+        """
+        with self._lock:
+            rows = self._connection.execute('SELECT DISTINCT config_name FROM unsorted_lists WHERE benchmark=? AND mode=? AND version=? ORDER BY config_name',
+                                            (name, mode, version)).fetchall()
+        return [row[0] for row in rows]
+
+    def load_results(self, name=None, mode=None, version=None, data_type=None, size=None, model=None, config_name=None):
+        """
+        Load results in the format of the results files. All filters are optional.
+
+        Parameters:
+        - name (str): name of the benchmark
+        - mode (str): mode of the benchmark
+        - version (str): version of the benchmark
+        - data_type (str): type of the lists, e.g., Int-0:1000
+        - size (int): size of the lists
+        - model (str): name of the model, only the lists with responses of the model are loaded
+        - config_name (str): name of the config
+
+        Returns:
+        - dict: config names mapped to the unsorted lists and the results of the models
+        """
+        conditions = []
+        params = []
+        for column, value in [('benchmark', name), ('mode', mode), ('version', version), ('type', data_type), ('size', size), ('config_name', config_name)]:
+            if value is not None:
+                conditions.append(f'{column}=?')
+                params.append(value)
+        where = ' AND '.join(conditions) if len(conditions) > 0 else '1'
+        model_condition = ' AND model=?' if model is not None else ''
+        model_params = [model] if model is not None else []
+        results = {}
+        with self._lock:
+            # the configs are ordered like the results files and the models in the order in which they were added
+            list_rows = self._connection.execute(f'SELECT config_name, list_name, unsorted_list FROM unsorted_lists WHERE {where} ORDER BY config_name, list_index', params).fetchall()
+            response_rows = self._connection.execute(f'SELECT config_name, model, list_name, response, usage, metrics, rowid FROM responses WHERE {where}{model_condition} ORDER BY config_name, list_index',
+                                                     params + model_params).fetchall()
+        for cur_config_name, list_name, unsorted_list in list_rows:
+            results.setdefault(cur_config_name, {'unsorted_lists': {}, 'results': []})['unsorted_lists'][list_name] = json.loads(unsorted_list)
+        model_results = {}
+        for cur_config_name, cur_model, list_name, response, usage, metrics, rowid in response_rows:
+            cur_results = model_results.setdefault(cur_config_name, {})
+            if cur_model not in cur_results:
+                cur_results[cur_model] = ({'model': cur_model, 'sorted_lists': {}}, rowid)
+            cur_result, first_rowid = cur_results[cur_model]
+            cur_results[cur_model] = (cur_result, min(first_rowid, rowid))
+            cur_result['sorted_lists'][list_name] = response
+            for key, value in [('usage', usage), ('metrics', metrics)]:
+                if value is not None:
+                    cur_result.setdefault(key, {})[list_name] = json.loads(value)
+        for cur_config_name, cur_results in model_results.items():
+            results[cur_config_name]['results'] = [cur_result for cur_result, _ in sorted(cur_results.values(), key=lambda item: item[1])]
+        if model is not None:
+            results = {cur_config_name: config_results for cur_config_name, config_results in results.items() if len(config_results['results']) > 0}
+        return results
+
+    def get_lists(self, config_name, model):
+        """
+        Get the names of the lists of a config with responses of a model.
+        """
+        with self._lock:
+            rows = self._connection.execute('SELECT list_name FROM responses WHERE config_name=? AND model=? ORDER BY list_index', (config_name, model)).fetchall()
+        return [row[0] for row in rows]
+
+    def get_models(self, config_name):
+        """
+        Get the models with responses for a config, in the order of load_results.
+        """
+        with self._lock:
+            rows = self._connection.execute('SELECT model FROM responses WHERE config_name=? GROUP BY model ORDER BY MIN(rowid)', (config_name,)).fetchall()
+        return [row[0] for row in rows]
+
+    def has_model(self, config_name, model):
+        """
+        Check if responses of a model are available for a config.
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT 1 FROM responses WHERE config_name=? AND model=? LIMIT 1', (config_name, model)).fetchone()
+        return row is not None
+
+    def write_results(self, results, overwrite=False, add_lists=False):
+        """
+        Write results in the format of the results files, see result_utils.write_results_to_disk.
+
+        Parameters:
+        - results (dict): config names mapped to the unsorted lists and the results of the models
+        - overwrite (bool): whether to remove all stored results of the configs first (default: False)
+        - add_lists (bool): whether to add the lists to the stored responses of the same model instead of replacing them (default: False)
+        """
+        with self._lock, self._connection:
+            for config_name, config_results in results.items():
+                config_columns = parse_config_name(config_name)
+                if overwrite:
+                    self._connection.execute('DELETE FROM responses WHERE config_name=?', (config_name,))
+                    self._connection.execute('DELETE FROM unsorted_lists WHERE config_name=?', (config_name,))
+                n_lists = self._connection.execute('SELECT COUNT(*) FROM unsorted_lists WHERE config_name=?', (config_name,)).fetchone()[0]
+                list_indexes = dict(self._connection.execute('SELECT list_name, list_index FROM unsorted_lists WHERE config_name=?', (config_name,)).fetchall())
+                for list_name, lst in config_results['unsorted_lists'].items():
+                    if list_name not in list_indexes:
+                        list_indexes[list_name] = n_lists
+                        n_lists += 1
+                    self._connection.execute('INSERT INTO unsorted_lists VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (config_name, list_name) DO UPDATE SET unsorted_list=excluded.unsorted_list',
+                                             (config_name, *config_columns, list_name, list_indexes[list_name], json.dumps(lst)))
+                for cur_result in config_results['results']:
+                    if not add_lists:
+                        self._connection.execute('DELETE FROM responses WHERE config_name=? AND model=? AND list_name NOT IN (SELECT value FROM json_each(?))',
+                                                 (config_name, cur_result['model'], json.dumps(list(cur_result['sorted_lists']))))
+                    rows = []
+                    for list_name, response in cur_result['sorted_lists'].items():
+                        usage = cur_result.get('usage', {}).get(list_name)
+                        metrics = cur_result.get('metrics', {}).get(list_name)
+                        rows.append((config_name, *config_columns, cur_result['model'], list_name, list_indexes.get(list_name, n_lists), response,
+                                     json.dumps(usage) if usage is not None else None, json.dumps(metrics) if metrics is not None else None))
+                    # an upsert keeps the position of the model in the results
+                    self._connection.executemany('INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (config_name, model, list_name) DO UPDATE SET '
+                                                 'list_index=excluded.list_index, response=excluded.response, usage=excluded.usage, metrics=excluded.metrics', rows)
+
+    def write_scores(self, df_scores):
+        """
+        Write scores as computed by eval_utils.evaluate_results. Scores of the same list and model are replaced,
+        columns that are not stored yet are added.
+
+        Parameters:
+        - df_scores (pd.DataFrame): the scores, one row per model and list
+        """
+        if len(df_scores) == 0:
+            return
+        with self._lock, self._connection:
+            stored_columns = [row[1] for row in self._connection.execute('PRAGMA table_info(scores)').fetchall()]
+            for column in df_scores.columns:
+                if column not in stored_columns:
+                    # flags are declared as BOOLEAN, such that queries return them as booleans again
+                    column_type = ' BOOLEAN' if df_scores[column].dtype == bool else ''
+                    self._connection.execute(f'ALTER TABLE scores ADD COLUMN {_quote(column)}{column_type}')
+            columns = list(df_scores.columns)
+            updates = ', '.join(f'{_quote(column)}=excluded.{_quote(column)}' for column in columns if column not in SCORE_KEY_COLUMNS)
+            statement = (f'INSERT INTO scores ({", ".join(_quote(column) for column in columns)}) VALUES ({", ".join("?" for _ in columns)}) '
+                         f'ON CONFLICT ({", ".join(_quote(column) for column in SCORE_KEY_COLUMNS)}) DO UPDATE SET {updates}')
+            # numpy values and missing values are converted to Python values and None
+            values = df_scores.astype(object).where(df_scores.notna(), None).itertuples(index=False, name=None)
+            self._connection.executemany(statement, [tuple(value.item() if hasattr(value, 'item') else value for value in row) for row in values])
+
+    def query(self, sql, params=()):
+        """
+        Run a SQL query, e.g., on the scores table.
+
+        Parameters:
+        - sql (str): the query
+        - params (tuple): the parameters of the query (optional)
+
+        Returns:
+        - pd.DataFrame: the result of the query, flags of the scores are returned as booleans
+        """
+        with self._lock:
+            df_query = pd.read_sql_query(sql, self._connection, params=params)
+            bool_columns = [row[1] for row in self._connection.execute('PRAGMA table_info(scores)').fetchall() if row[2] == 'BOOLEAN']
+        for column in df_query.columns:
+            if column in bool_columns and df_query[column].notna().all():
+                df_query[column] = df_query[column].astype(bool)
+        return df_query
+
+def get_result_db(db_file):
+    """
+    Get the database of a results path. The database is opened once per process and file.
+
+    Parameters:
+    - db_file (str): path to the SQLite database
+
+    Returns:
+    - ResultDatabase: the database
+    """
+    key = os.path.abspath(db_file)
+    with _DBS_LOCK:
+        db = _DBS.get(key)
+        if db is None:
+            db = ResultDatabase(db_file)
+            _DBS[key] = db
+    return db
@@ -0,0 +1,310 @@
+import gzip
+import json
+import os
+import threading
+import uuid
+
+import util.lock_utils as lock_utils
+
+# name of the index file in a results folder
+INDEX_FILE = '_index.json'
+
+# name of the lock file that serializes updates of the index by several processes
+INDEX_LOCK_FILE = '_index.lock'
+
+# name of the folder with the shards of the results, one shard per config and model
+SHARD_DIR = 'shards'
+
+_INDEX_VERSION = 2
+
+# one index per results folder and process
+_INDEXES = {}
+_INDEXES_LOCK = threading.Lock()
+
+def create_temporary_file(directory, prefix, suffix='.tmp'):
+    """
+    Create a new temporary file in a folder, e.g., to write a file that is renamed once it is complete. Unlike
+    tempfile.mkstemp, the file gets the usual mode of new files, i.e., 0o666 restricted by the umask.
+
+    Parameters:
+    - directory (str): path to the folder
+    - prefix (str): the prefix of the file name
+    - suffix (str): the suffix of the file name (default: '.tmp')
+
+    Returns:
+    - int: the file descriptor, opened for writing
+    - str: path to the file
+    """
+    tmp_file = os.path.join(directory, f'{prefix}{uuid.uuid4().hex}{suffix}')
+    return os.open(tmp_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666), tmp_file
+
+def config_files(result_path, config_name):
+    """
+    Get the files that store the results of a config, relative to the results folder: the config file of older
+    versions and the shards of the models.
+    """
+    files = []
+    if os.path.isfile(os.path.join(result_path, config_name)):
+        files.append(config_name)
+    config_shard_path = os.path.join(result_path, SHARD_DIR, config_name)
+    if os.path.isdir(config_shard_path):
+        files += sorted([os.path.join(SHARD_DIR, config_name, filename) for filename in os.listdir(config_shard_path) if filename.endswith('.json.gz')])
+    return files
+
+def _file_signature(file):
+    """
+    Get the modification time and size of a file, None if the file does not exist.
+    """
+    try:
+        stat = os.stat(file)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def models_of_results(config_results):
+    """
+    Get the models and the names of their lists from the results of a config.
+
+    Parameters:
+    - config_results (dict): the results of a config with the unsorted lists and the results of the models
+
+    Returns:
+    - dict: model names mapped to the names of the lists sorted by the model
+    """
+    models = {}
+    for cur_result in config_results.get('results', []):
+        models.setdefault(cur_result['model'], [])
+        for list_name in cur_result['sorted_lists']:
+            if list_name not in models[cur_result['model']]:
+                models[cur_result['model']].append(list_name)
+    return models
+
+def _results_entry(config_results):
+    """
+    Get the entry of a result file in the index: the models with the names of their lists, the names of the
+    unsorted lists, and the time at which a shard was written.
+    """
+    return {'models': models_of_results(config_results),
+            'lists': list(config_results.get('unsorted_lists', {})),
+            'written': config_results.get('written', 0)}
+
+class ResultIndex:
+    """
+    Persistent index of a results folder that maps configs to the models with results and the names of their
+    lists. For each result file, the index stores its modification time and size, its models with the names of
+    their lists, the names of its unsorted lists, and the time at which it was written. Lookups only stat the
+    files of a config and re-read a file only if it was changed by someone who did not update the index.
+    """
+
+    def __init__(self, result_path):
+        """
+        Parameters:
+        - result_path (str): path to the folder with the results
+        """
+        self.result_path = result_path
+        self._lock = threading.RLock()
+        self._configs = self._load()
+        self._save_failed = False
+
+    def _load(self):
+        """
+        Read the index from disk, an empty index if it is missing or broken.
+        """
+        try:
+            with open(os.path.join(self.result_path, INDEX_FILE), 'r', encoding="UTF-8") as f:
+                data = json.load(f)
+            if data.get('version') == _INDEX_VERSION:
+                return data['configs']
+        except (OSError, ValueError, KeyError):
+            # a missing or broken index is rebuilt on demand
+            pass
+        return {}
+
+    def _save(self, config_name, best_effort=False):
+        """
+        Write the entries of a config to disk, see _write. If best_effort is set, e.g., after files were only read,
+        errors are ignored and the entries are only kept in memory, such that results can be read from folders
+        that are not writable.
+        """
+        try:
+            self._write(config_name)
+        except OSError as e:
+            if not best_effort:
+                raise
+            if not self._save_failed:
+                print(f"Could not update the index of {self.result_path}, the index is only kept in memory: {e}")
+                self._save_failed = True
+
+    def _write(self, config_name):
+        """
+        Write the entries of a config to disk. Other processes may have updated the index in the meantime, so
+        the index on disk is read again under a lock and merged with the entries of the config: entries of files
+        that no longer exist are dropped and entries that match the current state of a file are preferred. The
+        index is written to a temporary file first, such that readers never see partial files.
+        """
+        if not os.path.isdir(self.result_path):
+            return
+        with lock_utils.file_lock(os.path.join(self.result_path, INDEX_LOCK_FILE)):
+            configs = self._load()
+            files = {}
+            disk_files = configs.get(config_name, {})
+            own_files = self._configs.get(config_name, {})
+            for file_name in set(disk_files) | set(own_files):
+                signature = _file_signature(os.path.join(self.result_path, file_name))
+                if signature is None:
+                    continue
+                entry = own_files.get(file_name)
+                if entry is None or (entry['signature'] != signature and disk_files.get(file_name, {}).get('signature') == signature):
+                    entry = disk_files[file_name]
+                files[file_name] = entry
+            if len(files) > 0:
+                configs[config_name] = files
+                self._configs[config_name] = files
+            else:
+                configs.pop(config_name, None)
+                self._configs.pop(config_name, None)
+            fd, tmp_file = create_temporary_file(self.result_path, '.index')
+            with os.fdopen(fd, 'w', encoding="UTF-8") as f:
+                f.write(json.dumps({'version': _INDEX_VERSION, 'configs': configs}))
+            os.replace(tmp_file, os.path.join(self.result_path, INDEX_FILE))
+
+    def _read_file(self, file_name):
+        """
+        Read the entry of a result file, None if the file cannot be read.
+        """
+        try:
+            with gzip.open(os.path.join(self.result_path, file_name), 'rt', encoding="UTF-8") as f:
+                return _results_entry(json.load(f))
+        except Exception as e:
+            print(f"Error while indexing results from {file_name}: {e}")
+            return None
+
+    def _refresh(self, config_name):
+        """
+        Bring the entries of a config up to date with the files on disk.
+
+        Returns:
+        - dict: file names mapped to their entries
+        """
+        files = self._configs.get(config_name, {})
+        changed = False
+        current_files = config_files(self.result_path, config_name)
+        for file_name in list(files.keys()):
+            if file_name not in current_files:
+                del files[file_name]
+                changed = True
+        for file_name in current_files:
+            signature = _file_signature(os.path.join(self.result_path, file_name))
+            entry = files.get(file_name)
+            if signature is None or (entry is not None and entry['signature'] == signature):
+                continue
+            entry = self._read_file(file_name)
+            if entry is None:
+                files.pop(file_name, None)
+            else:
+                files[file_name] = {'signature': signature, **entry}
+            changed = True
+        if len(files) > 0:
+            self._configs[config_name] = files
+        else:
+            changed = changed or config_name in self._configs
+            self._configs.pop(config_name, None)
+        if changed:
+            # lookups only read the results
+            self._save(config_name, best_effort=True)
+        return files
+
+    def get_models(self, config_name):
+        """
+        Get the models with results for a config.
+
+        Parameters:
+        - config_name (str): name of the config
+
+        Returns:
+        - dict: model names mapped to the names of the lists sorted by the model
+        """
+        with self._lock:
+            models = {}
+            for entry in self._refresh(config_name).values():
+                for model, list_names in entry['models'].items():
+                    models.setdefault(model, [])
+                    models[model] += [list_name for list_name in list_names if list_name not in models[model]]
+            return models
+
+    def get_files(self, config_name):
+        """
+        Get the files with results of a config and their entries, see ResultIndex.
+
+        Parameters:
+        - config_name (str): name of the config
+
+        Returns:
+        - dict: names of the files relative to the results folder mapped to dicts with the 'models' and the names
+          of their lists, the names of the unsorted 'lists', and the time at which the file was 'written'
+        """
+        with self._lock:
+            return {file_name: {key: entry[key] for key in ['models', 'lists', 'written']} for file_name, entry in self._refresh(config_name).items()}
+
+    def has_model(self, config_name, model):
+        """
+        Check if results of a model are available for a config.
+
+        Parameters:
+        - config_name (str): name of the config
+        - model (str): name of the model
+        """
+        return model in self.get_models(config_name)
+
+    def record(self, config_name, file_name, config_results):
+        """
+        Record the results that were just written to or read from a file, such that the file does not have to be
+        read again for the index.
+
+        Parameters:
+        - config_name (str): name of the config
+        - file_name (str): name of the file relative to the results folder
+        - config_results (dict): the results of the config that are stored in the file
+        """
+        self.record_files(config_name, {file_name: config_results})
+
+    def record_files(self, config_name, files, best_effort=False):
+        """
+        Record the results of several files of a config, see record. The index is saved once for all files.
+
+        Parameters:
+        - config_name (str): name of the config
+        - files (dict): names of the files relative to the results folder mapped to the results stored in them
+        - best_effort (bool): whether to only keep the index in memory if it cannot be saved, e.g., for files that were only read (default: False)
+        """
+        with self._lock:
+            changed = False
+            for file_name, config_results in files.items():
+                signature = _file_signature(os.path.join(self.result_path, file_name))
+                if signature is None:
+                    continue
+                entry = {'signature': signature, **_results_entry(config_results)}
+                if self._configs.setdefault(config_name, {}).get(file_name) == entry:
+                    continue
+                self._configs[config_name][file_name] = entry
+                changed = True
+            if changed:
+                self._save(config_name, best_effort=best_effort)
+
+def get_result_index(result_path):
+    """
+    Get the index of a results folder. The index is loaded once per process and folder.
+
+    Parameters:
+    - result_path (str): path to the folder with the results
+
+    Returns:
+    - ResultIndex: the index
+    """
+    key = os.path.abspath(result_path)
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = ResultIndex(result_path)
+            _INDEXES[key] = index
+    return index
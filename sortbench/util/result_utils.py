@@ -1,6 +1,14 @@
 import gzip
 import json
 import os
+import time
+
+import util.lock_utils as lock_utils
+import util.result_db_utils as result_db_utils
+import util.result_index_utils as result_index_utils
+
+# name of the folder with the shards of the results, one shard per config and model
+SHARD_DIR = result_index_utils.SHARD_DIR
 
 def load_data_local(file_path='benchmark_data', name='sortbench', mode='basic', version='v1.0'):
     """
@@ -36,8 +44,13 @@ def fetch_configs_from_results(file_path='benchmark_results', name='sortbench',
     mode (str): mode of the benchmark data (default: 'basic')
     version (str): version of the benchmark data (default: 'v1.0')
     """
-    # fetch all filenames from file_path and filter by name
+    if result_db_utils.is_result_db(file_path):
+        return result_db_utils.get_result_db(file_path).fetch_configs(name=name, mode=mode, version=version)
+    # fetch all filenames from file_path and filter by name, configs may be stored as file, as shards, or both
     filenames = os.listdir(file_path)
+    shard_path = os.path.join(file_path, SHARD_DIR)
+    if os.path.isdir(shard_path):
+        filenames = set(filenames) | set(os.listdir(shard_path))
     filenames = sorted([filename for filename in filenames if filename.startswith(f'{name}_{mode}_{version}_')])
     return filenames
 
@@ -47,21 +60,15 @@ def load_results_from_disk(file_path='benchmark_results', name='sortbench', mode
     Results are stored as gzipped JSON files.
 
     Parameters:
-    file_path (str): path to directory containing results files (default: 'benchmark_results')
+    file_path (str): path to directory containing results files or to a SQLite database (default: 'benchmark_results')
     """
+    if result_db_utils.is_result_db(file_path):
+        return result_db_utils.get_result_db(file_path).load_results(name=name, mode=mode, version=version)
     results = {}
-
-    # fetch all filenames from file_path and filter by name
-    filenames = os.listdir(file_path)
-    filenames = sorted([filename for filename in filenames if filename.startswith(f'{name}_{mode}_{version}_')])
-
-    for filename in filenames:
-        with gzip.open(os.path.join(file_path, filename), 'rt', encoding="UTF-8") as f:
-            try:
-                data = json.load(f)
-                results[filename] = data
-            except Exception as e:
-                print(f"Error while loading results from {filename}: {e}")
+    for config_name in fetch_configs_from_results(file_path=file_path, name=name, mode=mode, version=version):
+        config_results = _load_config_results(file_path, config_name)
+        if config_results is not None:
+            results[config_name] = config_results
     return results
 
 def load_single_result_from_disk(config_name, file_path='benchmark_results'):
@@ -71,41 +78,218 @@ def load_single_result_from_disk(config_name, file_path='benchmark_results'):
 
     Parameters:
     config_name (str): name of the config
-    file_path (str): path to directory containing results files (default: 'benchmark_results')
+    file_path (str): path to directory containing results files or to a SQLite database (default: 'benchmark_results')
     """
-    
-    filename = os.path.join(file_path, config_name)
-    
-    if not os.path.exists(filename):
+    if result_db_utils.is_result_db(file_path):
+        results = result_db_utils.get_result_db(file_path).load_results(config_name=config_name)
+        return results if len(results) > 0 else None
+    if not os.path.exists(os.path.join(file_path, config_name)) and len(_list_shards(file_path, config_name)) == 0:
         return None
-    
     results = {}
-    with gzip.open(filename, 'rt', encoding="UTF-8") as f:
-        try:
-            data = json.load(f)
-            results[config_name] = data
-        except Exception as e:
-            print(f"Error while loading results from {filename}: {e}")
+    config_results = _load_config_results(file_path, config_name)
+    if config_results is not None:
+        results[config_name] = config_results
     return results
 
+def _shard_file(config_name, model):
+    """
+    Get the name of the shard with the results of a model for a config, relative to the results folder.
+    """
+    return os.path.join(SHARD_DIR, config_name, f'{model.replace(os.sep, "_")}.json.gz')
+
+def _list_shards(file_path, config_name):
+    """
+    Get the names of all shards of a config, relative to the results folder.
+    """
+    return [file_name for file_name in result_index_utils.config_files(file_path, config_name) if file_name != config_name]
+
+def _read_gzip_json(file_path, file_name):
+    """
+    Read a gzipped JSON file, None if the file cannot be read.
+    """
+    try:
+        with gzip.open(os.path.join(file_path, file_name), 'rt', encoding="UTF-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        # the file was removed by another process in the meantime
+        return None
+    except Exception as e:
+        print(f"Error while loading results from {file_name}: {e}")
+        return None
+
+def _write_gzip_json(file, data):
+    """
+    Write a gzipped JSON file. The file is written to a temporary file in the same folder first and then renamed,
+    such that readers never see partial files and a crash never leaves a broken file.
+    """
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    fd, tmp_file = result_index_utils.create_temporary_file(os.path.dirname(file), '.')
+    os.close(fd)
+    try:
+        with gzip.open(tmp_file, 'wt', encoding="UTF-8") as f:
+            f.write(json.dumps(data))
+        os.replace(tmp_file, file)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+def _config_lock_file(file_path, config_name):
+    """
+    Get the lock file that serializes writes of the results of a config by several processes.
+    """
+    return os.path.join(file_path, SHARD_DIR, config_name, '.lock')
+
+def _load_config_results(file_path, config_name):
+    """
+    Load the results of a config from the config file and its shards and merge them into the format of the
+    config file. The results of a shard replace the results of the same model in the config file, the results
+    of new models are added in the order in which the shards were written.
+    """
+    # the files that were read are recorded in the index, reading must not fail if the folder is not writable
+    files = {}
+    config_results = None
+    if os.path.exists(os.path.join(file_path, config_name)):
+        config_results = _read_gzip_json(file_path, config_name)
+        if config_results is not None:
+            files[config_name] = config_results
+    shards = []
+    for shard_file in _list_shards(file_path, config_name):
+        shard = _read_gzip_json(file_path, shard_file)
+        if shard is not None:
+            files[shard_file] = shard
+            shards.append(shard)
+    result_index_utils.get_result_index(file_path).record_files(config_name, files, best_effort=True)
+    if len(shards) == 0:
+        return config_results
+    if config_results is None:
+        config_results = {'unsorted_lists': {}, 'results': []}
+    for shard in sorted(shards, key=lambda shard: shard.get('written', 0)):
+        # shards of sharded runs only contain some of the lists of the config
+        for list_name, lst in shard['unsorted_lists'].items():
+            config_results['unsorted_lists'].setdefault(list_name, lst)
+        for cur_result in shard['results']:
+            models = [result['model'] for result in config_results['results']]
+            if cur_result['model'] in models:
+                config_results['results'][models.index(cur_result['model'])] = cur_result
+            else:
+                config_results['results'].append(cur_result)
+    return config_results
+
+def iter_config_results(config_name, file_path='benchmark_results'):
+    """
+    Load the results of a config one model at a time. The models are merged from the config file and the shards in
+    the same way and in the same order as in load_single_result_from_disk. The models and lists of the files are
+    taken from the result index, such that each shard is read once and only the unsorted lists and the results of
+    one shard are in memory at once, in addition to the shards that are read up front for lists that no earlier
+    file has. The config file of older versions holds the results of all models and is read at once, so its models
+    are all in memory; merge_results.py converts such folders into shards.
+
+    Parameters:
+    config_name (str): name of the config
+    file_path (str): path to directory containing results files or to a SQLite database (default: 'benchmark_results')
+
+    Returns:
+    - dict: the unsorted lists of the config, None if no results are found
+    - generator: the results of the models, one dict with the model and its sorted lists per model
+    """
+    if result_db_utils.is_result_db(file_path):
+        db = result_db_utils.get_result_db(file_path)
+        models = db.get_models(config_name)
+        if len(models) == 0:
+            return None, None
+        first_results = db.load_results(config_name=config_name, model=models[0])[config_name]
+        return first_results['unsorted_lists'], _iter_db_results(db, config_name, models, first_results['results'][0])
+    files = result_index_utils.get_result_index(file_path).get_files(config_name)
+    if len(files) == 0:
+        return None, None
+    config_results = None
+    if files.pop(config_name, None) is not None:
+        config_results = _read_gzip_json(file_path, config_name)
+    if config_results is None:
+        config_results = {'unsorted_lists': {}, 'results': []}
+    shard_files = sorted(files, key=lambda shard_file: files[shard_file]['written'])
+    # the unsorted lists of the config file are kept, lists that are only in shards are taken from the first shard
+    unsorted_lists = config_results['unsorted_lists']
+    read_shards = {}
+    for shard_file in shard_files:
+        if all(list_name in unsorted_lists for list_name in files[shard_file]['lists']):
+            continue
+        shard = _read_gzip_json(file_path, shard_file)
+        if shard is not None:
+            for list_name, lst in shard['unsorted_lists'].items():
+                unsorted_lists.setdefault(list_name, lst)
+            read_shards[shard_file] = shard
+    # each model is taken from the config file or from the last shard with its results, at its first position
+    sources = {cur_result['model']: None for cur_result in config_results['results']}
+    for shard_file in shard_files:
+        for model in files[shard_file]['models']:
+            sources[model] = shard_file
+    # the results of the models are dropped from the config results once they are yielded
+    model_results = {cur_result['model']: cur_result for cur_result in config_results['results']}
+    config_results['results'] = None
+    return unsorted_lists, _iter_folder_results(file_path, sources, model_results, read_shards)
+
+def _iter_db_results(db, config_name, models, first_result):
+    """
+    Yield the results of the models of a config from a database, see iter_config_results.
+    """
+    yield first_result
+    for model in models[1:]:
+        yield db.load_results(config_name=config_name, model=model)[config_name]['results'][0]
+
+def _iter_folder_results(file_path, sources, model_results, read_shards):
+    """
+    Yield the results of the models of a config from the config file and the shards, see iter_config_results.
+    Models whose shard was removed or rewritten without them since it was indexed are skipped.
+    """
+    shard_file = None
+    shard_results = {}
+    for model, source_file in sources.items():
+        if source_file is None:
+            yield model_results.pop(model)
+            continue
+        model_results.pop(model, None)
+        if source_file != shard_file:
+            shard_file = source_file
+            shard = read_shards.pop(shard_file, None)
+            if shard is None:
+                shard = _read_gzip_json(file_path, shard_file)
+            shard_results = {} if shard is None else {cur_result['model']: cur_result for cur_result in shard['results']}
+        if model in shard_results:
+            yield shard_results.pop(model)
+
 def check_if_result_available_on_disk(results_path, config_name, model_name):
     """
-    Check if results for a specific config and model are already available.
+    Check if results for a specific config and model are already available. Uses the index of the results
+    folder, such that the result files are only read if they were changed without updating the index.
 
     Parameters:
-    results (dict): dict containing all results
+    results_path (str): path to directory containing results files
     config_name (str): name of the config
     model_name (str): name of the model
     """
-    #create results file path
-    results = load_single_result_from_disk(config_name, results_path)
-    if results is None:
-        return False
+    if result_db_utils.is_result_db(results_path):
+        return result_db_utils.get_result_db(results_path).has_model(config_name, model_name)
+    return result_index_utils.get_result_index(results_path).has_model(config_name, model_name)
+
+def check_if_lists_available_on_disk(results_path, config_name, model_name, list_names):
+    """
+    Check if results for specific lists of a config and model are already available, e.g., for the lists of a
+    shard. Uses the index of the results folder, see check_if_result_available_on_disk.
+
+    Parameters:
+    results_path (str): path to directory containing results files
+    config_name (str): name of the config
+    model_name (str): name of the model
+    list_names (list): names of the lists
+    """
+    if result_db_utils.is_result_db(results_path):
+        available_lists = result_db_utils.get_result_db(results_path).get_lists(config_name, model_name)
     else:
-        model_names = [result['model'] for result in results[config_name]['results']]
-        if model_name in model_names:
-            return True
-    return False
+        available_lists = result_index_utils.get_result_index(results_path).get_models(config_name).get(model_name)
+    if available_lists is None:
+        return False
+    return all(list_name in available_lists for list_name in list_names)
 
 
 
@@ -124,31 +308,63 @@ def check_if_result_available(results, config_name, model_name):
             return True
     return False
 
-def write_results_to_disk(results, file_path='benchmark_results', overwrite=False):
+def _add_lists(cur_result, new_result):
+    """
+    Add the lists of the result of a model to an existing result of the model. The responses, usage, and metrics
+    of lists in both results are taken from the new result.
+    """
+    merged_result = dict(new_result)
+    for key in ['sorted_lists', 'usage', 'metrics']:
+        if key in cur_result or key in new_result:
+            merged_result[key] = {**cur_result.get(key, {}), **new_result.get(key, {})}
+    return merged_result
+
+def write_results_to_disk(results, file_path='benchmark_results', overwrite=False, add_lists=False):
     """
-    Write results to disk. Results are stored as gzipped JSON files.
+    Write results to disk. The results of each model for a config are stored as a gzipped JSON shard in
+    <file_path>/shards/<config_name>/<model>.json.gz, such that adding a model only writes the results of that
+    model. Results in the format of a config file, i.e., {'unsorted_lists': ..., 'results': [...]}, are kept in
+    the shard. Config files <file_path>/<config_name> of older versions are still read and merged with the shards.
+    Shards are replaced atomically and writes of a config are serialized with an advisory file lock, such that
+    several processes can write to the same results folder.
 
     Parameters:
     results (dict): dict containing all results
-    file_path (str): path to directory to write results files to (default: 'benchmark_results')
-    overwrite (bool): whether to overwrite existing files or whether to append new results (default: False)
+    file_path (str): path to directory to write results files to, or to a SQLite database (default: 'benchmark_results')
+    overwrite (bool): whether to replace all existing results of the configs or whether to add the new results. Existing results of the same model are always replaced. (default: False)
+    add_lists (bool): whether to add the lists to existing results of the same model instead of replacing them, e.g., for the lists of a shard (default: False)
     """
+    if result_db_utils.is_result_db(file_path):
+        result_db_utils.get_result_db(file_path).write_results(results, overwrite=overwrite, add_lists=add_lists)
+        return
+    index = result_index_utils.get_result_index(file_path)
     for config_name, config_results in results.items():
-        file = os.path.join(file_path, config_name)
-        os.makedirs(os.path.dirname(file), exist_ok=True)
-        if not overwrite and os.path.exists(file):
-            # read existing results and update
-            with gzip.open(file, 'rt', encoding="UTF-8") as f:
-                try:
-                    existing_results = json.load(f)
-                except Exception as e:
-                    print(f"Error while loading results from {file}: {e}")
-                    print("Overwriting file.")
-                    existing_results = {}
-                existing_results['results'] = existing_results['results'] + config_results['results']
-                dict_to_write = existing_results
-        else:
-            dict_to_write = config_results
-
-        with gzip.open(file, 'wt', encoding="UTF-8") as f:
-            json.dump(dict_to_write, f)
+        # several processes may write results of the same config at once
+        with lock_utils.file_lock(_config_lock_file(file_path, config_name)):
+            if overwrite:
+                models = [cur_result['model'] for cur_result in config_results['results']]
+                file = os.path.join(file_path, config_name)
+                if os.path.exists(file):
+                    os.remove(file)
+                for shard_file in _list_shards(file_path, config_name):
+                    shard = _read_gzip_json(file_path, shard_file)
+                    if shard is None or any(cur_result['model'] not in models for cur_result in shard['results']):
+                        os.remove(os.path.join(file_path, shard_file))
+            unsorted_lists = config_results['unsorted_lists']
+            existing_results = {}
+            if add_lists and not overwrite:
+                existing_config_results = _load_config_results(file_path, config_name)
+                if existing_config_results is not None:
+                    unsorted_lists = {**existing_config_results['unsorted_lists'], **unsorted_lists}
+                    existing_results = {cur_result['model']: cur_result for cur_result in existing_config_results['results']}
+            written_files = {}
+            for cur_result in config_results['results']:
+                if cur_result['model'] in existing_results:
+                    cur_result = _add_lists(existing_results[cur_result['model']], cur_result)
+                shard_file = _shard_file(config_name, cur_result['model'])
+                shard = {'unsorted_lists': unsorted_lists,
+                         'results': [cur_result],
+                         'written': time.time()}
+                _write_gzip_json(os.path.join(file_path, shard_file), shard)
+                written_files[shard_file] = shard
+            index.record_files(config_name, written_files)
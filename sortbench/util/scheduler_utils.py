@@ -0,0 +1,179 @@
+import asyncio
+import time
+import traceback
+
+import util.client_utils as client_utils
+import util.inference_utils as inference_utils
+import util.journal_utils as journal_utils
+import util.result_utils as result_utils
+import util.shard_utils as shard_utils
+
+class WorkGroup:
+    """
+    All lists of a config that have to be sorted by a model. The results of a group are written to disk as
+    soon as all of its lists are sorted.
+    """
+
+    def __init__(self, model, config_name, lists, shard=None):
+        self.model = model
+        self.config_name = config_name
+        self.lists = lists
+        # the lists of sharded runs are added to the results of other shards
+        self.shard = shard
+        # list names mapped to the responses with their usage and metrics, in the format of the journal entries
+        self.entries = {}
+        self.failed = False
+
+    def is_complete(self):
+        return len(self.entries) == len(self.lists)
+
+    def to_results(self):
+        # keep the order of the lists in the config
+        cur_results = journal_utils.entries_to_results(self.model, self.entries, self.lists)
+        return {self.config_name: {'unsorted_lists': self.lists,
+                                   'results': [cur_results]}}
+
+def build_work_queue(configs, models, result_path, journal_path=None, record_metrics=False, shard=None):
+    """
+    Build the work items for all (model, config, list) combinations for which no results are available.
+    Lists that are already in the journal are not scheduled again.
+
+    Parameters:
+    - configs (dict): the configs of the benchmark, may contain configs of multiple modes
+    - models (list): the names of the models
+    - result_path (str): path to the folder with the results
+    - journal_path (str): path to the folder with the journals (optional)
+    - record_metrics (bool): whether to keep the timing metrics of journaled lists (default: False)
+    - shard (tuple): only the (model, config, list) combinations of this shard are scheduled, see shard_utils.parse_shard (optional)
+
+    Returns:
+    - groups (list): the work groups, one per (model, config)
+    - items (dict): providers mapped to their work items, each item is a tuple (group, list_name)
+    """
+    groups = []
+    items = {}
+    for model in models:
+        provider = inference_utils.get_provider(model)
+        for config_name, lists in configs.items():
+            lists = shard_utils.shard_lists(model, config_name, lists, shard)
+            if (shard is not None and len(lists) == 0) or shard_utils.check_if_shard_available_on_disk(result_path, config_name, model, lists, shard):
+                continue
+            group = WorkGroup(model, config_name, lists, shard=shard)
+            if journal_path is not None:
+                journaled_entries = journal_utils.read_journal_entries(journal_path, config_name, model)
+                group.entries = {list_name: entry for list_name, entry in journaled_entries.items() if list_name in lists}
+                if not record_metrics:
+                    for entry in group.entries.values():
+                        entry.pop('metrics', None)
+            groups.append(group)
+            for list_name in lists:
+                if list_name not in group.entries:
+                    items.setdefault(provider, []).append((group, list_name))
+    return groups, items
+
+def _write_group(group, result_path, journal_path):
+    """
+    Write the results of a finished group to disk and remove its journal. The scheduler calls this function in a
+    thread, such that the locks and writes do not stall the requests on the event loop.
+    """
+    if not shard_utils.check_if_shard_available_on_disk(result_path, group.config_name, group.model, group.lists, group.shard):
+        result_utils.write_results_to_disk(group.to_results(), file_path=result_path, overwrite=False, add_lists=group.shard is not None)
+    if journal_path is not None:
+        journal_utils.remove_journal(journal_path, group.config_name, group.model)
+
+async def _worker(queue, result_path, journal_path, verbose, record_metrics):
+    """
+    Take work items from the queue of a provider until the queue is empty.
+    """
+    while True:
+        try:
+            group, list_name = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        if group.failed:
+            continue
+        if verbose:
+            print(f"Sorting list {list_name} using model {group.model} for config {group.config_name}")
+        try:
+            sorted_list, metrics = await inference_utils.async_sort_list_with_model(group.lists[list_name], group.model, return_metrics=True)
+        except Exception as e:
+            # the other lists of the group are skipped, the results of the group are incomplete anyway
+            group.failed = True
+            print(f"Error while running inference for config {group.config_name} and model {group.model}: {e}")
+            print(traceback.format_exc())
+            continue
+        usage = metrics.pop('usage', None)
+        if not record_metrics:
+            metrics = None
+        if journal_path is not None:
+            # the entry is synced to disk in a thread, such that the other requests are not stalled
+            await asyncio.to_thread(journal_utils.append_to_journal, journal_path, group.config_name, group.model, list_name, sorted_list, metrics=metrics, usage=usage)
+        group.entries[list_name] = {'response': sorted_list, 'metrics': metrics, 'usage': usage}
+        if group.is_complete():
+            await asyncio.to_thread(_write_group, group, result_path, journal_path)
+            if verbose:
+                print(f"Finished config {group.config_name} for model {group.model}, results written to disk")
+
+async def run_scheduler_async(configs, models, result_path, journal_path=None, verbose=True, record_metrics=False, shard=None):
+    """
+    Run inference for all models and configs with one work queue per provider. Providers run in parallel,
+    each with as many workers as its concurrency limit (see inference_utils.set_max_concurrency). Workers take
+    the next (model, config, list) item as soon as they finish one, such that a slow provider does not stall
+    the others.
+
+    Parameters:
+    - configs (dict): the configs of the benchmark, may contain configs of multiple modes
+    - models (list): the names of the models
+    - result_path (str): path to the folder with the results
+    - journal_path (str): path to the folder with the journals (optional)
+    - verbose (bool): whether to print verbose output (default: True)
+    - record_metrics (bool): whether to store the timing metrics of each request in the results (default: False)
+    - shard (tuple): only the (model, config, list) combinations of this shard are run, see shard_utils.parse_shard (optional)
+
+    Returns:
+    - list: the work groups with their results
+    """
+    groups, items = build_work_queue(configs, models, result_path, journal_path, record_metrics=record_metrics, shard=shard)
+
+    # groups that are complete from the journal alone
+    for group in groups:
+        if group.is_complete():
+            await asyncio.to_thread(_write_group, group, result_path, journal_path)
+
+    workers = []
+    for provider, provider_items in items.items():
+        queue = asyncio.Queue()
+        for item in provider_items:
+            queue.put_nowait(item)
+        n_workers = min(inference_utils.get_max_concurrency(provider), len(provider_items))
+        if verbose:
+            print(f"Scheduling {len(provider_items)} requests for provider {provider} with {n_workers} workers")
+        workers += [asyncio.create_task(_worker(queue, result_path, journal_path, verbose, record_metrics)) for _ in range(n_workers)]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        await client_utils.async_close_clients()
+    return groups
+
+def run_scheduler(configs, models, result_path, journal_path=None, verbose=True, record_metrics=False, shard=None):
+    """
+    Run inference for all models and configs with the global scheduler, see run_scheduler_async.
+
+    Parameters:
+    - configs (dict): the configs of the benchmark, may contain configs of multiple modes
+    - models (list): the names of the models
+    - result_path (str): path to the folder with the results
+    - journal_path (str): path to the folder with the journals (optional)
+    - verbose (bool): whether to print verbose output (default: True)
+    - record_metrics (bool): whether to store the timing metrics of each request in the results (default: False)
+    - shard (tuple): only the (model, config, list) combinations of this shard are run, see shard_utils.parse_shard (optional)
+
+    Returns:
+    - list: the work groups with their results
+    """
+    start_time = time.perf_counter()
+    groups = asyncio.run(run_scheduler_async(configs, models, result_path, journal_path=journal_path, verbose=verbose, record_metrics=record_metrics, shard=shard))
+    if verbose:
+        n_complete = len([group for group in groups if group.is_complete()])
+        print(f"Finished {n_complete} of {len(groups)} configs in {time.perf_counter()-start_time:.1f}s")
+    return groups
@@ -0,0 +1,160 @@
+import collections
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import util.cache_utils as cache_utils
+import util.eval_utils as eval_utils
+import util.parquet_utils as parquet_utils
+import util.result_db_utils as result_db_utils
+import util.result_utils as result_utils
+import util.token_utils as token_utils
+
+# the number of rows that are scored and written at once
+CHUNK_SIZE = 10000
+
+def init_scoring(parse_cache=None, token_counter=None):
+    """
+    Set up the caches and the token counter of a process that scores configs.
+
+    Parameters:
+    - parse_cache (str): path to the SQLite database of the parse, token count, and score caches, None to disable the caches (default: None)
+    - token_counter (str): the token counter, see token_utils.get_token_counter (default: None)
+    """
+    if parse_cache is not None:
+        cache_utils.set_parse_cache(cache_utils.ParseCache(parse_cache))
+        cache_utils.set_token_count_cache(cache_utils.TokenCountCache(parse_cache))
+        cache_utils.set_score_cache(cache_utils.ScoreCache(parse_cache))
+    token_utils.set_thinking_token_counter(token_utils.get_token_counter(token_counter))
+
+def iter_config_rows(config, result_path):
+    """
+    Load and evaluate the results of a config one model at a time, see result_utils.iter_config_results.
+
+    Parameters:
+    - config (str): the name of the config
+    - result_path (str): path to the results folder or database
+
+    Returns:
+    - generator: the rows of the evaluated results, see eval_utils.iter_evaluated_rows
+    """
+    unsorted_lists, model_results = result_utils.iter_config_results(config, file_path=result_path)
+    if unsorted_lists is None:
+        return
+    yield from eval_utils.iter_evaluated_rows(config, unsorted_lists, model_results)
+
+def score_config(config, result_path):
+    """
+    Load and evaluate the results of a config.
+
+    Parameters:
+    - config (str): the name of the config
+    - result_path (str): path to the results folder or database
+
+    Returns:
+    - pd.DataFrame: the evaluated results, see eval_utils.evaluate_results, None if the config has no results
+    - pd.DataFrame: the stats of the repair strategies for this config, see eval_utils.get_repair_stats
+    """
+    eval_utils.reset_repair_stats()
+    rows = list(iter_config_rows(config, result_path))
+    return eval_utils.get_scores(rows) if len(rows) > 0 else None, eval_utils.get_repair_stats()
+
+def _collect_scores(future):
+    """
+    Wait for the scores of a config that is evaluated by a worker, see iter_scores.
+    """
+    df_scores, df_stats = future.result()
+    eval_utils.add_repair_stats(df_stats)
+    return [] if df_scores is None else [df_scores]
+
+def iter_scores(config_names, result_path, workers=1, parse_cache=None, token_counter=None, chunk_size=CHUNK_SIZE):
+    """
+    Evaluate the results of configs and yield the scores in chunks, in the order of the configs. In this process,
+    the results are loaded one model at a time and the scores are yielded in chunks of chunk_size rows, such that
+    the memory does not grow with the number of models and lists. In a pool of processes, each process evaluates
+    a config at once and the scores of each config are a chunk. The repair stats of all configs are collected in
+    this process, see eval_utils.get_repair_stats.
+
+    Parameters:
+    - config_names (list): the names of the configs
+    - result_path (str): path to the results folder or database
+    - workers (int): the number of processes, the configs are evaluated in this process if 1 (default: 1)
+    - parse_cache (str): path to the SQLite database of the parse, token count, and score caches, None to disable the caches (default: None)
+    - token_counter (str): the token counter, see token_utils.get_token_counter (default: None)
+    - chunk_size (int): the number of rows of a chunk if the configs are evaluated in this process (default: CHUNK_SIZE)
+
+    Returns:
+    - generator: the scores as DataFrames, see eval_utils.get_scores
+    """
+    eval_utils.reset_repair_stats()
+    if workers > 1:
+        # spawned processes do not inherit the open databases of this process
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_scoring, initargs=(parse_cache, token_counter)) as executor:
+            # only a few configs are scored ahead, such that the scores that wait to be written are bounded
+            futures = collections.deque()
+            for config in config_names:
+                futures.append(executor.submit(score_config, config, result_path))
+                if len(futures) >= 2*workers:
+                    yield from _collect_scores(futures.popleft())
+            while len(futures) > 0:
+                yield from _collect_scores(futures.popleft())
+        return
+    init_scoring(parse_cache, token_counter)
+    rows = itertools.chain.from_iterable(iter_config_rows(config, result_path) for config in config_names)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if len(chunk) == 0:
+            break
+        yield eval_utils.get_scores(chunk)
+
+def score_configs(config_names, result_path, workers=1, parse_cache=None, token_counter=None):
+    """
+    Evaluate the results of configs, either one after the other or in a pool of processes. The result is the same
+    in both cases.
+
+    Parameters:
+    - config_names (list): the names of the configs
+    - result_path (str): path to the results folder or database
+    - workers (int): the number of processes, the configs are evaluated in this process if 1 (default: 1)
+    - parse_cache (str): path to the SQLite database of the parse, token count, and score caches, None to disable the caches (default: None)
+    - token_counter (str): the token counter, see token_utils.get_token_counter (default: None)
+
+    Returns:
+    - pd.DataFrame: the evaluated results of all configs, in the order of the configs
+    - pd.DataFrame: the stats of the repair strategies summed over all configs
+    """
+    # the results are concatenated once instead of once per config
+    df_results = pd.concat(list(iter_scores(config_names, result_path, workers=workers, parse_cache=parse_cache, token_counter=token_counter)))
+    return df_results, eval_utils.get_repair_stats()
+
+def write_scores(score_chunks, csv_file=None, parquet_path=None, score_db=None):
+    """
+    Write scores chunk by chunk, such that only one chunk is in memory at once.
+
+    Parameters:
+    - score_chunks (iterable): the scores as DataFrames, see iter_scores
+    - csv_file (str): path to the CSV file, None to not write a CSV file (default: None)
+    - parquet_path (str): path to the Parquet dataset, see parquet_utils.ScoreWriter, None to not write a dataset (default: None)
+    - score_db (str): path to the SQLite database of the scores, None to not write to a database (default: None)
+
+    Returns:
+    - int: the number of rows that were written
+    """
+    n_rows = 0
+    parquet_writer = parquet_utils.ScoreWriter(parquet_path) if parquet_path is not None else None
+    try:
+        for df_scores in score_chunks:
+            if csv_file is not None:
+                df_scores.to_csv(csv_file, index=False, mode='w' if n_rows == 0 else 'a', header=n_rows == 0)
+            if parquet_writer is not None:
+                parquet_writer.write(df_scores)
+            if score_db is not None:
+                result_db_utils.get_result_db(score_db).write_scores(df_scores)
+            n_rows += len(df_scores)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+    return n_rows
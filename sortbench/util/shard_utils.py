@@ -0,0 +1,72 @@
+import hashlib
+
+import util.result_utils as result_utils
+
+def parse_shard(value):
+    """
+    Parse a shard given as i/N, e.g., 2/4 for the second of four shards.
+
+    Parameters:
+    - value (str): the shard as i/N with 1 <= i <= N
+
+    Returns:
+    - tuple: the index i and the number of shards N
+    """
+    try:
+        index, n_shards = [int(part) for part in value.split('/')]
+    except ValueError:
+        raise ValueError(f"Shard {value} is not of the form i/N")
+    if n_shards < 1 or index < 1 or index > n_shards:
+        raise ValueError(f"Shard {value} is not of the form i/N with 1 <= i <= N")
+    return index, n_shards
+
+def get_shard(model, config_name, list_name, n_shards):
+    """
+    Get the shard of a (model, config, list) combination. The shard only depends on the names, such that all
+    machines assign the same combinations to the same shards without coordination.
+
+    Parameters:
+    - model (str): name of the model
+    - config_name (str): name of the config
+    - list_name (str): name of the list
+    - n_shards (int): number of shards
+
+    Returns:
+    - int: the index of the shard, between 1 and n_shards
+    """
+    digest = hashlib.sha256(f'{model}\0{config_name}\0{list_name}'.encode('UTF-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % n_shards + 1
+
+def shard_lists(model, config_name, lists, shard):
+    """
+    Get the lists of a config that belong to a shard for a model.
+
+    Parameters:
+    - model (str): name of the model
+    - config_name (str): name of the config
+    - lists (dict): the lists of the config
+    - shard (tuple): the index and the number of shards, see parse_shard. All lists belong to the shard if None.
+
+    Returns:
+    - dict: the lists of the shard, in the order of the config
+    """
+    if shard is None:
+        return lists
+    index, n_shards = shard
+    return {list_name: lst for list_name, lst in lists.items() if get_shard(model, config_name, list_name, n_shards) == index}
+
+def check_if_shard_available_on_disk(result_path, config_name, model, lists, shard):
+    """
+    Check if the results of a model for the lists of a shard are already available. Without a shard, the results
+    of the model for the config are available if any results of the model are stored.
+
+    Parameters:
+    - result_path (str): path to the folder with the results
+    - config_name (str): name of the config
+    - model (str): name of the model
+    - lists (dict): the lists of the shard, see shard_lists
+    - shard (tuple): the index and the number of shards, see parse_shard (optional)
+    """
+    if shard is None:
+        return result_utils.check_if_result_available_on_disk(result_path, config_name, model)
+    return result_utils.check_if_lists_available_on_disk(result_path, config_name, model, list(lists))
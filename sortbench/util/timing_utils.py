@@ -0,0 +1,120 @@
+import time
+
+import pandas as pd
+
+class RequestTimer:
+    """
+    Measures the timing of a single request: wall latency, time to first token and number of output chunks
+    for streaming responses, and the output tokens per second.
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.first_token_time = None
+        self.n_chunks = 0
+
+    def on_chunk(self, content):
+        """
+        Register a chunk of a streaming response.
+
+        Parameters:
+        - content (str): the content of the chunk, chunks without content are not counted
+        """
+        if content is None or len(content) == 0:
+            return
+        if self.first_token_time is None:
+            self.first_token_time = time.perf_counter()
+        self.n_chunks += 1
+
+    def finish(self, output_tokens=None, streaming=False, attempts=1):
+        """
+        Stop the timer.
+
+        Parameters:
+        - output_tokens (int): the number of output tokens reported by the API, None if the API did not report
+          it. The tokens per second are only computed from reported tokens. (optional)
+        - streaming (bool): whether the response was streamed (default: False)
+        - attempts (int): the number of attempts that were needed (default: 1)
+
+        Returns:
+        - dict: the metrics of the request
+        """
+        latency = time.perf_counter()-self.start_time
+        time_to_first_token = None
+        n_chunks = None
+        if streaming:
+            n_chunks = self.n_chunks
+            if self.first_token_time is not None:
+                time_to_first_token = self.first_token_time-self.start_time
+        tokens_per_second = None
+        if output_tokens is not None and latency > 0:
+            tokens_per_second = output_tokens/latency
+        return {'latency': latency,
+                'time_to_first_token': time_to_first_token,
+                'output_chunks': n_chunks,
+                'output_tokens': output_tokens,
+                'tokens_per_second': tokens_per_second,
+                'attempts': attempts,
+                'cached': False}
+
+def cached_request_metrics(latency):
+    """
+    Metrics of a request that was served from the response cache.
+
+    Parameters:
+    - latency (float): the time it took to look up the response in seconds
+    """
+    return {'latency': latency,
+            'time_to_first_token': None,
+            'output_chunks': None,
+            'output_tokens': None,
+            'tokens_per_second': None,
+            'attempts': 0,
+            'cached': True}
+
+def collect_request_metrics(results):
+    """
+    Collect the metrics of all requests that were recorded in results into a DataFrame with one row per list.
+
+    Parameters:
+    - results (dict): the results, as loaded by result_utils.load_results_from_disk
+
+    Returns:
+    - pd.DataFrame: the metrics of the requests with the columns Model, Type, Size, List Name and the metrics
+    """
+    rows = []
+    for config_name, config_data in results.items():
+        data_type = config_name.split('_')[3]
+        list_length = int(config_name.split('_')[4].split('.')[0])
+        for cur_result in config_data['results']:
+            for list_name, metrics in cur_result.get('metrics', {}).items():
+                row = {'Model': cur_result['model'], 'Type': data_type, 'Size': list_length, 'List Name': list_name}
+                row.update(metrics)
+                rows.append(row)
+    return pd.DataFrame(rows)
+
+def summarize_request_metrics(df_metrics):
+    """
+    Summarize the latency and throughput of requests per model and list size. Requests served from the
+    response cache are excluded.
+
+    Parameters:
+    - df_metrics (pd.DataFrame): the metrics of the requests, see collect_request_metrics
+
+    Returns:
+    - pd.DataFrame: one row per model and size with the number of requests, mean, median and 95th percentile
+      of the latency, the mean time to first token and the mean tokens per second
+    """
+    if len(df_metrics) == 0:
+        return pd.DataFrame()
+    df_metrics = df_metrics[df_metrics['cached']==False]
+    grouped = df_metrics.groupby(['Model', 'Size'])
+    df_summary = grouped.agg(**{
+        'Requests': ('latency', 'count'),
+        'Mean Latency': ('latency', 'mean'),
+        'Median Latency': ('latency', 'median'),
+        'P95 Latency': ('latency', lambda x: x.quantile(0.95)),
+        'Mean Time To First Token': ('time_to_first_token', 'mean'),
+        'Mean Tokens Per Second': ('tokens_per_second', 'mean'),
+    })
+    return df_summary.reset_index()
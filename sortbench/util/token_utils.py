@@ -0,0 +1,112 @@
+import os
+import re
+
+# the tokenizer of the DeepSeek-R1 models that are hosted on Inncube
+DEEPSEEK_TOKENIZER = "deepseek-ai/DeepSeek-R1-Distill-Llama-70B"
+
+# words, numbers split into groups of up to three digits, and single punctuation characters, similar to the
+# pre-tokenization of the Llama 3 tokenizers
+_APPROXIMATE_TOKEN = re.compile(r"[^\W\d]+|\d{1,3}|[^\w\s]")
+
+# the token counter that is used for the thinking length, created when it is first needed
+_TOKEN_COUNTER = None
+
+class TokenizerCounter:
+    """
+    Counts tokens with a tokenizer from the Hugging Face hub. The tokenizer, and transformers, are only loaded when
+    the first texts are counted.
+    """
+
+    def __init__(self, tokenizer_name=DEEPSEEK_TOKENIZER, batch_size=64):
+        """
+        Parameters:
+        - tokenizer_name (str): the name of the tokenizer on the Hugging Face hub (default: DEEPSEEK_TOKENIZER)
+        - batch_size (int): the number of texts that are tokenized at once (default: 64)
+        """
+        self.name = tokenizer_name
+        self.batch_size = batch_size
+        self.tokenizer = None
+
+    def _load(self):
+        try:
+            from transformers import AutoTokenizer
+        except ImportError:
+            raise ImportError('Counting the tokens of <think> traces requires transformers, install it or use the approximate token counter (--token_counter=approximate)') from None
+        # get token from env
+        hf_access_token = os.getenv("HF_ACCESS_TOKEN")
+        self.tokenizer = AutoTokenizer.from_pretrained(self.name, token=hf_access_token)
+
+    def count(self, texts):
+        """
+        Count the tokens of texts, including the special tokens that are added by the tokenizer.
+
+        Parameters:
+        - texts (list): the texts
+
+        Returns:
+        - list: the number of tokens of each text
+        """
+        if len(texts) == 0:
+            return []
+        if self.tokenizer is None:
+            self._load()
+        counts = []
+        for start in range(0, len(texts), self.batch_size):
+            counts.extend(len(input_ids) for input_ids in self.tokenizer(texts[start:start+self.batch_size])['input_ids'])
+        return counts
+
+class ApproximateCounter:
+    """
+    Approximates the number of tokens by the words, groups of digits, and punctuation characters of the texts. This
+    needs no tokenizer and is fast, but the counts differ from those of a tokenizer.
+    """
+
+    def __init__(self):
+        self.name = 'approximate'
+
+    def count(self, texts):
+        """
+        Approximate the number of tokens of texts, including a token for the start of the text.
+
+        Parameters:
+        - texts (list): the texts
+
+        Returns:
+        - list: the approximate number of tokens of each text
+        """
+        return [1 + len(_APPROXIMATE_TOKEN.findall(text)) for text in texts]
+
+def get_token_counter(name=None):
+    """
+    Create a token counter.
+
+    Parameters:
+    - name (str): 'approximate' for the ApproximateCounter, otherwise the name of a tokenizer on the Hugging Face
+      hub (default: None, i.e., DEEPSEEK_TOKENIZER)
+
+    Returns:
+    - TokenizerCounter or ApproximateCounter: the token counter
+    """
+    if name == 'approximate':
+        return ApproximateCounter()
+    return TokenizerCounter(DEEPSEEK_TOKENIZER if name is None else name)
+
+def set_thinking_token_counter(counter):
+    """
+    Set the token counter that is used for the thinking length, see eval_utils.get_thinking_lengths.
+
+    Parameters:
+    - counter (TokenizerCounter or ApproximateCounter): the token counter
+    """
+    global _TOKEN_COUNTER
+    _TOKEN_COUNTER = counter
+
+def get_thinking_token_counter():
+    """
+    Get the token counter that is used for the thinking length. By default, the tokens are counted with the
+    DeepSeek-R1 tokenizer.
+    """
+    global _TOKEN_COUNTER
+    if _TOKEN_COUNTER is None:
+        _TOKEN_COUNTER = TokenizerCounter()
+    return _TOKEN_COUNTER
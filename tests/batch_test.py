@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+import unittest
+
+import sortbench.util.batch_utils as batch_utils
+import sortbench.util.result_utils as result_utils
+
+_CONFIGS = {
+    'sortbench_basic_v1.0_Int-0:1000_002.json.gz': {'list_1': [5, 3], 'list_2': [9, 1]},
+    'sortbench_basic_v1.0_English_002.json.gz': {'list_1': ['pear', 'apple'], 'list_2': ['b', 'a']},
+}
+
+def _openai_output(custom_id, content, status_code=200):
+    body = {'id': 'chatcmpl-1', 'object': 'chat.completion', 'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}]}
+    return {'id': 'batch_req_1', 'custom_id': custom_id, 'response': {'status_code': status_code, 'request_id': 'req_1', 'body': body}, 'error': None}
+
+def _antropic_output(custom_id, content, succeeded=True):
+    if not succeeded:
+        return {'custom_id': custom_id, 'result': {'type': 'errored', 'error': {'type': 'overloaded_error'}}}
+    message = {'id': 'msg_1', 'type': 'message', 'role': 'assistant', 'content': [{'type': 'text', 'text': content}]}
+    return {'custom_id': custom_id, 'result': {'type': 'succeeded', 'message': message}}
+
+class TestBatch(unittest.TestCase):
+
+    def test_requests(self):
+        # Test that one request per list is created with valid custom ids
+        requests, manifest = batch_utils.create_batch_requests(_CONFIGS, 'gpt-4o-mini')
+        self.assertEqual(len(requests), 4)
+        self.assertEqual(len(manifest['requests']), 4)
+        for request in requests:
+            self.assertLessEqual(len(request['custom_id']), 64)
+            self.assertEqual(request['url'], '/v1/chat/completions')
+            self.assertEqual(request['body']['model'], 'gpt-4o-mini')
+        requests, _ = batch_utils.create_batch_requests(_CONFIGS, 'claude-3-5-haiku-20241022')
+        self.assertEqual(requests[0]['params']['max_tokens'], 1000)
+
+    def test_import_openai(self):
+        # Test that fabricated OpenAI outputs are converted and written like regular results
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            batch_utils.write_batch_requests(_CONFIGS, 'gpt-4o-mini', tmp_dir, 'sortbench_basic_v1.0')
+            stem = batch_utils.find_batch_manifests(tmp_dir)[0]
+            with open(f'{stem}.manifest.json') as f:
+                manifest = json.load(f)
+            with open(f'{stem}.output.jsonl', 'w') as f:
+                # outputs are not in the order of the requests
+                for custom_id, request in reversed(list(manifest['requests'].items())):
+                    sorted_list = sorted(_CONFIGS[request['config_name']][request['list_name']])
+                    f.write(json.dumps(_openai_output(custom_id, f' {sorted_list} ')) + '\n')
+            outputs = batch_utils.read_batch_outputs(f'{stem}.output.jsonl')
+            results, incomplete_configs = batch_utils.build_results_from_batch_outputs(outputs, manifest, _CONFIGS)
+            self.assertEqual(incomplete_configs, [])
+            result_path = os.path.join(tmp_dir, 'results')
+            result_utils.write_results_to_disk(results, file_path=result_path)
+            loaded = result_utils.load_single_result_from_disk('sortbench_basic_v1.0_English_002.json.gz', result_path)
+            result = loaded['sortbench_basic_v1.0_English_002.json.gz']
+            self.assertEqual(result['unsorted_lists'], _CONFIGS['sortbench_basic_v1.0_English_002.json.gz'])
+            self.assertEqual(result['results'], [{'model': 'gpt-4o-mini', 'sorted_lists': {'list_1': "['apple', 'pear']", 'list_2': "['a', 'b']"}}])
+
+    def test_import_incomplete(self):
+        # Test that configs with failed requests are not imported
+        _, manifest = batch_utils.create_batch_requests(_CONFIGS, 'claude-3-5-haiku-20241022')
+        outputs = {}
+        for i, (custom_id, request) in enumerate(manifest['requests'].items()):
+            succeeded = request['config_name'].startswith('sortbench_basic_v1.0_Int') or i % 2 == 0
+            outputs.update([batch_utils.parse_batch_output_line(_antropic_output(custom_id, '[1, 2]', succeeded))])
+        results, incomplete_configs = batch_utils.build_results_from_batch_outputs(outputs, manifest, _CONFIGS)
+        self.assertEqual(list(results.keys()), ['sortbench_basic_v1.0_Int-0:1000_002.json.gz'])
+        self.assertEqual(incomplete_configs, ['sortbench_basic_v1.0_English_002.json.gz'])
+        self.assertEqual(results['sortbench_basic_v1.0_Int-0:1000_002.json.gz']['results'][0]['model'], 'claude-3-5-haiku-20241022')
@@ -0,0 +1,40 @@
+import asyncio
+import unittest
+
+import sortbench.util.client_utils as client_utils
+
+class TestClientRegistry(unittest.TestCase):
+
+    def tearDown(self):
+        client_utils.set_client_reuse(True)
+        client_utils.close_clients()
+
+    def test_client_is_reused(self):
+        # Test that the same client is returned for the same provider, url and key
+        client = client_utils.get_client('openai', 'key')
+        self.assertIs(client, client_utils.get_client('openai', 'key'))
+        self.assertIsNot(client, client_utils.get_client('openai', 'other_key'))
+        self.assertIsNot(client, client_utils.get_client('inncube', 'key', base_url='http://localhost:1234'))
+
+    def test_client_reuse_disabled(self):
+        # Test that a new client is created for every request if reuse is disabled
+        client_utils.set_client_reuse(False)
+        client = client_utils.get_client('antropic', 'key')
+        self.assertIsNot(client, client_utils.get_client('antropic', 'key'))
+        client_utils.release_client(client)
+
+    def test_async_clients_bound_to_event_loop(self):
+        # Test that async clients are not shared between event loops
+        async def fetch():
+            client = client_utils.get_client('openai', 'key', use_async=True)
+            same = client is client_utils.get_client('openai', 'key', use_async=True)
+            await client_utils.async_close_clients()
+            return client, same
+        client_1, same = asyncio.run(fetch())
+        client_2, _ = asyncio.run(fetch())
+        self.assertTrue(same)
+        self.assertIsNot(client_1, client_2)
+
+    def test_unsupported_provider(self):
+        with self.assertRaises(ValueError):
+            client_utils.get_client('unknown', 'key')
@@ -0,0 +1,61 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import util.result_index_utils as result_index_utils
+import util.result_utils as result_utils
+
+_CONFIG_NAME = 'sortbench_basic_v1.0_Int-0:1000_004.json.gz'
+_LISTS = {f'list_{i}': list(range(100, 0, -1)) for i in range(1, 21)}
+_N_WRITERS = 8
+_N_ROUNDS = 5
+
+def _results(model, writer):
+    return {_CONFIG_NAME: {'unsorted_lists': _LISTS,
+                           'results': [{'model': model, 'sorted_lists': {list_name: f'{writer}: {sorted(lst)}' for list_name, lst in _LISTS.items()}}]}}
+
+def _writer(result_path, writer, barrier):
+    # all writers start at once to maximize the overlap of the writes
+    barrier.wait()
+    for _ in range(_N_ROUNDS):
+        result_utils.write_results_to_disk(_results(f'model-{writer}', writer), file_path=result_path)
+        result_utils.write_results_to_disk(_results('shared-model', writer), file_path=result_path)
+
+class TestConcurrentWrites(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.result_path = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_writers_on_one_config(self):
+        # Test that several processes that write results of the same config neither lose nor corrupt results
+        context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+        barrier = context.Barrier(_N_WRITERS)
+        processes = [context.Process(target=_writer, args=(self.result_path, writer, barrier)) for writer in range(_N_WRITERS)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual([process.exitcode for process in processes], [0] * _N_WRITERS)
+
+        models = sorted([f'model-{writer}' for writer in range(_N_WRITERS)] + ['shared-model'])
+        # the index of each writer was merged into the index on disk
+        with mock.patch('gzip.open', side_effect=AssertionError('result file was read')):
+            index = result_index_utils.ResultIndex(self.result_path)
+            self.assertEqual(sorted(index.get_models(_CONFIG_NAME).keys()), models)
+
+        results = result_utils.load_single_result_from_disk(_CONFIG_NAME, self.result_path)[_CONFIG_NAME]
+        self.assertEqual(results['unsorted_lists'], _LISTS)
+        self.assertEqual(sorted(result['model'] for result in results['results']), models)
+        for result in results['results']:
+            # every result was written completely by a single writer
+            writer = result['model'].replace('model-', '') if result['model'] != 'shared-model' else result['sorted_lists']['list_1'].split(':')[0]
+            self.assertEqual(result, _results(result['model'], int(writer))[_CONFIG_NAME]['results'][0])
+        # no temporary files are left behind
+        for _, _, filenames in os.walk(self.result_path):
+            self.assertEqual([filename for filename in filenames if filename.endswith('.tmp')], [])
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the modules in sortbench import the util package directly (e.g., import util.result_utils), as the scripts are run from the sortbench folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sortbench'))
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import sortbench.util.inference_utils as inference_utils
+import sortbench.util.journal_utils as journal_utils
+import sortbench.util.result_utils as result_utils
+
+_CONFIG_NAME = 'sortbench_basic_v1.0_Int-0:1000_004.json.gz'
+_LISTS = {f'list_{i}': [4*i, 3, 2*i, 1] for i in range(1, 6)}
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.requested = []
+        self.crash_on = None
+        self.original_sort_list_with_model = inference_utils.sort_list_with_model
+        inference_utils.sort_list_with_model = self.sort_list
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.result_path = self.tmp_dir.name
+        self.journal_path = journal_utils.get_journal_path(self.result_path)
+
+    def tearDown(self):
+        inference_utils.sort_list_with_model = self.original_sort_list_with_model
+        self.tmp_dir.cleanup()
+
+    def sort_list(self, unsorted_list, model, return_metrics=False):
+        if unsorted_list == self.crash_on:
+            raise RuntimeError('crash')
+        self.requested.append(unsorted_list)
+        if return_metrics:
+            return str(sorted(unsorted_list)), {'latency': 0.0, 'usage': None}
+        return str(sorted(unsorted_list))
+
+    def test_resume_after_crash(self):
+        # Test that only the lists that are missing in the journal are requested after a crash
+        self.crash_on = _LISTS['list_4']
+        results = inference_utils.run_single_config_for_model(_CONFIG_NAME, _LISTS, model='gpt-4o', verbose=False, journal_path=self.journal_path)
+        self.assertEqual(results, {})
+        self.assertEqual(len(journal_utils.read_journal(self.journal_path, _CONFIG_NAME, 'gpt-4o')), 3)
+
+        self.crash_on = None
+        self.requested = []
+        results = inference_utils.run_single_config_for_model(_CONFIG_NAME, _LISTS, model='gpt-4o', verbose=False, journal_path=self.journal_path)
+        self.assertEqual(self.requested, [_LISTS['list_4'], _LISTS['list_5']])
+        sorted_lists = results[_CONFIG_NAME]['results'][0]['sorted_lists']
+        self.assertEqual(list(sorted_lists.keys()), list(_LISTS.keys()))
+        self.assertEqual(sorted_lists, {list_name: str(sorted(lst)) for list_name, lst in _LISTS.items()})
+
+    def test_async_journal_does_not_block_the_event_loop(self):
+        # Test that the asyncio execution mode appends to the journal outside of the event loop
+        original_append_to_journal = inference_utils.journal_utils.append_to_journal
+        original_async_sort_list_with_model = inference_utils.async_sort_list_with_model
+        appended_in_loop = []
+        def append_to_journal(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                appended_in_loop.append(True)
+            except RuntimeError:
+                appended_in_loop.append(False)
+            original_append_to_journal(*args, **kwargs)
+        async def async_sort_list(unsorted_list, model, return_metrics=False):
+            return self.sort_list(unsorted_list, model, return_metrics=return_metrics)
+        inference_utils.journal_utils.append_to_journal = append_to_journal
+        inference_utils.async_sort_list_with_model = async_sort_list
+        try:
+            results = inference_utils.run_single_config_for_model(_CONFIG_NAME, _LISTS, model='gpt-4o', verbose=False, use_async=True, journal_path=self.journal_path)
+        finally:
+            inference_utils.journal_utils.append_to_journal = original_append_to_journal
+            inference_utils.async_sort_list_with_model = original_async_sort_list_with_model
+        self.assertEqual(appended_in_loop, [False]*len(_LISTS))
+        self.assertEqual(len(journal_utils.read_journal(self.journal_path, _CONFIG_NAME, 'gpt-4o')), len(_LISTS))
+        self.assertEqual(list(results[_CONFIG_NAME]['results'][0]['sorted_lists']), list(_LISTS))
+
+    def test_compact_journals(self):
+        # Test that finished journals are written to the result files and removed
+        for list_name, lst in _LISTS.items():
+            journal_utils.append_to_journal(self.journal_path, _CONFIG_NAME, 'gpt-4o', list_name, str(sorted(lst)))
+        journal_utils.append_to_journal(self.journal_path, _CONFIG_NAME, 'o3-mini', 'list_1', '[]')
+        # a crash while writing leaves a truncated entry
+        with open(os.path.join(self.journal_path, f'{_CONFIG_NAME}_o3-mini.jsonl'), 'a') as f:
+            f.write('{"config_name": "sortbench')
+
+        n_compacted = journal_utils.compact_journals(self.result_path, {_CONFIG_NAME: _LISTS})
+        self.assertEqual(n_compacted, 1)
+        self.assertTrue(result_utils.check_if_result_available_on_disk(self.result_path, _CONFIG_NAME, 'gpt-4o'))
+        self.assertFalse(result_utils.check_if_result_available_on_disk(self.result_path, _CONFIG_NAME, 'o3-mini'))
+        self.assertEqual(journal_utils.read_journal(self.journal_path, _CONFIG_NAME, 'gpt-4o'), {})
+        self.assertEqual(journal_utils.read_journal(self.journal_path, _CONFIG_NAME, 'o3-mini'), {'list_1': '[]'})
@@ -0,0 +1,29 @@
+import unittest
+
+import util.literal_utils as literal_utils
+
+class TestLiteralParser(unittest.TestCase):
+
+    def test_same_as_eval(self):
+        # Test that list literals are parsed like eval, including corner cases of the Python syntax
+        texts = ['[1, 2, 3]', '[-1, +2.5, - 3, 1_000, 00, .5e-3, 1., 1e400]', "['a', \"b\", 'c' 'd', '\\x41\\n']",
+                 "['a',\n 'b' # comment\n]", '[]', '[1,]', '()', '(1)', '(1,)', '1, 2', '[[1, [2]], (3,)]',
+                 '[True, None, ...]', ' [1]', '[1]\n', '[1] # comment', '\n[1]', '[1]\n\n', "{'a': 1}", "[r'a\\d']",
+                 "['''a''']", '[0x10, 1j]', '[-(1)]', '[set()]']
+        for text in texts:
+            self.assertEqual(repr(literal_utils.parse_literal(text)), repr(eval(text)), text)
+
+    def test_errors(self):
+        # Test that invalid literals raise errors with the position where parsing stopped
+        errors = {'[1, 2, 3': 8, '[1, 2 3]': 6, "['a', 'b": 6, 'The list is [1, 2]': 0, '[1, 2]\nThe list is sorted.': 7,
+                  '[1, 2]]': 6, '[,]': 1, '': 0, '[1]\n  ': 3, '[01]': 1, '[1, …]': 4, '[1] + [2]': 4}
+        for text, position in errors.items():
+            with self.assertRaises(literal_utils.LiteralParseError, msg=text) as context:
+                literal_utils.parse_literal(text)
+            self.assertEqual(context.exception.position, position, text)
+
+    def test_no_code_is_run(self):
+        # Test that expressions in the responses are not evaluated
+        for text in ['[x for x in range(3)]', "[__import__('os').getcwd()]", '[1 if 1 else 2]', '[print(1)]']:
+            with self.assertRaises(literal_utils.LiteralParseError):
+                literal_utils.parse_literal(text)
@@ -0,0 +1,73 @@
+import itertools
+import random
+import unittest
+
+import util.metrics_utils as metrics_utils
+
+def _brute_force_inversions(lst):
+    return sum(1 for i, j in itertools.combinations(range(len(lst)), 2) if lst[i] > lst[j])
+
+def _brute_force_longest_sorted_subsequence(lst):
+    for length in range(len(lst), 0, -1):
+        for indices in itertools.combinations(range(len(lst)), length):
+            if all(lst[i] <= lst[j] for i, j in zip(indices, indices[1:])):
+                return length
+    return 0
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(42)
+        self.lists = [[], [1], [2, 1], [1, 1, 1], [3, 1, 2, 3, 1], [True, 0, 2.5, -1],
+                      ['b', 'a', 'B', 'a', ''], [float('nan'), 1.0, 0.5, float('nan'), -1.0],
+                      [float('inf'), 2, float('-inf'), 2]]
+        self.lists += [[rng.randint(0, 5) for _ in range(rng.randint(0, 10))] for _ in range(100)]
+        self.lists += [[rng.uniform(-1, 1) for _ in range(10)] for _ in range(20)]
+
+    def test_inversions(self):
+        # Test that the Fenwick tree counts the same inversions as comparing all pairs, also with ties and NaN
+        for lst in self.lists:
+            self.assertEqual(metrics_utils.count_inversions(lst), _brute_force_inversions(lst), lst)
+            self.assertEqual(metrics_utils.count_neighbor_inversions(lst), sum(1 for a, b in zip(lst, lst[1:]) if a > b), lst)
+
+    def test_longest_sorted_subsequence(self):
+        # Test that the longest non-decreasing subsequence is found with ties
+        for lst in self.lists:
+            if len(lst) <= 10 and not any(item != item for item in lst):
+                self.assertEqual(metrics_utils.longest_sorted_subsequence(lst), _brute_force_longest_sorted_subsequence(lst), lst)
+
+    def test_kendall_tau_and_footrule(self):
+        # Test the bounds of Kendall's tau and Spearman's footrule for sorted and reversed lists
+        self.assertEqual(metrics_utils.kendall_tau([1, 2, 3]), 1.0)
+        self.assertAlmostEqual(metrics_utils.kendall_tau([1, 2, 2, 3]), 5/30**0.5)
+        self.assertEqual(metrics_utils.kendall_tau([3, 2, 1]), -1.0)
+        self.assertIsNone(metrics_utils.kendall_tau([1, 1]))
+        self.assertIsNone(metrics_utils.kendall_tau([]))
+        self.assertEqual(metrics_utils.spearman_footrule([1, 2, 2, 3]), 0)
+        self.assertEqual(metrics_utils.spearman_footrule([4, 3, 2, 1]), 8)
+
+    def test_list_metrics(self):
+        # Test the metrics of a response with a missing and an additional item
+        metrics = metrics_utils.compute_list_metrics([3, 1, 2, 2], [1, 2, 4, 3])
+        self.assertEqual(metrics['Unordered Pairs Before'], 3)
+        self.assertEqual(metrics['Unordered Pairs After'], 1)
+        self.assertEqual(metrics['Unordered Neighbors Before'], 1)
+        self.assertEqual(metrics['Unordered Neighbors After'], 1)
+        self.assertEqual(metrics['Missing Items'], 1)
+        self.assertEqual(metrics['Additional Items'], 1)
+        self.assertEqual(metrics['Longest Sorted Subsequence'], 3)
+        self.assertAlmostEqual(metrics['Kendall Tau'], 4/6)
+        self.assertEqual(metrics['Spearman Footrule'], 2)
+
+    def test_batch_metrics(self):
+        # Test that the batched metrics are the same as the metrics of each list, also for lists that are ranked as objects or one by one
+        unsorted_lists = self.lists + [['a\0', 'a', 'b'], [2**60, 1, 2**60 + 1], [1.5, True], [], ['c', 'a', 'b']]
+        sorted_lists = [sorted(lst, reverse=True)[1:] + lst[:1] for lst in self.lists] + [['a', 'a\0'], [2**60 + 1, 2**60], [True, 1.0], [3], ['a', 'b'*5000]]
+        expected = [metrics_utils.compute_list_metrics(unsorted_list, sorted_list) for unsorted_list, sorted_list in zip(unsorted_lists, sorted_lists)]
+        self.assertEqual(metrics_utils.compute_batch_metrics(unsorted_lists, sorted_lists), expected)
+        inversions, neighbor_inversions = metrics_utils.count_inversions_batch(unsorted_lists)
+        self.assertEqual(inversions, [metrics['Unordered Pairs Before'] for metrics in expected])
+        self.assertEqual(neighbor_inversions, [metrics['Unordered Neighbors Before'] for metrics in expected])
+        # a long string, e.g., a response that was parsed as a single item, does not inflate a native string array
+        self.assertEqual(metrics_utils._to_array(['a']*100 + ['b'*5000]).dtype, object)
+        self.assertEqual(metrics_utils._to_array(['ab']*100 + ['c'*5]).dtype.kind, 'U')
@@ -0,0 +1,132 @@
+import inspect
+import os
+import tempfile
+import unittest
+
+import util.cache_utils as cache_utils
+import util.client_utils as client_utils
+import util.inference_utils as inference_utils
+import util.mock_server_utils as mock_server_utils
+import util.rate_limit_utils as rate_limit_utils
+
+_MODELS = ['gpt-4o-mini', 'llama3.1', 'claude-3-5-haiku-20241022']
+_CONFIG_NAME = 'sortbench_basic_v1.0_Int-0:1000_016.json.gz'
+# the longest list is streamed for the longest time, such that the responses arrive in another order than the lists
+_LISTS = {f'list_{i}': list(range(64//2**i, 0, -1)) for i in range(1, 5)}
+
+class TestMockServer(unittest.TestCase):
+
+    def setUp(self):
+        self.original_base_urls = {provider: inference_utils.get_base_url(provider) for provider in ['openai', 'inncube', 'antropic']}
+        self.original_env = {key: os.environ.get(key) for key in ['OPENAI_API_KEY', 'INNCUBE_API_KEY', 'ANTROPIC_API_KEY']}
+        # the requests to the mock server are not paced like the requests to the APIs
+        self.original_limiters = {provider: rate_limit_utils.get_rate_limiter(provider) for provider in ['openai', 'inncube', 'antropic']}
+        for provider in self.original_limiters:
+            rate_limit_utils.set_rate_limiter(provider, rate_limit_utils.ProviderRateLimiter(initial_rate=1000.0, max_rate=1000.0))
+        for key in self.original_env:
+            os.environ[key] = 'mock'
+        self.server = None
+
+    def tearDown(self):
+        for provider, base_url in self.original_base_urls.items():
+            inference_utils.set_base_url(provider, base_url)
+        for provider, limiter in self.original_limiters.items():
+            rate_limit_utils.set_rate_limiter(provider, limiter)
+        for key, value in self.original_env.items():
+            if value is None:
+                del os.environ[key]
+            else:
+                os.environ[key] = value
+        cache_utils.set_response_cache(None)
+        client_utils.close_clients()
+        if self.server is not None:
+            self.server.stop()
+
+    def start_server(self, **kwargs):
+        self.server = mock_server_utils.MockServer(mock_server_utils.MockServerSettings(seed=0, **kwargs))
+        url = self.server.start()
+        for provider in ['openai', 'inncube', 'antropic']:
+            inference_utils.set_base_url(provider, url)
+
+    def test_all_providers(self):
+        # Test that the chat completions API with and without streaming and the messages API are served
+        self.start_server()
+        for model in _MODELS:
+            sorted_list, metrics = inference_utils.sort_list_with_model([3, 1, 2], model, return_metrics=True)
+            self.assertEqual(sorted_list, '[1, 2, 3]')
+            self.assertIsNotNone(metrics['usage'])
+        self.assertEqual(self.server.n_requests, len(_MODELS))
+
+    def test_rate_limit_is_retried(self):
+        # Test that 429 responses are retried and the response is returned
+        self.start_server(rate_limit_rate=0.5, retry_after=0.01)
+        for _ in range(3):
+            self.assertEqual(inference_utils.sort_list_with_model([2, 1], 'gpt-4o-mini'), '[1, 2]')
+        self.assertGreater(self.server.n_requests, 3)
+
+    def test_truncation(self):
+        # Test that truncated responses are cut off
+        self.start_server(truncation_rate=1.0)
+        expected = str(list(range(1, 11)))
+        self.assertEqual(inference_utils.sort_list_with_model(list(range(10, 0, -1)), 'llama3.1'), expected[:len(expected)//2])
+
+    def test_cache_per_endpoint(self):
+        # Test that the responses of the mock server are not served from the cache for another endpoint
+        with tempfile.TemporaryDirectory() as cache_path:
+            cache_utils.set_response_cache(cache_utils.ResponseCache(cache_path))
+            self.start_server(truncation_rate=1.0)
+            for model in _MODELS:
+                inference_utils.sort_list_with_model([3, 1, 2], model)
+            self.assertEqual(self.server.n_requests, len(_MODELS))
+            for model in _MODELS:
+                inference_utils.sort_list_with_model([3, 1, 2], model)
+            self.assertEqual(self.server.n_requests, len(_MODELS))
+            mock_server, mock_url = self.server, inference_utils.get_base_url('openai')
+            self.start_server()
+            mock_server.stop()
+            self.assertNotEqual(inference_utils.get_base_url('openai'), mock_url)
+            for model in _MODELS:
+                self.assertEqual(inference_utils.sort_list_with_model([3, 1, 2], model), '[1, 2, 3]')
+            self.assertEqual(self.server.n_requests, len(_MODELS))
+
+    def test_async_same_results(self):
+        # Test that the asyncio execution mode returns the same results in the same order as the sequential mode
+        self.start_server(chunk_size=2, chunk_delay=0.002)
+        for model in _MODELS:
+            for record_metrics in [False, True]:
+                results = inference_utils.run_single_config_for_model(_CONFIG_NAME, _LISTS, model=model, verbose=False, record_metrics=record_metrics)
+                async_results = inference_utils.run_single_config_for_model(_CONFIG_NAME, _LISTS, model=model, verbose=False, use_async=True, record_metrics=record_metrics)
+                self.assertEqual(list(async_results), [_CONFIG_NAME])
+                self.assertEqual(list(async_results[_CONFIG_NAME]), ['unsorted_lists', 'results'])
+                result, async_result = results[_CONFIG_NAME]['results'][0], async_results[_CONFIG_NAME]['results'][0]
+                self.assertEqual(list(async_result), list(result))
+                for key in ['sorted_lists', 'usage'] + (['metrics'] if record_metrics else []):
+                    self.assertEqual(list(async_result[key]), list(_LISTS))
+                # the timing metrics differ between runs, but have the same fields
+                if record_metrics:
+                    self.assertEqual({list_name: list(metrics) for list_name, metrics in async_result.pop('metrics').items()},
+                                     {list_name: list(metrics) for list_name, metrics in result.pop('metrics').items()})
+                self.assertEqual(async_results, results)
+                self.assertEqual(async_result['sorted_lists'], {list_name: str(sorted(unsorted_list)) for list_name, unsorted_list in _LISTS.items()})
+        self.assertEqual(self.server.n_requests, 4*len(_MODELS)*len(_LISTS))
+
+    def test_async_rate_limit_is_retried(self):
+        # Test that 429 responses are retried by the asyncio execution mode for all providers
+        self.start_server(rate_limit_rate=0.5, retry_after=0.01)
+        for model in _MODELS:
+            results = inference_utils.run_single_config_for_model(_CONFIG_NAME, _LISTS, model=model, verbose=False, use_async=True)
+            self.assertEqual(results[_CONFIG_NAME]['results'][0]['sorted_lists'], {list_name: str(sorted(unsorted_list)) for list_name, unsorted_list in _LISTS.items()})
+        self.assertGreater(self.server.n_requests, len(_MODELS)*len(_LISTS))
+
+    def test_positional_parameters(self):
+        # Test that the parameters of older versions keep their positions, new parameters are appended
+        for function in [inference_utils.sort_list_with_antropic_api, inference_utils.async_sort_list_with_antropic_api]:
+            self.assertEqual(list(inspect.signature(function).parameters)[:5], ['unsorted_list', 'api_key', 'model', 'system_prompt', 'prompt'])
+        for function in [inference_utils.sort_list_with_openai_api, inference_utils.async_sort_list_with_openai_api]:
+            self.assertEqual(list(inspect.signature(function).parameters)[:8], ['unsorted_list', 'api_key', 'model', 'url', 'use_streaming', 'system_prompt', 'prompt', 'max_attempts'])
+
+    def test_reset_inncube_url(self):
+        # Test that resetting the URL of Inncube restores its endpoint
+        inference_utils.set_base_url('inncube', None)
+        self.assertEqual(inference_utils.get_base_url('inncube'), inference_utils._INNCUBE_URL)
+        self.assertRaises(ValueError, inference_utils.set_base_url, 'unknown', None)
@@ -0,0 +1,38 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import util.cache_utils as cache_utils
+import util.score_utils as score_utils
+import util.token_utils as token_utils
+
+_RESULT_PATH = os.path.join(os.path.dirname(__file__), '..', 'benchmark_results')
+_CONFIG_NAMES = ['sortbench_basic_v1.0_Int-0:1000_016.json.gz', 'sortbench_basic_v1.0_Float-0:1000_016.json.gz',
+                 'sortbench_basic_v1.0_English_016.json.gz']
+
+class TestParallelScoring(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # the results are read from a copy, such that the index of the results folder is not written to the repository
+        self.result_path = os.path.join(self.tmp_dir.name, 'results')
+        os.makedirs(self.result_path)
+        for config_name in _CONFIG_NAMES:
+            shutil.copy(os.path.join(_RESULT_PATH, config_name), self.result_path)
+
+    def tearDown(self):
+        cache_utils.set_parse_cache(None)
+        cache_utils.set_token_count_cache(None)
+        token_utils.set_thinking_token_counter(None)
+        self.tmp_dir.cleanup()
+
+    def test_same_as_serial(self):
+        # Test that scoring in a pool of processes gives the same scores and repair stats as scoring in this process
+        df_serial, df_serial_stats = score_utils.score_configs(_CONFIG_NAMES, self.result_path, token_counter='approximate')
+        df_parallel, df_parallel_stats = score_utils.score_configs(_CONFIG_NAMES, self.result_path, workers=2, token_counter='approximate')
+        self.assertEqual(df_parallel.to_csv(index=False), df_serial.to_csv(index=False))
+        self.assertEqual(list(df_serial['Type'].unique()), ['Int-0:1000', 'Float-0:1000', 'English'])
+        pd.testing.assert_frame_equal(df_parallel_stats.drop(columns='Time'), df_serial_stats.drop(columns='Time'))
@@ -0,0 +1,60 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import util.eval_utils as eval_utils
+import util.parquet_utils as parquet_utils
+import util.result_utils as result_utils
+
+_RESULT_PATH = os.path.join(os.path.dirname(__file__), '..', 'benchmark_results')
+_CONFIG_NAMES = ['sortbench_basic_v1.0_Int-0:1000_016.json.gz', 'sortbench_basic_v1.0_Float-0:1000_032.json.gz']
+
+@unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+class TestParquetScores(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # the results are read from a copy, such that the index of the results folder is not written to the repository
+        self.result_path = os.path.join(self.tmp_dir.name, 'results')
+        os.makedirs(self.result_path)
+        for config_name in _CONFIG_NAMES:
+            shutil.copy(os.path.join(_RESULT_PATH, config_name), self.result_path)
+        self.parquet_path = os.path.join(self.tmp_dir.name, 'scores')
+        self.df_scores = []
+        for config_name in _CONFIG_NAMES:
+            results = result_utils.load_single_result_from_disk(config_name, self.result_path)
+            results[config_name]['results'] = [result for result in results[config_name]['results'] if result['model'] != 'deepseekr1']
+            self.df_scores.append(eval_utils.evaluate_results(results))
+        self.df_scores = pd.concat(self.df_scores, ignore_index=True)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        # Test that the scores are partitioned by mode, model, and size and read with the types of the schema
+        parquet_utils.write_scores(self.df_scores, self.parquet_path)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.parquet_path, 'Mode=basic', 'Model=gpt-4o'))), ['Size=16', 'Size=32'])
+        df_read = parquet_utils.read_scores(self.parquet_path)
+        self.assertEqual(list(df_read.columns), [column for column, _ in parquet_utils.SCORE_COLUMNS])
+        key = ['Model', 'Size', 'List Name']
+        pd.testing.assert_frame_equal(df_read.sort_values(key, ignore_index=True).astype(self.df_scores.dtypes.to_dict()),
+                                      self.df_scores.sort_values(key, ignore_index=True))
+
+    def test_read_partitions(self):
+        # Test that only the requested columns and partitions are read, and that rewriting a mode replaces it
+        parquet_utils.write_scores(self.df_scores, self.parquet_path)
+        parquet_utils.write_scores(self.df_scores[self.df_scores['Model'] != 'gpt-4o'], self.parquet_path)
+        df_read = parquet_utils.read_scores(self.parquet_path, columns=['Model', 'Size', 'SortBench Score'], mode='basic', size=16)
+        self.assertEqual(list(df_read.columns), ['Model', 'Size', 'SortBench Score'])
+        self.assertEqual(set(df_read['Size']), {16})
+        self.assertNotIn('gpt-4o', set(df_read['Model']))
+        self.assertEqual(len(df_read), ((self.df_scores['Size'] == 16) & (self.df_scores['Model'] != 'gpt-4o')).sum())
+
+    def test_schema_mismatch(self):
+        # Test that scores with other columns than the schema are not written
+        with self.assertRaises(ValueError):
+            parquet_utils.write_scores(self.df_scores.drop(columns='Kendall Tau'), self.parquet_path)
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import util.cache_utils as cache_utils
+import util.eval_utils as eval_utils
+import util.result_utils as result_utils
+
+_RESULT_PATH = os.path.join(os.path.dirname(__file__), '..', 'benchmark_results')
+_CONFIG_NAME = 'sortbench_basic_v1.0_Int-0:1000_016.json.gz'
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # the results are read from a copy, such that the index of the results folder is not written to the repository
+        self.result_path = os.path.join(self.tmp_dir.name, 'results')
+        os.makedirs(self.result_path)
+        shutil.copy(os.path.join(_RESULT_PATH, _CONFIG_NAME), self.result_path)
+        self.cache_file = os.path.join(self.tmp_dir.name, 'parse_cache.sqlite')
+        self.results = result_utils.load_single_result_from_disk(_CONFIG_NAME, self.result_path)
+        self.results[_CONFIG_NAME]['results'] = [result for result in self.results[_CONFIG_NAME]['results'] if result['model'] != 'deepseekr1']
+        self.original_eval_str_list = eval_utils.eval_str_list
+        self.n_parsed = 0
+        self.parsed_responses = set()
+
+    def tearDown(self):
+        eval_utils.eval_str_list = self.original_eval_str_list
+        if cache_utils.get_parse_cache() is not None:
+            cache_utils.get_parse_cache().close()
+        cache_utils.set_parse_cache(None)
+        self.tmp_dir.cleanup()
+
+    def eval_str_list(self, *args, **kwargs):
+        self.n_parsed += 1
+        self.parsed_responses.add((args[0], args[1]))
+        return self.original_eval_str_list(*args, **kwargs)
+
+    def test_cache_key(self):
+        # Test that the key depends on the response, the type, and the parser version
+        key = cache_utils.get_parse_cache_key('[1, 2]', int, 1)
+        self.assertEqual(key, cache_utils.get_parse_cache_key('[1, 2]', int, 1))
+        self.assertNotEqual(key, cache_utils.get_parse_cache_key('[1, 2]', float, 1))
+        self.assertNotEqual(key, cache_utils.get_parse_cache_key('[1, 2]', int, 2))
+        self.assertNotEqual(key, cache_utils.get_parse_cache_key('[1, 3]', int, 1))
+
+    def test_rescoring_uses_cache(self):
+        # Test that cached responses are not parsed again, also by a new process, and the scores are unchanged
+        eval_utils.eval_str_list = self.eval_str_list
+        df_expected = eval_utils.evaluate_results(self.results)
+        n_parsed = self.n_parsed
+        # identical responses, e.g., of different models, are only parsed once
+        cache_utils.set_parse_cache(cache_utils.ParseCache(self.cache_file))
+        pd.testing.assert_frame_equal(eval_utils.evaluate_results(self.results), df_expected)
+        self.assertEqual(self.n_parsed, n_parsed + len(self.parsed_responses))
+        n_parsed = self.n_parsed
+        cache_utils.get_parse_cache().close()
+        cache_utils.set_parse_cache(cache_utils.ParseCache(self.cache_file))
+        pd.testing.assert_frame_equal(eval_utils.evaluate_results(self.results), df_expected)
+        self.assertEqual(self.n_parsed, n_parsed)
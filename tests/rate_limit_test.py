@@ -0,0 +1,95 @@
+import contextlib
+import io
+import unittest
+
+import anthropic
+import httpx
+import openai
+
+import sortbench.util.rate_limit_utils as rate_limit_utils
+import util.inference_utils as inference_utils
+
+def _status_error(error_class, status_code, headers=None):
+    request = httpx.Request('POST', 'http://localhost/v1/chat/completions')
+    response = httpx.Response(status_code, headers=headers, request=request)
+    return error_class('error', response=response, body=None)
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_retryable_errors(self):
+        # Test that rate limits, server errors and connection errors are retried
+        self.assertTrue(rate_limit_utils.is_retryable_error(_status_error(openai.RateLimitError, 429)))
+        self.assertTrue(rate_limit_utils.is_retryable_error(_status_error(openai.InternalServerError, 503)))
+        self.assertTrue(rate_limit_utils.is_retryable_error(_status_error(anthropic.InternalServerError, 529)))
+        self.assertTrue(rate_limit_utils.is_retryable_error(openai.APIConnectionError(request=httpx.Request('POST', 'http://localhost'))))
+
+    def test_fatal_errors(self):
+        # Test that errors that will happen again are not retried
+        self.assertFalse(rate_limit_utils.is_retryable_error(_status_error(openai.AuthenticationError, 401)))
+        self.assertFalse(rate_limit_utils.is_retryable_error(_status_error(anthropic.BadRequestError, 400)))
+        self.assertFalse(rate_limit_utils.is_retryable_error(ValueError('invalid')))
+
+    def test_retry_after(self):
+        # Test parsing of the Retry-After headers
+        self.assertEqual(rate_limit_utils.get_retry_after(_status_error(openai.RateLimitError, 429, {'retry-after': '2'})), 2.0)
+        self.assertEqual(rate_limit_utils.get_retry_after(_status_error(openai.RateLimitError, 429, {'retry-after-ms': '1500'})), 1.5)
+        self.assertIsNone(rate_limit_utils.get_retry_after(_status_error(openai.RateLimitError, 429)))
+        self.assertIsNone(rate_limit_utils.get_retry_after(ValueError('invalid')))
+
+    def test_parse_duration(self):
+        self.assertAlmostEqual(rate_limit_utils._parse_duration('6m0s'), 360.0)
+        self.assertAlmostEqual(rate_limit_utils._parse_duration('1.5s'), 1.5)
+        self.assertAlmostEqual(rate_limit_utils._parse_duration('20ms'), 0.02)
+
+    def test_backoff_delay(self):
+        # Test that the backoff uses the delay of the API and is bounded otherwise
+        for attempt in range(1, 10):
+            delay = rate_limit_utils.backoff_delay(attempt, base_delay=1.0, max_delay=8.0)
+            self.assertTrue(0 <= delay <= min(8.0, 2**(attempt-1)))
+        delay = rate_limit_utils.backoff_delay(1, retry_after=2.0, base_delay=1.0)
+        self.assertTrue(2.0 <= delay <= 2.25)
+
+    def test_aimd(self):
+        # Test that the rate decreases after rate limit errors and increases after successful requests
+        limiter = rate_limit_utils.ProviderRateLimiter(initial_rate=4.0, min_rate=1.0, max_rate=4.2, additive_increase=0.1)
+        limiter.on_error(_status_error(openai.RateLimitError, 429))
+        self.assertEqual(limiter.rate, 2.0)
+        limiter.on_error(_status_error(openai.RateLimitError, 429))
+        limiter.on_error(_status_error(openai.RateLimitError, 429))
+        self.assertEqual(limiter.rate, 1.0)
+        for _ in range(50):
+            limiter.on_success()
+        self.assertEqual(limiter.rate, 4.2)
+
+    def test_starts_at_max_rate(self):
+        # Test that requests are not throttled before the provider signals a rate limit
+        limiter = rate_limit_utils.ProviderRateLimiter(max_rate=20.0)
+        self.assertEqual(limiter.rate, 20.0)
+        for _ in range(20):
+            self.assertEqual(limiter._reserve(), 0.0)
+        for provider in ['openai', 'inncube', 'antropic']:
+            limiter = rate_limit_utils.ProviderRateLimiter(**rate_limit_utils._DEFAULT_LIMITER_SETTINGS[provider])
+            self.assertEqual(limiter.rate, limiter.max_rate)
+
+    def test_block_from_headers(self):
+        # Test that exhausted rate limits block the limiter until the reset
+        limiter = rate_limit_utils.ProviderRateLimiter(initial_rate=10.0)
+        self.assertEqual(limiter._reserve(), 0.0)
+        limiter.on_success({'x-ratelimit-remaining-requests': '0', 'x-ratelimit-reset-requests': '2s'})
+        self.assertGreater(limiter._reserve(), 1.5)
+        self.assertLess(limiter.rate, 10.0)
+
+    def test_last_attempt_does_not_block(self):
+        # Test that only errors that are retried block the limiter, rate limit errors in the last attempt only decrease the rate
+        error = _status_error(openai.RateLimitError, 429, {'retry-after': '2'})
+        limiter = inference_utils.rate_limit_utils.ProviderRateLimiter(initial_rate=4.0, max_rate=4.0)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertRaises(RuntimeError, inference_utils._retry_delay_after_error, error, 3, 3, limiter, [2, 1])
+        self.assertNotIn('Waiting', output.getvalue())
+        self.assertEqual(limiter.rate, 2.0)
+        self.assertEqual(limiter._reserve(), 0.0)
+        with contextlib.redirect_stdout(output):
+            inference_utils._retry_delay_after_error(error, 1, 3, limiter, [2, 1])
+        self.assertIn('Waiting', output.getvalue())
+        self.assertGreater(limiter._reserve(), 1.5)
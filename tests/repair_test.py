@@ -0,0 +1,49 @@
+import glob
+import os
+import unittest
+
+import util.eval_utils as eval_utils
+import util.literal_utils as literal_utils
+
+_KNOWN_ERRORS = os.path.join(os.path.dirname(__file__), '..', 'known_parsing_errors')
+
+class TestRepairStrategies(unittest.TestCase):
+
+    def setUp(self):
+        eval_utils.reset_repair_stats()
+        self.responses = ['[1, 2, 3', '[1, 2, ...', '[1, 2, ...] x', "['a', 'b', 'c]", '[a, b, c]', '[1,\n2]', 'The list is [1, 2] and [3]',
+                          '1. a\n2. b', '```\na\nb\n```', 'The sorted list is:\na,\nb', 'x\na, b, c, d, e, f',
+                          'Sorted:\n\\[\n1, 2\n\\]', 'Sorted:\n[1, 2]', 'Sorted:\n[1, 2, 3']
+        for file_name in sorted(glob.glob(os.path.join(_KNOWN_ERRORS, '*.txt'))):
+            with open(file_name, 'r') as f:
+                self.responses.append(f.read())
+
+    def test_preconditions(self):
+        # Test that strategies whose precondition does not hold cannot repair a response that could not be parsed
+        for response in self.responses:
+            try:
+                literal_utils.parse_literal(response)
+                continue
+            except literal_utils.LiteralParseError:
+                pass
+            features = eval_utils.get_repair_features(response)
+            for strategy in eval_utils.REPAIR_STRATEGIES:
+                if strategy.brackets != features['has_brackets'] or strategy.applies(features):
+                    continue
+                try:
+                    sorted_list = strategy.repair(response)
+                except IndexError:
+                    sorted_list = None
+                self.assertIsNone(sorted_list, f'{strategy.name}: {response[:100]}')
+
+    def test_repair_stats(self):
+        # Test that the first applicable strategy is used and tries and hits are counted
+        self.assertEqual(eval_utils.repair_str_list('[1, 2, 3'), ([1, 2], 'Missing closing bracket'))
+        self.assertEqual(eval_utils.repair_str_list('1. a\n2. b'), (['a', 'b'], 'Numbered, line-wise list'))
+        self.assertEqual(eval_utils.repair_str_list('no list'), (None, None))
+        df_stats = eval_utils.get_repair_stats().set_index('Strategy')
+        self.assertEqual(df_stats.loc['missing_closing_bracket', 'Hits'], 1)
+        self.assertEqual(df_stats.loc['numbered_list_matcher', 'Tries'], 1)
+        # strategies for lists in brackets are not tried for responses without brackets
+        self.assertEqual(df_stats.loc['drop_and_fix_quotes', 'Tries'], 0)
+        self.assertEqual(df_stats['Hits'].sum(), 2)
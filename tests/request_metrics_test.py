@@ -0,0 +1,81 @@
+import tempfile
+import time
+import unittest
+
+import util.inference_utils as inference_utils
+import util.journal_utils as journal_utils
+import util.timing_utils as timing_utils
+
+_CONFIG_NAME = 'sortbench_basic_v1.0_Int-0:1000_004.json.gz'
+_LISTS = {f'list_{i}': [4*i, 3, 2*i, 1] for i in range(1, 4)}
+
+class TestRequestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.original_sort_list_with_model = inference_utils.sort_list_with_model
+        inference_utils.sort_list_with_model = self.sort_list
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.journal_path = journal_utils.get_journal_path(self.tmp_dir.name)
+
+    def tearDown(self):
+        inference_utils.sort_list_with_model = self.original_sort_list_with_model
+        self.tmp_dir.cleanup()
+
+    def sort_list(self, unsorted_list, model, return_metrics=False):
+        timer = timing_utils.RequestTimer()
+        for element in sorted(unsorted_list):
+            timer.on_chunk(str(element))
+        sorted_list = str(sorted(unsorted_list))
+        if return_metrics:
+            return sorted_list, timer.finish(streaming=True)
+        return sorted_list
+
+    def test_streaming_timer(self):
+        # Test that the time to first token and the chunks are measured, empty chunks are ignored
+        timer = timing_utils.RequestTimer()
+        timer.on_chunk(None)
+        time.sleep(0.02)
+        timer.on_chunk('[1,')
+        timer.on_chunk('')
+        timer.on_chunk(' 2]')
+        metrics = timer.finish(streaming=True)
+        self.assertEqual(metrics['output_chunks'], 2)
+        self.assertGreaterEqual(metrics['time_to_first_token'], 0.02)
+        self.assertLessEqual(metrics['time_to_first_token'], metrics['latency'])
+        # chunks are not tokens, the tokens per second are only known if the API reports the tokens
+        self.assertIsNone(metrics['output_tokens'])
+        self.assertIsNone(metrics['tokens_per_second'])
+        metrics = timer.finish(output_tokens=3, streaming=True)
+        self.assertEqual(metrics['output_tokens'], 3)
+        self.assertAlmostEqual(metrics['tokens_per_second'], 3/metrics['latency'])
+
+    def test_metrics_are_optional(self):
+        # Test that the results only contain metrics if they are recorded
+        results = inference_utils.run_single_config_for_model(_CONFIG_NAME, _LISTS, model='gpt-4o', verbose=False)
+        self.assertNotIn('metrics', results[_CONFIG_NAME]['results'][0])
+
+        results = inference_utils.run_single_config_for_model(_CONFIG_NAME, _LISTS, model='gpt-4o', verbose=False, record_metrics=True)
+        cur_results = results[_CONFIG_NAME]['results'][0]
+        self.assertEqual(list(cur_results['metrics'].keys()), list(_LISTS.keys()))
+        self.assertEqual(cur_results['metrics']['list_1']['output_chunks'], 4)
+
+    def test_metrics_survive_journal(self):
+        # Test that the metrics of journaled lists are kept when resuming
+        metrics = timing_utils.RequestTimer().finish(output_tokens=5)
+        journal_utils.append_to_journal(self.journal_path, _CONFIG_NAME, 'gpt-4o', 'list_1', '[1, 3, 4, 4]', metrics=metrics)
+        results = inference_utils.run_single_config_for_model(_CONFIG_NAME, _LISTS, model='gpt-4o', verbose=False, journal_path=self.journal_path, record_metrics=True)
+        cur_results = results[_CONFIG_NAME]['results'][0]
+        self.assertEqual(cur_results['metrics']['list_1'], metrics)
+        self.assertEqual(len(cur_results['metrics']), len(_LISTS))
+
+    def test_summary(self):
+        # Test that the summary has one row per model and size and ignores cached responses
+        results = inference_utils.run_single_config_for_model(_CONFIG_NAME, _LISTS, model='gpt-4o', verbose=False, record_metrics=True)
+        results[_CONFIG_NAME]['results'][0]['metrics']['list_3'] = timing_utils.cached_request_metrics(0.0)
+        df_metrics = timing_utils.collect_request_metrics(results)
+        self.assertEqual(len(df_metrics), 3)
+        df_summary = timing_utils.summarize_request_metrics(df_metrics)
+        self.assertEqual(len(df_summary), 1)
+        self.assertEqual(df_summary['Model'][0], 'gpt-4o')
+        self.assertEqual(df_summary['Size'][0], 4)
+        self.assertEqual(df_summary['Requests'][0], 2)
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import time
+import unittest
+
+# imported like the scripts do, such that the cache is set in the module used by inference_utils
+import util.cache_utils as cache_utils
+import util.inference_utils as inference_utils
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        cache_utils.set_response_cache(None)
+        self.tmp_dir.cleanup()
+
+    def test_cache_key(self):
+        # Test that the key depends on model, prompts and parameters
+        key = cache_utils.get_cache_key('gpt-4o', 'system', 'prompt', {'temperature': 1})
+        self.assertEqual(key, cache_utils.get_cache_key('gpt-4o', 'system', 'prompt', {'temperature': 1}))
+        self.assertNotEqual(key, cache_utils.get_cache_key('gpt-4o-mini', 'system', 'prompt', {'temperature': 1}))
+        self.assertNotEqual(key, cache_utils.get_cache_key('gpt-4o', 'system', 'other prompt', {'temperature': 1}))
+        self.assertNotEqual(key, cache_utils.get_cache_key('gpt-4o', 'system', 'prompt', {'temperature': 0}))
+        self.assertNotEqual(key, cache_utils.get_cache_key('gpt-4o', 'system', 'prompt', {'temperature': 1}, url='http://127.0.0.1:8000'))
+
+    def test_put_and_get(self):
+        # Test that responses are persisted on disk
+        cache = cache_utils.ResponseCache(self.tmp_dir.name)
+        key = cache_utils.get_cache_key('gpt-4o', 'system', 'prompt')
+        self.assertIsNone(cache.get(key))
+        cache.put(key, '[1, 2, 3]')
+        self.assertEqual(cache.get(key), '[1, 2, 3]')
+        self.assertEqual(cache_utils.ResponseCache(self.tmp_dir.name).get(key), '[1, 2, 3]')
+
+    def test_eviction(self):
+        # Test that the least recently used responses are evicted if the cache is full
+        cache = cache_utils.ResponseCache(self.tmp_dir.name, max_size_bytes=1000)
+        keys = [cache_utils.get_cache_key('gpt-4o', 'system', f'prompt {i}') for i in range(20)]
+        for i, key in enumerate(keys):
+            cache.put(key, 'x'*100)
+            os.utime(cache._file(key), (i, i))
+        self.assertLessEqual(cache.size_bytes(), 1000)
+        reloaded = cache_utils.ResponseCache(self.tmp_dir.name, max_size_bytes=1000)
+        self.assertIsNone(reloaded.get(keys[0]))
+        self.assertEqual(reloaded.get(keys[-1]), 'x'*100)
+
+    def test_memory_is_bounded(self):
+        # Test that only the most recently used responses are kept in memory and the others are read from disk
+        cache = cache_utils.ResponseCache(self.tmp_dir.name, max_memory_entries=3)
+        keys = [cache_utils.get_cache_key('gpt-4o', 'system', f'prompt {i}') for i in range(10)]
+        for i, key in enumerate(keys):
+            cache.put(key, f'[{i}]')
+        self.assertEqual(list(cache._memory), keys[-3:])
+        self.assertEqual(cache.get(keys[0]), '[0]')
+        self.assertEqual(list(cache._memory), keys[-2:] + keys[:1])
+        for i, key in enumerate(keys):
+            self.assertEqual(cache.get(key), f'[{i}]')
+            self.assertLessEqual(len(cache._memory), 3)
+
+    def test_cached_request(self):
+        # Test that cached requests are served without calling the API
+        cache = cache_utils.ResponseCache(self.tmp_dir.name)
+        cache_utils.set_response_cache(cache)
+        unsorted_list = [3, 1, 2]
+        prompt = f"Sort the following list: {unsorted_list}"
+        cache.put(cache_utils.get_cache_key('gpt-4o', inference_utils._DEFAULT_SYSTEM_PROMPT, prompt, {}, url='http://127.0.0.1:1'), '[1, 2, 3]')
+        start_time = time.perf_counter()
+        sorted_list = inference_utils.sort_list_with_openai_api(unsorted_list, 'invalid', 'gpt-4o', url='http://127.0.0.1:1')
+        self.assertEqual(sorted_list, '[1, 2, 3]')
+        self.assertLess(time.perf_counter()-start_time, 0.1)
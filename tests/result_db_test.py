@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import util.result_db_utils as result_db_utils
+import util.result_utils as result_utils
+
+_RESULT_PATH = os.path.join(os.path.dirname(__file__), '..', 'benchmark_results')
+_CONFIG_NAME = 'sortbench_basic_v1.0_Int-0:1000_008.json.gz'
+
+class TestResultDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # the results are read from a copy, such that the index of the results folder is not written to the repository
+        self.result_path = os.path.join(self.tmp_dir.name, 'results')
+        os.makedirs(self.result_path)
+        shutil.copy(os.path.join(_RESULT_PATH, _CONFIG_NAME), self.result_path)
+        self.db_file = os.path.join(self.tmp_dir.name, 'results.sqlite')
+        self.results = result_utils.load_single_result_from_disk(_CONFIG_NAME, self.result_path)
+
+    def tearDown(self):
+        result_db_utils.get_result_db(self.db_file).close()
+        result_db_utils._DBS.pop(os.path.abspath(self.db_file), None)
+        self.tmp_dir.cleanup()
+
+    def test_import_results(self):
+        # Test that results imported from the gzipped files are loaded unchanged through result_utils
+        result_utils.write_results_to_disk(self.results, file_path=self.db_file)
+        self.assertEqual(result_utils.fetch_configs_from_results(self.db_file), [_CONFIG_NAME])
+        loaded = result_utils.load_single_result_from_disk(_CONFIG_NAME, self.db_file)
+        self.assertEqual(loaded, self.results)
+        self.assertEqual([result['model'] for result in loaded[_CONFIG_NAME]['results']], [result['model'] for result in self.results[_CONFIG_NAME]['results']])
+        self.assertEqual(result_utils.load_results_from_disk(self.db_file), self.results)
+        self.assertIsNone(result_utils.load_single_result_from_disk('sortbench_basic_v1.0_Int-0:1000_002.json.gz', self.db_file))
+
+        model = self.results[_CONFIG_NAME]['results'][0]['model']
+        self.assertTrue(result_utils.check_if_result_available_on_disk(self.db_file, _CONFIG_NAME, model))
+        self.assertFalse(result_utils.check_if_result_available_on_disk(self.db_file, _CONFIG_NAME, 'mock-model'))
+        db = result_db_utils.get_result_db(self.db_file)
+        self.assertEqual(db.load_results(size=8, model=model)[_CONFIG_NAME]['results'], [self.results[_CONFIG_NAME]['results'][0]])
+        self.assertEqual(db.load_results(size=16, model=model), {})
+
+    def test_replace_and_add_lists(self):
+        # Test that the results of a model are replaced unless lists are added, e.g., by shards
+        lists = {'list_1': [2, 1], 'list_2': [3, 1, 2]}
+        config_name = 'sortbench_basic_v1.0_Int-0:1000_002.json.gz'
+        def results(sorted_lists):
+            return {config_name: {'unsorted_lists': lists, 'results': [{'model': 'gpt-4o', 'sorted_lists': sorted_lists}]}}
+        result_utils.write_results_to_disk(results({'list_1': '[1, 2]', 'list_2': '[1, 2, 3]'}), file_path=self.db_file)
+        result_utils.write_results_to_disk(results({'list_2': '[1, 2]'}), file_path=self.db_file)
+        self.assertEqual(result_utils.load_single_result_from_disk(config_name, self.db_file), results({'list_2': '[1, 2]'}))
+        result_utils.write_results_to_disk(results({'list_1': '[1, 2]'}), file_path=self.db_file, add_lists=True)
+        self.assertTrue(result_utils.check_if_lists_available_on_disk(self.db_file, config_name, 'gpt-4o', ['list_1', 'list_2']))
+
+    def test_scores(self):
+        # Test that scores are replaced per list and model and queries return the columns of the scores
+        df_scores = pd.DataFrame([{'Benchmark': 'sortbench', 'Mode': 'basic', 'Version': 'v1.0', 'Model': 'gpt-4o', 'Type': 'Int-0:1000', 'Size': size,
+                                   'List Name': 'list_1', 'ErrorType': None, 'Parsed': True, 'SortBench Score': 0.5} for size in [2, 4]])
+        db = result_db_utils.get_result_db(self.db_file)
+        db.write_scores(df_scores)
+        df_scores['SortBench Score'] = 1.0
+        db.write_scores(df_scores)
+        df_query = db.query('SELECT * FROM scores WHERE Size=?', (4,))
+        pd.testing.assert_frame_equal(df_query, df_scores[df_scores['Size']==4].reset_index(drop=True))
@@ -0,0 +1,81 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import util.result_index_utils as result_index_utils
+import util.result_utils as result_utils
+
+_CONFIG_NAME = 'sortbench_basic_v1.0_Int-0:1000_004.json.gz'
+_LISTS = {'list_1': [4, 3, 2, 1], 'list_2': [1, 3, 2, 4]}
+
+def _results(model):
+    return {_CONFIG_NAME: {'unsorted_lists': _LISTS,
+                           'results': [{'model': model, 'sorted_lists': {list_name: str(sorted(lst)) for list_name, lst in _LISTS.items()}}]}}
+
+class TestResultIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.result_path = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_lookup_does_not_read_results(self):
+        # Test that availability checks after a write only use the index
+        result_utils.write_results_to_disk(_results('gpt-4o'), file_path=self.result_path)
+        result_utils.write_results_to_disk(_results('o3-mini'), file_path=self.result_path)
+        with mock.patch('gzip.open', side_effect=AssertionError('result file was read')):
+            self.assertTrue(result_utils.check_if_result_available_on_disk(self.result_path, _CONFIG_NAME, 'gpt-4o'))
+            self.assertTrue(result_utils.check_if_result_available_on_disk(self.result_path, _CONFIG_NAME, 'o3-mini'))
+            self.assertFalse(result_utils.check_if_result_available_on_disk(self.result_path, _CONFIG_NAME, 'gpt-4o-mini'))
+            # the index is persisted for other processes
+            index = result_index_utils.ResultIndex(self.result_path)
+            self.assertEqual(index.get_models(_CONFIG_NAME), {'gpt-4o': ['list_1', 'list_2'], 'o3-mini': ['list_1', 'list_2']})
+
+    def test_external_changes(self):
+        # Test that files that were changed or removed without updating the index are detected
+        result_utils.write_results_to_disk(_results('gpt-4o'), file_path=self.result_path)
+        self.assertTrue(result_utils.check_if_result_available_on_disk(self.result_path, _CONFIG_NAME, 'gpt-4o'))
+        file = os.path.join(self.result_path, result_utils._shard_file(_CONFIG_NAME, 'gpt-4o'))
+        with gzip.open(file, 'wt', encoding="UTF-8") as f:
+            json.dump(_results('llama3.1')[_CONFIG_NAME], f)
+        # make sure that the signature changes even on file systems with coarse timestamps
+        os.utime(file, ns=(0, 0))
+        self.assertTrue(result_utils.check_if_result_available_on_disk(self.result_path, _CONFIG_NAME, 'llama3.1'))
+        self.assertFalse(result_utils.check_if_result_available_on_disk(self.result_path, _CONFIG_NAME, 'gpt-4o'))
+        os.remove(file)
+        self.assertFalse(result_utils.check_if_result_available_on_disk(self.result_path, _CONFIG_NAME, 'llama3.1'))
+
+    def test_missing_folder(self):
+        # Test that a missing results folder has no results
+        self.assertFalse(result_utils.check_if_result_available_on_disk(os.path.join(self.result_path, 'missing'), _CONFIG_NAME, 'gpt-4o'))
+
+    def test_read_only_folder(self):
+        # Test that results can be read and looked up if the index cannot be written
+        result_utils.write_results_to_disk(_results('gpt-4o'), file_path=self.result_path)
+        os.remove(os.path.join(self.result_path, result_index_utils.INDEX_FILE))
+        result_index_utils._INDEXES.pop(os.path.abspath(self.result_path))
+        with mock.patch.object(result_index_utils.lock_utils, 'file_lock', side_effect=PermissionError(13, 'Permission denied')):
+            self.assertEqual(result_utils.load_single_result_from_disk(_CONFIG_NAME, self.result_path), _results('gpt-4o'))
+            self.assertTrue(result_utils.check_if_result_available_on_disk(self.result_path, _CONFIG_NAME, 'gpt-4o'))
+            self.assertFalse(result_utils.check_if_result_available_on_disk(self.result_path, _CONFIG_NAME, 'llama3.1'))
+            # the index is kept in memory, but written results must be recorded
+            shard_file = result_utils._shard_file(_CONFIG_NAME, 'gpt-4o')
+            os.utime(os.path.join(self.result_path, shard_file), ns=(0, 0))
+            index = result_index_utils.get_result_index(self.result_path)
+            self.assertRaises(PermissionError, index.record, _CONFIG_NAME, shard_file, _results('gpt-4o')[_CONFIG_NAME])
+        self.assertFalse(os.path.exists(os.path.join(self.result_path, result_index_utils.INDEX_FILE)))
+
+    def test_file_mode(self):
+        # Test that the result files and the index get the mode of new files and not that of temporary files
+        umask = os.umask(0o027)
+        try:
+            result_utils.write_results_to_disk(_results('gpt-4o'), file_path=self.result_path)
+        finally:
+            os.umask(umask)
+        for file_name in [result_utils._shard_file(_CONFIG_NAME, 'gpt-4o'), result_index_utils.INDEX_FILE]:
+            self.assertEqual(os.stat(os.path.join(self.result_path, file_name)).st_mode & 0o777, 0o640)
@@ -0,0 +1,64 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import util.result_utils as result_utils
+
+_RESULT_PATH = os.path.join(os.path.dirname(__file__), '..', 'benchmark_results')
+_CONFIG_NAME = 'sortbench_basic_v1.0_Int-0:1000_008.json.gz'
+
+def _new_result(config_results, model):
+    return {'model': model, 'sorted_lists': {list_name: str(sorted(lst)) for list_name, lst in config_results['unsorted_lists'].items()}}
+
+class TestResultShards(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.result_path = self.tmp_dir.name
+        shutil.copy(os.path.join(_RESULT_PATH, _CONFIG_NAME), self.result_path)
+        with gzip.open(os.path.join(_RESULT_PATH, _CONFIG_NAME), 'rt', encoding="UTF-8") as f:
+            self.config_results = json.load(f)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_adding_a_model_does_not_rewrite_the_config(self):
+        # Test that a new model is written to its own shard and merged with the existing results on load
+        file = os.path.join(self.result_path, _CONFIG_NAME)
+        with open(file, 'rb') as f:
+            config_bytes = f.read()
+        new_result = _new_result(self.config_results, 'mock-model')
+        result_utils.write_results_to_disk({_CONFIG_NAME: {'unsorted_lists': self.config_results['unsorted_lists'], 'results': [new_result]}}, file_path=self.result_path)
+        with open(file, 'rb') as f:
+            self.assertEqual(f.read(), config_bytes)
+
+        merged = result_utils.load_single_result_from_disk(_CONFIG_NAME, self.result_path)[_CONFIG_NAME]
+        self.assertEqual(merged['unsorted_lists'], self.config_results['unsorted_lists'])
+        self.assertEqual(merged['results'], self.config_results['results'] + [new_result])
+        self.assertEqual(result_utils.load_results_from_disk(self.result_path, mode='basic'), {_CONFIG_NAME: merged})
+
+    def test_shard_replaces_model(self):
+        # Test that the results of a model in a shard replace the results in the config file at the same position
+        model = self.config_results['results'][0]['model']
+        new_result = _new_result(self.config_results, model)
+        result_utils.write_results_to_disk({_CONFIG_NAME: {'unsorted_lists': self.config_results['unsorted_lists'], 'results': [new_result]}}, file_path=self.result_path)
+        merged = result_utils.load_single_result_from_disk(_CONFIG_NAME, self.result_path)[_CONFIG_NAME]
+        self.assertEqual(merged['results'], [new_result] + self.config_results['results'][1:])
+
+    def test_shard_only_config(self):
+        # Test that configs that only have shards are found and that overwrite removes other models
+        config_name = 'sortbench_basic_v1.0_Int-0:1000_002.json.gz'
+        lists = {'list_1': [2, 1]}
+        for model in ['model-a', 'model-b']:
+            result_utils.write_results_to_disk({config_name: {'unsorted_lists': lists, 'results': [{'model': model, 'sorted_lists': {'list_1': '[1, 2]'}}]}}, file_path=self.result_path)
+        self.assertEqual(result_utils.fetch_configs_from_results(self.result_path, mode='basic'), [config_name, _CONFIG_NAME])
+        models = [result['model'] for result in result_utils.load_single_result_from_disk(config_name, self.result_path)[config_name]['results']]
+        self.assertEqual(models, ['model-a', 'model-b'])
+
+        result_utils.write_results_to_disk({config_name: {'unsorted_lists': lists, 'results': [{'model': 'model-b', 'sorted_lists': {'list_1': '[2, 1]'}}]}}, file_path=self.result_path, overwrite=True)
+        results = result_utils.load_single_result_from_disk(config_name, self.result_path)[config_name]['results']
+        self.assertEqual(results, [{'model': 'model-b', 'sorted_lists': {'list_1': '[2, 1]'}}])
+        self.assertFalse(result_utils.check_if_result_available_on_disk(self.result_path, config_name, 'model-a'))
@@ -0,0 +1,130 @@
+import asyncio
+import collections
+import os
+import tempfile
+import unittest
+
+# imported like the scripts do, such that the patched function is the one used by the scheduler
+import util.client_utils as client_utils
+import util.inference_utils as inference_utils
+import util.mock_server_utils as mock_server_utils
+import util.rate_limit_utils as rate_limit_utils
+import util.result_utils as result_utils
+import util.scheduler_utils as scheduler_utils
+
+_CONFIGS = {f'sortbench_basic_v1.0_Int-0:1000_00{size}.json.gz': {f'list_{i}': list(range(size, 0, -1)) for i in range(1, 5)} for size in [2, 4]}
+
+_PROVIDERS = ['openai', 'inncube', 'antropic']
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.original_async_sort_list_with_model = inference_utils.async_sort_list_with_model
+        inference_utils.async_sort_list_with_model = self.sort_list
+        self.original_write_group = scheduler_utils._write_group
+        scheduler_utils._write_group = self.write_group
+        self.original_concurrency = {provider: inference_utils.get_max_concurrency(provider) for provider in ['openai', 'antropic']}
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.failing_model = None
+        # the number of requests that are sent at the same time per provider and its maximum
+        self.in_flight = collections.Counter()
+        self.max_in_flight = collections.Counter()
+        self.max_total_in_flight = 0
+        self.written_in_loop = []
+
+    def tearDown(self):
+        inference_utils.async_sort_list_with_model = self.original_async_sort_list_with_model
+        scheduler_utils._write_group = self.original_write_group
+        for provider, max_concurrency in self.original_concurrency.items():
+            inference_utils.set_max_concurrency(provider, max_concurrency)
+        self.tmp_dir.cleanup()
+
+    async def sort_list(self, unsorted_list, model, return_metrics=False):
+        provider = inference_utils.get_provider(model)
+        self.in_flight[provider] += 1
+        self.max_in_flight[provider] = max(self.max_in_flight[provider], self.in_flight[provider])
+        self.max_total_in_flight = max(self.max_total_in_flight, sum(self.in_flight.values()))
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            self.in_flight[provider] -= 1
+        if model == self.failing_model:
+            raise RuntimeError('fatal')
+        if return_metrics:
+            return str(sorted(unsorted_list)), {'latency': 0.05, 'usage': None}
+        return str(sorted(unsorted_list))
+
+    def write_group(self, *args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            self.written_in_loop.append(True)
+        except RuntimeError:
+            self.written_in_loop.append(False)
+        self.original_write_group(*args, **kwargs)
+
+    def test_providers_run_in_parallel(self):
+        # Test that each provider sends as many requests at once as its concurrency limit and that the providers run at the same time
+        inference_utils.set_max_concurrency('openai', 2)
+        inference_utils.set_max_concurrency('antropic', 1)
+        models = ['gpt-4o', 'gpt-4o-mini', 'claude-3-5-haiku-20241022']
+        groups = scheduler_utils.run_scheduler(_CONFIGS, models, self.tmp_dir.name, verbose=False)
+        self.assertEqual(self.max_in_flight, {'openai': 2, 'antropic': 1})
+        self.assertEqual(self.max_total_in_flight, 3)
+        self.assertEqual(len(groups), 6)
+        # the results are written outside of the event loop
+        self.assertEqual(self.written_in_loop, [False]*len(groups))
+        for config_name, lists in _CONFIGS.items():
+            results = result_utils.load_single_result_from_disk(config_name, self.tmp_dir.name)[config_name]
+            self.assertEqual(sorted([result['model'] for result in results['results']]), sorted(models))
+            for result in results['results']:
+                self.assertEqual(list(result['sorted_lists'].keys()), list(lists.keys()))
+
+    def test_failed_group_is_not_written(self):
+        # Test that results of a model with errors are not written and other models are not affected
+        self.failing_model = 'gpt-4o-mini'
+        scheduler_utils.run_scheduler(_CONFIGS, ['gpt-4o-mini', 'claude-3-5-haiku-20241022'], self.tmp_dir.name, verbose=False)
+        for config_name in _CONFIGS:
+            self.assertFalse(result_utils.check_if_result_available_on_disk(self.tmp_dir.name, config_name, 'gpt-4o-mini'))
+            self.assertTrue(result_utils.check_if_result_available_on_disk(self.tmp_dir.name, config_name, 'claude-3-5-haiku-20241022'))
+
+class TestSchedulerWithMockServer(unittest.TestCase):
+
+    def setUp(self):
+        self.original_base_urls = {provider: inference_utils.get_base_url(provider) for provider in _PROVIDERS}
+        self.original_concurrency = {provider: inference_utils.get_max_concurrency(provider) for provider in _PROVIDERS}
+        self.original_limiters = {provider: rate_limit_utils.get_rate_limiter(provider) for provider in _PROVIDERS}
+        self.original_env = {key: os.environ.get(key) for key in ['OPENAI_API_KEY', 'INNCUBE_API_KEY', 'ANTROPIC_API_KEY']}
+        for key in self.original_env:
+            os.environ[key] = 'mock'
+        # new limiters with the default settings of the providers
+        for provider in _PROVIDERS:
+            rate_limit_utils.set_rate_limiter(provider, None)
+        self.server = mock_server_utils.MockServer(mock_server_utils.MockServerSettings(latency=0.2, seed=0))
+        url = self.server.start()
+        for provider in _PROVIDERS:
+            inference_utils.set_base_url(provider, url)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        for provider in _PROVIDERS:
+            inference_utils.set_base_url(provider, self.original_base_urls[provider])
+            inference_utils.set_max_concurrency(provider, self.original_concurrency[provider])
+            rate_limit_utils.set_rate_limiter(provider, self.original_limiters[provider])
+        for key, value in self.original_env.items():
+            if value is None:
+                del os.environ[key]
+            else:
+                os.environ[key] = value
+        client_utils.close_clients()
+        self.server.stop()
+        self.tmp_dir.cleanup()
+
+    def test_rate_limiter_does_not_throttle(self):
+        # Test that the rate limiters of the providers let all workers send their requests at once before any rate limit is hit
+        for provider in _PROVIDERS:
+            inference_utils.set_max_concurrency(provider, 4)
+        models = ['gpt-4o-mini', 'llama3.1', 'claude-3-5-haiku-20241022']
+        groups = scheduler_utils.run_scheduler(_CONFIGS, models, self.tmp_dir.name, verbose=False)
+        self.assertTrue(all(group.is_complete() for group in groups))
+        self.assertEqual(self.server.n_requests, len(models)*sum(len(lists) for lists in _CONFIGS.values()))
+        self.assertEqual(self.server.max_in_flight, 4*len(_PROVIDERS))
@@ -0,0 +1,59 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import util.cache_utils as cache_utils
+import util.eval_utils as eval_utils
+import util.result_utils as result_utils
+
+_RESULT_PATH = os.path.join(os.path.dirname(__file__), '..', 'benchmark_results')
+_CONFIG_NAME = 'sortbench_basic_v1.0_Int-0:1000_016.json.gz'
+
+class TestScoreCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # the results are read from a copy, such that the index of the results folder is not written to the repository
+        self.result_path = os.path.join(self.tmp_dir.name, 'results')
+        os.makedirs(self.result_path)
+        shutil.copy(os.path.join(_RESULT_PATH, _CONFIG_NAME), self.result_path)
+        self.results = result_utils.load_single_result_from_disk(_CONFIG_NAME, self.result_path)
+        self.results[_CONFIG_NAME]['results'] = [result for result in self.results[_CONFIG_NAME]['results'] if result['model'] != 'deepseekr1']
+        self.original_parse_response = eval_utils.parse_response
+        self.parsed_models = []
+
+    def tearDown(self):
+        eval_utils.parse_response = self.original_parse_response
+        if cache_utils.get_score_cache() is not None:
+            cache_utils.get_score_cache().close()
+        cache_utils.set_score_cache(None)
+        self.tmp_dir.cleanup()
+
+    def parse_response(self, *args, **kwargs):
+        self.parsed_models.append(kwargs['model_name'])
+        return self.original_parse_response(*args, **kwargs)
+
+    def test_only_new_results_are_evaluated(self):
+        # Test that only the results of new or changed models are evaluated and the scores are unchanged
+        df_expected = eval_utils.evaluate_results(self.results)
+        eval_utils.parse_response = self.parse_response
+        cache_utils.set_score_cache(cache_utils.ScoreCache(os.path.join(self.tmp_dir.name, 'cache.sqlite')))
+        results = copy.deepcopy(self.results)
+        new_result = results[_CONFIG_NAME]['results'].pop(1)
+        eval_utils.evaluate_results(results)
+        # a new model is added
+        self.parsed_models = []
+        results[_CONFIG_NAME]['results'].insert(1, new_result)
+        pd.testing.assert_frame_equal(eval_utils.evaluate_results(results), df_expected)
+        self.assertEqual(self.parsed_models, [new_result['model']]*len(new_result['sorted_lists']))
+        # a response of a model changes
+        self.parsed_models = []
+        list_name = next(iter(new_result['sorted_lists']))
+        new_result['sorted_lists'][list_name] = '[1, 2, 3]'
+        df_changed = eval_utils.evaluate_results(results)
+        self.assertEqual(self.parsed_models, [new_result['model']]*len(new_result['sorted_lists']))
+        self.assertEqual(df_changed[(df_changed['Model'] == new_result['model']) & (df_changed['List Name'] == list_name)]['Output List Length'].item(), 3)
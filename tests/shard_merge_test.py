@@ -0,0 +1,96 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+# imported like the scripts do, such that the patched function is the one used by the scheduler
+import util.inference_utils as inference_utils
+import util.merge_utils as merge_utils
+import util.result_utils as result_utils
+import util.scheduler_utils as scheduler_utils
+import util.shard_utils as shard_utils
+
+_CONFIGS = {f'sortbench_basic_v1.0_Int-0:1000_00{size}.json.gz': {f'list_{i}': list(range(size+i, i, -1)) for i in range(1, 13)} for size in [2, 4]}
+_MODELS = ['gpt-4o-mini', 'claude-3-5-haiku-20241022']
+
+class TestShardMerge(unittest.TestCase):
+
+    def setUp(self):
+        self.original_async_sort_list_with_model = inference_utils.async_sort_list_with_model
+        inference_utils.async_sort_list_with_model = self.sort_list
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        inference_utils.async_sort_list_with_model = self.original_async_sort_list_with_model
+        self.tmp_dir.cleanup()
+
+    async def sort_list(self, unsorted_list, model, return_metrics=False):
+        await asyncio.sleep(0)
+        if return_metrics:
+            return str(sorted(unsorted_list)), {'latency': 0.01, 'usage': None}
+        return str(sorted(unsorted_list))
+
+    def test_shards_partition_lists(self):
+        # Test that the shards are disjoint, cover all lists, and do not depend on the order of the lists
+        for model in _MODELS:
+            for config_name, lists in _CONFIGS.items():
+                shards = [shard_utils.shard_lists(model, config_name, lists, (index, 3)) for index in range(1, 4)]
+                self.assertEqual(sorted(list_name for shard in shards for list_name in shard), sorted(lists))
+                reversed_lists = dict(reversed(list(lists.items())))
+                self.assertEqual(list(shard_utils.shard_lists(model, config_name, reversed_lists, (2, 3))), list(reversed(list(shards[1]))))
+        self.assertEqual(shard_utils.parse_shard('2/3'), (2, 3))
+        for value in ['0/3', '4/3', '1', 'a/b']:
+            self.assertRaises(ValueError, shard_utils.parse_shard, value)
+
+    def test_merged_shards_equal_full_run(self):
+        # Test that merging the results folders of all shards gives the results of a run without shards
+        full_path = os.path.join(self.tmp_dir.name, 'full')
+        scheduler_utils.run_scheduler(_CONFIGS, _MODELS, full_path, verbose=False)
+        shard_paths = []
+        for index in range(1, 4):
+            shard_path = os.path.join(self.tmp_dir.name, f'shard_{index}')
+            scheduler_utils.run_scheduler(_CONFIGS, _MODELS, shard_path, verbose=False, shard=(index, 3))
+            shard_paths.append(shard_path)
+        # running a shard again does not schedule anything
+        groups, _ = scheduler_utils.build_work_queue(_CONFIGS, _MODELS, shard_paths[0], shard=(1, 3))
+        self.assertEqual(groups, [])
+
+        sources = [(path, result_utils.load_results_from_disk(path)) for path in shard_paths + [shard_paths[0]]]
+        merged, n_duplicates, conflicts = merge_utils.merge_results(sources)
+        self.assertEqual(conflicts, [])
+        self.assertEqual(n_duplicates, sum(len(result['sorted_lists']) for config_results in sources[0][1].values() for result in config_results['results']))
+        merged_path = os.path.join(self.tmp_dir.name, 'merged')
+        merge_utils.write_merged_results(merged, merged_path)
+        full_results = result_utils.load_results_from_disk(full_path)
+        merged_results = result_utils.load_results_from_disk(merged_path)
+        for config_name in _CONFIGS:
+            self.assertEqual(merged_results[config_name]['unsorted_lists'], full_results[config_name]['unsorted_lists'])
+            self.assertEqual(list(merged_results[config_name]['unsorted_lists']), list(full_results[config_name]['unsorted_lists']))
+            self.assertEqual(sorted(merged_results[config_name]['results'], key=lambda result: result['model']),
+                             sorted(full_results[config_name]['results'], key=lambda result: result['model']))
+
+    def test_shards_in_one_folder(self):
+        # Test that the lists of shards that are run one after another in the same folder are added up
+        full_path = os.path.join(self.tmp_dir.name, 'full')
+        scheduler_utils.run_scheduler(_CONFIGS, _MODELS, full_path, verbose=False)
+        shard_path = os.path.join(self.tmp_dir.name, 'shards')
+        for index in range(1, 4):
+            scheduler_utils.run_scheduler(_CONFIGS, _MODELS, shard_path, verbose=False, shard=(index, 3))
+        full_results = result_utils.load_results_from_disk(full_path)
+        shard_results = result_utils.load_results_from_disk(shard_path)
+        for config_name, lists in _CONFIGS.items():
+            self.assertEqual(shard_results[config_name]['unsorted_lists'], lists)
+            self.assertEqual(sorted(shard_results[config_name]['results'], key=lambda result: result['model']),
+                             sorted(full_results[config_name]['results'], key=lambda result: result['model']))
+            for model in _MODELS:
+                self.assertTrue(result_utils.check_if_lists_available_on_disk(shard_path, config_name, model, list(lists)))
+
+    def test_conflicts(self):
+        # Test that differing responses and unsorted lists are reported and the first source is kept
+        config_name = next(iter(_CONFIGS))
+        first = {config_name: {'unsorted_lists': {'list_1': [2, 1]}, 'results': [{'model': 'gpt-4o', 'sorted_lists': {'list_1': '[1, 2]'}}]}}
+        second = {config_name: {'unsorted_lists': {'list_1': [1, 2]}, 'results': [{'model': 'gpt-4o', 'sorted_lists': {'list_1': '[2, 1]'}}]}}
+        merged, n_duplicates, conflicts = merge_utils.merge_results([('first', first), ('second', second)])
+        self.assertEqual(merged, first)
+        self.assertEqual(n_duplicates, 0)
+        self.assertEqual(len(conflicts), 2)
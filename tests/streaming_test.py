@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+import util.eval_utils as eval_utils
+import util.result_db_utils as result_db_utils
+import util.result_utils as result_utils
+import util.score_utils as score_utils
+import util.token_utils as token_utils
+
+_RESULT_PATH = os.path.join(os.path.dirname(__file__), '..', 'benchmark_results')
+_CONFIG_NAMES = ['sortbench_basic_v1.0_Int-0:1000_016.json.gz', 'sortbench_basic_v1.0_Float-0:1000_016.json.gz']
+_CONFIG_NAME = 'sortbench_basic_v1.0_Int-0:1000_004.json.gz'
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # the results are read from a copy, such that the index of the results folder is not written to the repository
+        self.result_path = os.path.join(self.tmp_dir.name, 'results')
+        os.makedirs(self.result_path)
+        for config_name in _CONFIG_NAMES:
+            shutil.copy(os.path.join(_RESULT_PATH, config_name), self.result_path)
+
+    def tearDown(self):
+        token_utils.set_thinking_token_counter(None)
+        self.tmp_dir.cleanup()
+
+    def _write_shards(self):
+        result_path = os.path.join(self.tmp_dir.name, 'shards')
+        lists = {'list_1': [3, 1, 2, 0], 'list_2': [1, 2, 4, 3]}
+        result_utils._write_gzip_json(os.path.join(result_path, _CONFIG_NAME),
+                                      {'unsorted_lists': {'list_1': lists['list_1']}, 'results': [{'model': 'a', 'sorted_lists': {'list_1': '[0, 1, 2, 3]'}},
+                                                                                                   {'model': 'b', 'sorted_lists': {'list_1': '[3, 2, 1, 0]'}}]})
+        shards = [('d', 3, {'list_2': '[1, 2]'}), ('b', 1, {'list_1': '[0, 1, 2]'}), ('c', 2, {'list_1': '[]', 'list_2': '[1]'})]
+        for model, written, sorted_lists in shards:
+            result_utils._write_gzip_json(os.path.join(result_path, result_utils._shard_file(_CONFIG_NAME, model)),
+                                          {'unsorted_lists': {list_name: lists[list_name] for list_name in sorted_lists}, 'results': [{'model': model, 'sorted_lists': sorted_lists}], 'written': written})
+        return result_path
+
+    def test_same_results_as_loading(self):
+        # Test that the models are merged from the config file and the shards like when the whole config is loaded
+        result_path = self._write_shards()
+        db_path = os.path.join(self.tmp_dir.name, 'results.sqlite')
+        result_db_utils.get_result_db(db_path).write_results(result_utils.load_single_result_from_disk(_CONFIG_NAME, result_path))
+        for path in [result_path, db_path]:
+            expected = result_utils.load_single_result_from_disk(_CONFIG_NAME, path)[_CONFIG_NAME]
+            unsorted_lists, model_results = result_utils.iter_config_results(_CONFIG_NAME, path)
+            self.assertEqual({'unsorted_lists': unsorted_lists, 'results': list(model_results)}, expected)
+            self.assertEqual([cur_result['model'] for cur_result in expected['results']], ['a', 'b', 'c', 'd'])
+            self.assertEqual(list(unsorted_lists), ['list_1', 'list_2'])
+        self.assertEqual(result_utils.iter_config_results('sortbench_basic_v1.0_Int-0:1000_008.json.gz', result_path), (None, None))
+
+    def test_chunks(self):
+        # Test that the scores are written in chunks of a fixed size and are the same as the scores of the whole configs
+        token_utils.set_thinking_token_counter(token_utils.get_token_counter('approximate'))
+        df_expected = []
+        for config_name in _CONFIG_NAMES:
+            df_expected.append(eval_utils.evaluate_results(result_utils.load_single_result_from_disk(config_name, self.result_path)))
+        df_expected = pd.concat(df_expected)
+        chunks = list(score_utils.iter_scores(_CONFIG_NAMES, self.result_path, token_counter='approximate', chunk_size=7))
+        self.assertEqual([len(chunk) for chunk in chunks[:-1]], [7]*(len(chunks) - 1))
+        self.assertEqual(pd.concat(chunks).to_csv(index=False), df_expected.to_csv(index=False))
+        csv_file = os.path.join(self.tmp_dir.name, 'scores.csv')
+        self.assertEqual(score_utils.write_scores(chunks, csv_file=csv_file), len(df_expected))
+        with open(csv_file, 'r') as f:
+            self.assertEqual(f.read(), df_expected.to_csv(index=False))
+
+    def test_files_are_read_once(self):
+        # Test that the models and lists are taken from the index, such that each file is read once
+        result_path = self._write_shards()
+        expected = result_utils.load_single_result_from_disk(_CONFIG_NAME, result_path)[_CONFIG_NAME]
+        read_files = []
+        read_gzip_json = result_utils._read_gzip_json
+        def count_reads(file_path, file_name):
+            read_files.append(file_name)
+            return read_gzip_json(file_path, file_name)
+        with mock.patch.object(result_utils, '_read_gzip_json', count_reads):
+            unsorted_lists, model_results = result_utils.iter_config_results(_CONFIG_NAME, result_path)
+            self.assertEqual({'unsorted_lists': unsorted_lists, 'results': list(model_results)}, expected)
+        self.assertEqual(sorted(read_files), sorted(set(read_files)))
+        self.assertEqual(len(read_files), 4)
+
+    def test_removed_shard(self):
+        # Test that the models of a shard that was removed after the files were indexed are skipped
+        result_path = self._write_shards()
+        unsorted_lists, model_results = result_utils.iter_config_results(_CONFIG_NAME, result_path)
+        os.remove(os.path.join(result_path, result_utils._shard_file(_CONFIG_NAME, 'd')))
+        self.assertEqual([cur_result['model'] for cur_result in model_results], ['a', 'b', 'c'])
+        self.assertEqual(list(unsorted_lists), ['list_1', 'list_2'])
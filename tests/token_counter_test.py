@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+import util.cache_utils as cache_utils
+import util.eval_utils as eval_utils
+import util.token_utils as token_utils
+
+class CountingCounter:
+    """
+    Token counter that records the batches it counts.
+    """
+
+    def __init__(self):
+        self.name = 'counting'
+        self.batches = []
+
+    def count(self, texts):
+        self.batches.append(list(texts))
+        return [len(text) for text in texts]
+
+class TestTokenCounter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.counter = CountingCounter()
+        token_utils.set_thinking_token_counter(self.counter)
+
+    def tearDown(self):
+        token_utils.set_thinking_token_counter(None)
+        if cache_utils.get_token_count_cache() is not None:
+            cache_utils.get_token_count_cache().close()
+        cache_utils.set_token_count_cache(None)
+        self.tmp_dir.cleanup()
+
+    def test_approximate_counter(self):
+        # Test that words, groups of up to three digits, and punctuation are counted, plus the start of the text
+        counter = token_utils.get_token_counter('approximate')
+        self.assertEqual(counter.count(['<think>Sort 12345.</think>', '']), [1 + 11, 1])
+        self.assertIsInstance(token_utils.get_token_counter(), token_utils.TokenizerCounter)
+
+    def test_batched_and_cached(self):
+        # Test that each distinct trace is counted once in a single batch, and not again if it is cached
+        responses = ['<think>a</think>[1]', '[1]', '<think>bb</think>[2]', '<think>a</think>[1]', '<think>ccc</think>[3]']
+        usages = [None, None, None, None, {'reasoning_tokens': 7}]
+        expected = [len('<think>a</think>'), 0, len('<think>bb</think>'), len('<think>a</think>'), 7]
+        cache_utils.set_token_count_cache(cache_utils.TokenCountCache(os.path.join(self.tmp_dir.name, 'cache.sqlite')))
+        self.assertEqual(eval_utils.get_thinking_lengths(responses, usages), expected)
+        self.assertEqual(self.counter.batches, [['<think>a</think>', '<think>bb</think>']])
+        cache_utils.get_token_count_cache().flush()
+        self.assertEqual(eval_utils.get_thinking_lengths(responses + ['<think>d</think>'], usages + [None]), expected + [len('<think>d</think>')])
+        self.assertEqual(self.counter.batches[1:], [['<think>d</think>']])
@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+
+import util.batch_utils as batch_utils
+import util.eval_utils as eval_utils
+import util.inference_utils as inference_utils
+import util.journal_utils as journal_utils
+import util.token_utils as token_utils
+
+_CONFIG_NAME = 'sortbench_basic_v1.0_Int-0:1000_004.json.gz'
+_LISTS = {f'list_{i}': [4*i, 3, 2*i, 1] for i in range(1, 4)}
+
+class TestTokenUsage(unittest.TestCase):
+
+    def setUp(self):
+        self.original_sort_list_with_model = inference_utils.sort_list_with_model
+        inference_utils.sort_list_with_model = self.sort_list
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.journal_path = journal_utils.get_journal_path(self.tmp_dir.name)
+
+    def tearDown(self):
+        inference_utils.sort_list_with_model = self.original_sort_list_with_model
+        self.tmp_dir.cleanup()
+
+    def sort_list(self, unsorted_list, model, return_metrics=False):
+        usage = {'prompt_tokens': 50, 'completion_tokens': len(unsorted_list), 'reasoning_tokens': 0}
+        return str(sorted(unsorted_list)), {'latency': 0.0, 'usage': usage}
+
+    def test_get_usage(self):
+        # Test that the usage of both APIs is converted to the same format
+        openai_usage = {'prompt_tokens': 10, 'completion_tokens': 20, 'total_tokens': 30,
+                        'completion_tokens_details': {'reasoning_tokens': 12}}
+        self.assertEqual(inference_utils.get_usage(openai_usage), {'prompt_tokens': 10, 'completion_tokens': 20, 'reasoning_tokens': 12})
+        self.assertEqual(inference_utils.get_usage({'prompt_tokens': 10, 'completion_tokens': 20}), {'prompt_tokens': 10, 'completion_tokens': 20, 'reasoning_tokens': None})
+        self.assertEqual(inference_utils.get_usage({'input_tokens': 10, 'output_tokens': 20}), {'prompt_tokens': 10, 'completion_tokens': 20, 'reasoning_tokens': None})
+        self.assertIsNone(inference_utils.get_usage(None))
+
+    def test_usage_is_stored(self):
+        # Test that the usage is stored with the responses and kept when resuming from the journal
+        usage = {'prompt_tokens': 1, 'completion_tokens': 2, 'reasoning_tokens': None}
+        journal_utils.append_to_journal(self.journal_path, _CONFIG_NAME, 'gpt-4o', 'list_1', '[1, 3, 4, 4]', usage=usage)
+        results = inference_utils.run_single_config_for_model(_CONFIG_NAME, _LISTS, model='gpt-4o', verbose=False, journal_path=self.journal_path)
+        cur_results = results[_CONFIG_NAME]['results'][0]
+        self.assertEqual(list(cur_results['usage'].keys()), list(_LISTS.keys()))
+        self.assertEqual(cur_results['usage']['list_1'], usage)
+        self.assertEqual(cur_results['usage']['list_2']['completion_tokens'], 4)
+        self.assertNotIn('metrics', cur_results)
+
+    def test_batch_usage(self):
+        # Test that the usage of batch outputs is imported
+        line = {'custom_id': 'a', 'response': {'status_code': 200, 'body': {'choices': [{'message': {'content': '[1, 2]'}}], 'usage': {'prompt_tokens': 5, 'completion_tokens': 6}}}}
+        self.assertEqual(batch_utils.parse_batch_output_usage(line), {'prompt_tokens': 5, 'completion_tokens': 6, 'reasoning_tokens': None})
+        line = {'custom_id': 'b', 'result': {'type': 'errored'}}
+        self.assertIsNone(batch_utils.parse_batch_output_usage(line))
+
+    def test_thinking_length_from_usage(self):
+        # Test that the reported reasoning tokens are used instead of the tokenizer
+        counter = token_utils.TokenizerCounter()
+        token_utils.set_thinking_token_counter(counter)
+        response = '<think>first the small numbers</think>[1, 2]'
+        self.assertEqual(eval_utils.get_thinking_length(response, {'prompt_tokens': 1, 'completion_tokens': 30, 'reasoning_tokens': 25}), 25)
+        self.assertEqual(eval_utils.get_thinking_length('[1, 2]', None), 0)
+        self.assertIsNone(counter.tokenizer)
+        token_utils.set_thinking_token_counter(None)